@@ -3,12 +3,65 @@ from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     database_url: str = "sqlite:///./backend/db.sqlite3"
+    # Driver URL for the async engine; derived from database_url when empty
+    async_database_url: str = ""
+    # Connection pool (server databases; SQLite keeps SQLAlchemy's defaults)
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout: int = 30
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    # Run `alembic upgrade head` on startup; disable when migrations run as a deploy step
+    db_auto_migrate: bool = True
+    # Read replicas (same backend as database_url) serving read-only endpoints
+    database_replica_urls: list[str] = []
+    # A replica that failed to connect is skipped for this long, then tried again
+    db_replica_retry_seconds: float = 30.0
+    # After a client's own write its reads go to the primary for this long
+    db_read_your_writes_seconds: float = 5.0
     secret_key: str = "change-this-secret"
     access_token_expire_minutes: int = 60 * 24
     media_dir: str = "backend/media"
     default_location: str = "Main Office"
+    # Sequence values each process reserves at a time for tracking/receipt numbers
+    code_block_size: int = 100
+    # Largest batch accepted by POST /parcels/bulk
+    parcel_bulk_max_items: int = 5000
+    # Largest batch of rider events accepted by POST /delivery/events
+    rider_events_max_items: int = 1000
+    # Incremental Parquet export for analytics (export_parquet.py)
+    parquet_export_dir: str = "backend/analytics"
+    # Re-read rows this far behind the watermark so late-committing writes are not missed
+    parquet_export_overlap_seconds: int = 300
+    parquet_export_batch_rows: int = 50000
     otp_expiry_minutes: int = 30
+    # HMAC key for OTP hashes; falls back to secret_key when empty
+    otp_secret_key: str = ""
+    # Wrong codes allowed per parcel within the lockout window before verification is refused
+    otp_max_attempts: int = 5
+    otp_lockout_minutes: int = 15
     cors_origins: list[str] = ["*"]
+
+    # SQLite performance profile, applied to every new connection
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_mmap_size: int = 256 * 1024 * 1024
+    sqlite_cache_size: int = -64000  # negative = KiB, i.e. ~64MB per connection
+    sqlite_temp_store: str = "MEMORY"
+    # wal_checkpoint + optimize interval (0 disables)
+    sqlite_maintenance_interval_seconds: int = 600
+
+    # Authenticated staff cache (per process; 0 TTL disables)
+    staff_cache_ttl_seconds: float = 60.0
+    staff_cache_max_entries: int = 1024
+    # How often each process checks the shared version for changes made elsewhere
+    staff_cache_version_check_seconds: float = 2.0
+
+    # Public tracking lookup cache (per process; 0 TTL disables). Other processes'
+    # writes evict entries through the live tracking feed, else only on expiry
+    tracking_cache_ttl_seconds: float = 30.0
+    tracking_cache_max_entries: int = 10000
     
     # FastHub TZ BlkSMS Configuration
     blksms_base_url: str = "https://bulksms.fasthub.co.tz"
@@ -16,6 +69,54 @@ class Settings(BaseSettings):
     blksms_client_secret: str = ""
     blksms_sender_id: str = "REAL DEAL"
     blksms_enabled: bool = False
+    blksms_timeout_seconds: float = 30.0
+    blksms_max_connections: int = 20
+    blksms_max_concurrency: int = 10
+    blksms_bulk_chunk_size: int = 50
+    blksms_bulk_concurrency: int = 4
+    # Provider throughput limit in messages per second per sender id (0 disables)
+    blksms_rate_limit_per_second: float = 0.0
+    blksms_rate_limit_burst: int = 50
+    blksms_rate_limit_max_wait_seconds: float = 10.0
+    blksms_breaker_failure_threshold: int = 5
+    blksms_breaker_reset_seconds: float = 30.0
+
+    # SMS outbox worker
+    sms_outbox_worker_enabled: bool = True
+    sms_outbox_batch_size: int = 50
+    sms_outbox_poll_seconds: float = 2.0
+    sms_outbox_max_attempts: int = 5
+    sms_outbox_retry_base_seconds: int = 30
+    sms_outbox_claim_timeout_seconds: int = 300
+
+    # Live tracking push over SSE / WebSocket, fed by the parcel_events table
+    live_tracking_enabled: bool = True
+    live_tracking_poll_seconds: float = 0.5
+    live_tracking_heartbeat_seconds: float = 15.0
+    # SSE streams end after this long and the client resumes with Last-Event-ID,
+    # so a graceful shutdown never waits longer on open streams
+    live_tracking_max_stream_seconds: float = 300.0
+    live_tracking_retention_hours: int = 24
+    # Events queued per subscriber; a client that falls further behind is disconnected
+    live_tracking_queue_size: int = 100
+
+    # Idempotency-Key header on POST/PUT/PATCH/DELETE: responses are replayed to
+    # retries for the TTL; a retry arriving while the first request still runs
+    # waits up to the wait time for its response
+    idempotency_ttl_hours: int = 24
+    idempotency_wait_seconds: float = 30.0
+    # An unfinished request older than this is considered dead and its key reusable
+    idempotency_lock_seconds: float = 300.0
+
+    # Delta sync for the mobile app (GET /sync/changes)
+    sync_page_size: int = 500
+    sync_max_page_size: int = 5000
+    # How long a sequence number missing from the change log is waited for (a
+    # transaction that took it and has not committed yet) before it is taken as
+    # rolled back and a sync cursor may pass it
+    sync_gap_grace_seconds: float = 60.0
+    # How often superseded change log entries are removed (0 disables)
+    sync_compact_interval_seconds: int = 3600
 
     class Config:
         env_file = ".env"
@@ -1,25 +1,194 @@
-from sqlalchemy import create_engine, event
-from sqlalchemy.orm import sessionmaker, declarative_base
-from sqlalchemy.engine import Engine
+import itertools
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from sqlalchemy.engine import Engine, make_url
 
 from .core.config import settings
 
+logger = logging.getLogger(__name__)
+
+IS_SQLITE = settings.database_url.startswith("sqlite")
+
 connect_args = {}
-if settings.database_url.startswith("sqlite"):
+pool_args = {}
+if IS_SQLITE:
     connect_args = {"check_same_thread": False}
+else:
+    pool_args = {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+engine = create_engine(settings.database_url, connect_args=connect_args, future=True, **pool_args)
+
+# Async drivers for the same database, used by `async def` routes
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def async_database_url(database_url: Optional[str] = None) -> str:
+    if database_url is None and settings.async_database_url:
+        return settings.async_database_url
+    url = make_url(database_url or settings.database_url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise RuntimeError(f"No async driver configured for {backend!r}; set ASYNC_DATABASE_URL")
+    return url.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
 
-engine = create_engine(settings.database_url, connect_args=connect_args, future=True)
+
+# Connections are opened lazily, so importing this without the async driver
+# installed only fails once an async route is hit
+async_engine = create_async_engine(async_database_url(), connect_args=connect_args, **pool_args)
+
+
+def sqlite_pragmas() -> list[str]:
+    """
+    Connection profile for SQLite: WAL lets readers proceed while a write is in
+    progress, NORMAL sync is durable across app crashes in WAL mode, and
+    busy_timeout makes writers wait for the lock instead of failing with
+    "database is locked".
+    """
+    return [
+        "PRAGMA foreign_keys=ON",
+        f"PRAGMA journal_mode={settings.sqlite_journal_mode}",
+        f"PRAGMA synchronous={settings.sqlite_synchronous}",
+        f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}",
+        f"PRAGMA mmap_size={int(settings.sqlite_mmap_size)}",
+        f"PRAGMA cache_size={int(settings.sqlite_cache_size)}",
+        f"PRAGMA temp_store={settings.sqlite_temp_store}",
+    ]
 
 
 @event.listens_for(Engine, "connect")
 def set_sqlite_pragma(dbapi_connection, connection_record):
+    if not IS_SQLITE:
+        return
+    cursor = dbapi_connection.cursor()
     try:
-        cursor = dbapi_connection.cursor()
-        cursor.execute("PRAGMA foreign_keys=ON")
+        for pragma in sqlite_pragmas():
+            try:
+                cursor.execute(pragma)
+            except Exception:
+                # e.g. journal_mode on an in-memory database; keep the others
+                logger.warning("SQLite pragma failed: %s", pragma)
+    finally:
         cursor.close()
-    except Exception:
-        pass
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, future=True)
+# expire_on_commit=False: attributes cannot be lazily reloaded outside an await
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
 Base = declarative_base()
+
+
+class ReplicaSet:
+    """
+    Read replicas of the primary database, one sync and one async engine each.
+
+    `candidates` lists the replicas to try for a read, rotating round robin and
+    skipping any marked down in the last `retry_seconds`. It is empty (read from
+    the primary) when no replica is available or when the client wrote within
+    `sticky_seconds`, so clients always see their own writes despite replica lag.
+    Write times are tracked per process.
+    """
+
+    def __init__(self, urls: List[str], retry_seconds: float, sticky_seconds: float):
+        self.urls = list(urls)
+        self.retry_seconds = retry_seconds
+        self.sticky_seconds = sticky_seconds
+        self.engines = [create_engine(url, connect_args=connect_args, future=True, **pool_args) for url in self.urls]
+        self.async_engines = [
+            create_async_engine(async_database_url(url), connect_args=connect_args, **pool_args) for url in self.urls
+        ]
+
+        self._rotation = itertools.count()
+        self._down_until = [0.0] * len(self.urls)
+        self._writes: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.urls)
+
+    def candidates(self, client: Optional[str] = None) -> List[int]:
+        if not self.enabled:
+            return []
+        now = time.monotonic()
+        with self._lock:
+            if client is not None and self._writes.get(client, 0.0) > now:
+                return []
+            start = next(self._rotation) % len(self.urls)
+            order = [(start + offset) % len(self.urls) for offset in range(len(self.urls))]
+            return [index for index in order if self._down_until[index] <= now]
+
+    def mark_down(self, index: int) -> None:
+        logger.warning("Read replica %s unavailable; retrying in %ss", index, self.retry_seconds)
+        with self._lock:
+            self._down_until[index] = time.monotonic() + self.retry_seconds
+
+    def note_write(self, client: str) -> None:
+        if not self.enabled or self.sticky_seconds <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            # Drop expired entries once the map grows, so it stays bounded by active writers
+            if len(self._writes) > 10000:
+                self._writes = {key: until for key, until in self._writes.items() if until > now}
+            self._writes[client] = now + self.sticky_seconds
+
+    def status(self) -> List[dict]:
+        now = time.monotonic()
+        return [
+            {"replica": index, "healthy": self._down_until[index] <= now}
+            for index in range(len(self.urls))
+        ]
+
+    async def dispose(self) -> None:
+        for sync_engine in self.engines:
+            sync_engine.dispose()
+        for replica_engine in self.async_engines:
+            await replica_engine.dispose()
+
+
+replicas = ReplicaSet(
+    settings.database_replica_urls,
+    retry_seconds=settings.db_replica_retry_seconds,
+    sticky_seconds=settings.db_read_your_writes_seconds,
+)
+
+
+def open_read_session(client: Optional[str] = None) -> Session:
+    """A session on a healthy replica unless `client` just wrote, else on the primary. Caller closes it."""
+    for index in replicas.candidates(client):
+        db = SessionLocal(bind=replicas.engines[index])
+        try:
+            db.connection()
+            return db
+        except (OperationalError, OSError):
+            db.close()
+            replicas.mark_down(index)
+    return SessionLocal()
+
+
+def sqlite_maintenance(bind: Engine = engine) -> None:
+    """
+    Fold the WAL back into the database file (keeps the -wal file and read
+    amplification small) and let SQLite refresh planner statistics.
+    """
+    if not IS_SQLITE:
+        return
+    with bind.connect() as conn:
+        conn.execute(text("PRAGMA wal_checkpoint(TRUNCATE)"))
+        conn.execute(text("PRAGMA optimize"))
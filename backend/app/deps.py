@@ -1,11 +1,18 @@
-from typing import Generator, Optional
+import hashlib
+import uuid
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, AsyncIterator, Generator, Optional
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.requests import HTTPConnection
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from .db import SessionLocal
+from .db import AsyncSessionLocal, SessionLocal, open_read_session, replicas
 from .models import Staff, StaffRole
+from .services.staff_cache import staff_cache
 from .utils.security import decode_access_token
 
 
@@ -20,7 +27,91 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# Path parameters holding uuid primary keys, with the 404 each route gives for an unknown one
+ID_PATH_PARAMS = {
+    "parcel_id": "Parcel not found",
+    "tracking_history_id": "Tracking history not found",
+    "rider_id": "Rider not found",
+    "staff_id": "Staff not found",
+    "item_id": "Item not found",
+}
+
+
+def is_uuid(value: str) -> bool:
+    try:
+        uuid.UUID(value)
+        return True
+    except ValueError:
+        return False
+
+
+def valid_path_ids(connection: HTTPConnection) -> None:
+    """
+    404 for a malformed id in the path, as for an unknown one: PostgreSQL's uuid
+    columns reject such a value with an error instead of matching no row.
+    """
+    for name, value in connection.path_params.items():
+        if name in ID_PATH_PARAMS and not is_uuid(value):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=ID_PATH_PARAMS[name])
+
+
+def client_key(request: Request) -> str:
+    """Identifies a client for read-your-writes: its bearer token, else its address."""
+    authorization = request.headers.get("authorization")
+    if authorization:
+        return hashlib.sha256(authorization.encode()).hexdigest()
+    return request.client.host if request.client else ""
+
+
+def get_read_db(request: Request) -> Generator[Session, None, None]:
+    """Session for read-only routes, on a healthy replica unless this client just wrote."""
+    db = open_read_session(client_key(request))
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+@asynccontextmanager
+async def async_read_session(request: Request) -> AsyncIterator[AsyncSession]:
+    """`get_async_read_db` for routes that only need a session some of the time."""
+    db = None
+    for index in replicas.candidates(client_key(request)):
+        db = AsyncSessionLocal(bind=replicas.async_engines[index])
+        try:
+            await db.connection()
+            break
+        except (OperationalError, OSError):
+            await db.close()
+            db = None
+            replicas.mark_down(index)
+    if db is None:
+        db = AsyncSessionLocal()
+    async with db:
+        yield db
+
+
+async def get_async_read_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """`get_read_db` for async routes."""
+    async with async_read_session(request) as db:
+        yield db
+
+
 def get_current_staff(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> Staff:
+    return _resolve_staff(token, db)
+
+
+async def get_current_staff_async(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)) -> Staff:
+    """`get_current_staff` for async routes; the principal is attached to the route's AsyncSession."""
+    return await db.run_sync(lambda session: _resolve_staff(token, session))
+
+
+def _resolve_staff(token: str, db: Session) -> Staff:
     payload = decode_access_token(token)
     
     if payload is None:
@@ -28,6 +119,11 @@ def get_current_staff(token: str = Depends(oauth2_scheme), db: Session = Depends
     
     staff_id_str = payload.get("sub")
     
+    # Active principals are served from the per-process cache without a query
+    staff = staff_cache.get(db, staff_id_str) if staff_id_str else None
+    if staff is not None:
+        return staff
+
     # Since the Staff model uses String(36) for UUID, we can query directly with the string
     staff = db.query(Staff).filter(Staff.id == staff_id_str).first()
     
@@ -37,6 +133,7 @@ def get_current_staff(token: str = Depends(oauth2_scheme), db: Session = Depends
     if not staff.is_active:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Inactive user")
     
+    staff_cache.put(staff)
     return staff
 
 
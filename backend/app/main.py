@@ -1,15 +1,21 @@
+import asyncio
 import os
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.models import OAuthFlows as OAuthFlowsModel, SecuritySchemeType
 from fastapi.security import OAuth2
 
 from .core.config import settings
-from .db import Base, engine
+from .db import async_engine, IS_SQLITE, replicas
+from .deps import client_key, valid_path_ids
+from .schema import migrate
 from .models import *  # noqa
 
-from .routers import auth, staff, riders, parcels, dispatch, delivery, payments, finance, inventory, sms, tracking
+from .services import sms_outbox, db_maintenance, live_tracking, change_log
+from .services.idempotency import idempotency_keys
+from .services.sms_service import sms_service
+from .routers import auth, staff, riders, parcels, dispatch, delivery, payments, finance, inventory, sms, tracking, analytics, export, sync
 
 
 class OAuth2PasswordBearerWithCookie(OAuth2):
@@ -23,12 +29,49 @@ async def lifespan(app: FastAPI):
     # Startup logic
     print("Application starting up...")
     os.makedirs(settings.media_dir, exist_ok=True)
-    Base.metadata.create_all(bind=engine)
+    # Schema is managed by Alembic (backend/migrations); with DB_AUTO_MIGRATE=false
+    # run `alembic upgrade head` as a release step instead
+    if settings.db_auto_migrate:
+        migrate()
+    
+    # Deliver queued SMS in the background so requests never wait on the gateway
+    background_stop = asyncio.Event()
+    outbox_task = None
+    if settings.sms_outbox_worker_enabled:
+        outbox_task = asyncio.create_task(sms_outbox.run_worker(background_stop))
+    
+    # Push committed parcel events to this process's SSE / WebSocket subscribers
+    # and evict the tracking lookups they make stale
+    live_tracking_task = None
+    if settings.live_tracking_enabled:
+        live_tracking_task = asyncio.create_task(live_tracking.run_feed(background_stop))
+    
+    # Drop change log entries superseded by newer changes of the same row
+    compaction_task = None
+    if settings.sync_compact_interval_seconds > 0:
+        compaction_task = asyncio.create_task(change_log.run_compaction(background_stop))
+    
+    # Periodic WAL checkpoint / planner statistics refresh for SQLite
+    maintenance_task = None
+    if IS_SQLITE and settings.sqlite_maintenance_interval_seconds > 0:
+        maintenance_task = asyncio.create_task(db_maintenance.run_maintenance(background_stop))
     
     yield  # This is where the application runs
     
     # Shutdown logic
     print("Application shutting down gracefully...")
+    background_stop.set()
+    if outbox_task:
+        await outbox_task
+    if live_tracking_task:
+        await live_tracking_task
+    if compaction_task:
+        await compaction_task
+    if maintenance_task:
+        await maintenance_task
+    await sms_service.aclose()
+    await async_engine.dispose()
+    await replicas.dispose()
     # Add any cleanup code here (close database connections, etc.)
 
 
@@ -36,7 +79,8 @@ app = FastAPI(
     title="Fulfillmentea API", 
     version="0.2.0",
     openapi_tags=[{"name": "auth"}],
-    lifespan=lifespan
+    lifespan=lifespan,
+    dependencies=[Depends(valid_path_ids)],
 )
 
 # Health check endpoint
@@ -44,6 +88,23 @@ app = FastAPI(
 async def health_check():
     return {"status": "healthy", "service": "FulfillmentEA Backend"}
 
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+@app.middleware("http")
+async def read_your_writes(request: Request, call_next):
+    # A successful write pins the client's reads to the primary for a few seconds
+    response = await call_next(request)
+    if replicas.enabled and request.method not in READ_METHODS and response.status_code < 400:
+        replicas.note_write(client_key(request))
+    return response
+
+
+@app.middleware("http")
+async def replay_idempotent_requests(request: Request, call_next):
+    # Retried writes carrying the same Idempotency-Key get the first response back
+    return await idempotency_keys.handle(request, call_next, client_key(request))
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.cors_origins,
@@ -63,6 +124,9 @@ app.include_router(payments.router, prefix="/payments", tags=["payments"])
 app.include_router(finance.router, prefix="/finance", tags=["finance"])
 app.include_router(inventory.router, prefix="/inventory", tags=["inventory"])
 app.include_router(sms.router, prefix="/sms", tags=["sms"])
+app.include_router(analytics.router, prefix="/analytics", tags=["analytics"])
+app.include_router(export.router, prefix="/export", tags=["export"])
+app.include_router(sync.router, prefix="/sync", tags=["sync"])
 
 
 # Add global security scheme for Bearer token in Swagger UI
@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import date, datetime
 from enum import Enum
 from typing import Optional
 from uuid import uuid4
@@ -6,19 +6,26 @@ from uuid import uuid4
 from sqlalchemy import (
     Column,
     String,
+    BigInteger,
+    Date,
     DateTime,
+    Integer,
     Boolean,
     Enum as SAEnum,
     ForeignKey,
     Float,
     Text,
     Index,
+    LargeBinary,
 )
+from sqlalchemy import inspect
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 
 from .db import Base
 
-UUID = String(36)
+# Native uuid on PostgreSQL, 36-char text elsewhere; values are str either way
+UUID = String(36).with_variant(postgresql.UUID(as_uuid=False), "postgresql")
 
 
 # Mixins
@@ -89,6 +96,13 @@ class RaisedBy(str, Enum):
     STAFF = "STAFF"
 
 
+class SmsStatus(str, Enum):
+    PENDING = "PENDING"
+    SENDING = "SENDING"
+    SENT = "SENT"
+    FAILED = "FAILED"
+
+
 # Models
 class Staff(Base, TimestampMixin):
     __tablename__ = "staff"
@@ -151,6 +165,10 @@ class Parcel(Base, TimestampMixin):
     receiver_location: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
     receiver_country_code: Mapped[Optional[str]] = mapped_column(String(8))
 
+    # Digits-only phones (utils.phone.phone_key) that public tracking looks parcels up by
+    sender_phone_key: Mapped[Optional[str]] = mapped_column(String(32))
+    receiver_phone_key: Mapped[Optional[str]] = mapped_column(String(32))
+
     parcel_type: Mapped[str] = mapped_column(String(64), nullable=False)
 
     value_amount: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
@@ -197,6 +215,32 @@ class Parcel(Base, TimestampMixin):
         order_by="TrackingHistory.created_at",
     )
 
+    @property
+    def current_assignment(self) -> Optional["Assignment"]:
+        """
+        Most recent rider assignment, only when `assignments` was eager-loaded.
+        Returns None instead of lazy-loading so list serialization never issues a query per row.
+        """
+        if "assignments" in inspect(self).unloaded:
+            return None
+        return max(self.assignments, key=lambda a: a.assigned_at, default=None)
+
+    # Keyset pagination indexes: every listing filter is followed by (created_at, id)
+    # so the page seek and the ORDER BY are served from the same index.
+    __table_args__ = (
+        Index("ix_parcels_created_at_id", "created_at", "id"),
+        Index("ix_parcels_status_created_at_id", "current_status", "created_at", "id"),
+        Index("ix_parcels_outcome_created_at_id", "delivery_outcome", "created_at", "id"),
+        Index("ix_parcels_received_by_created_at_id", "received_by_id", "created_at", "id"),
+        Index("ix_parcels_dispatched_created_at_id", "dispatched", "created_at", "id"),
+        Index("ix_parcels_delivered_created_at_id", "delivered", "created_at", "id"),
+        # /tracking/track: newest parcel for a sender (and receiver), or for a receiver
+        Index("ix_parcels_sender_phone_key_created_at", "sender_phone_key", "created_at"),
+        Index("ix_parcels_receiver_phone_key_created_at", "receiver_phone_key", "created_at"),
+        # Incremental Parquet export (rows changed since the last watermark)
+        Index("ix_parcels_updated_at", "updated_at"),
+    )
+
 
 class TrackingHistory(Base, TimestampMixin):
     __tablename__ = "tracking_history"
@@ -224,6 +268,9 @@ class TrackingHistory(Base, TimestampMixin):
     __table_args__ = (
         Index("ix_tracking_history_parcel_status", "parcel_id", "status"),
         Index("ix_tracking_history_timestamp", "created_at"),
+        # A parcel's timeline and its latest entry
+        Index("ix_tracking_history_parcel_created_at", "parcel_id", "created_at"),
+        Index("ix_tracking_history_updated_at", "updated_at"),
     )
 
 
@@ -242,6 +289,27 @@ class ParcelPhoto(Base, TimestampMixin):
     parcel = relationship("Parcel", back_populates="photos")
 
 
+class RiderEvent(Base):
+    """
+    Outcome of each event a rider device uploaded through POST /delivery/events,
+    keyed by the device's idempotency key so a re-sent event is answered from
+    here instead of being applied again.
+    """
+    __tablename__ = "rider_events"
+
+    key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    parcel_id: Mapped[str] = mapped_column(UUID, nullable=False)
+    type: Mapped[str] = mapped_column(String(16), nullable=False)
+    # Client clock when the rider acted; received_at is when it reached the server
+    occurred_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    received_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    uploaded_by_staff_id: Mapped[str] = mapped_column(
+        UUID, ForeignKey("staff.id", ondelete="RESTRICT"), index=True, nullable=False
+    )
+    # JSON result reported to the device (status, code, detail, ids created)
+    result: Mapped[str] = mapped_column(Text, nullable=False)
+
+
 class OTP(Base, TimestampMixin):
     __tablename__ = "otps"
 
@@ -249,14 +317,22 @@ class OTP(Base, TimestampMixin):
         UUID, primary_key=True, default=lambda: str(uuid4())
     )
     parcel_id: Mapped[str] = mapped_column(
-        UUID, ForeignKey("parcels.id", ondelete="CASCADE"), index=True
+        UUID, ForeignKey("parcels.id", ondelete="CASCADE")
     )
     code_hash: Mapped[str] = mapped_column(String(255), nullable=False)
     expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
     consumed_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    # Set when a wrong code rotated this OTP; a successful verify only sets consumed_at
+    failed_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
 
     parcel = relationship("Parcel", back_populates="otps")
 
+    # Active OTP (consumed_at IS NULL, newest first); recent failed attempts per parcel
+    __table_args__ = (
+        Index("ix_otps_parcel_consumed_created", "parcel_id", "consumed_at", "created_at"),
+        Index("ix_otps_parcel_failed_at", "parcel_id", "failed_at"),
+    )
+
 
 class Assignment(Base, TimestampMixin):
     __tablename__ = "assignments"
@@ -265,7 +341,7 @@ class Assignment(Base, TimestampMixin):
         UUID, primary_key=True, default=lambda: str(uuid4())
     )
     parcel_id: Mapped[str] = mapped_column(
-        UUID, ForeignKey("parcels.id", ondelete="CASCADE"), index=True
+        UUID, ForeignKey("parcels.id", ondelete="CASCADE")
     )
     rider_id: Mapped[str] = mapped_column(
         UUID, ForeignKey("riders.id", ondelete="RESTRICT"), index=True
@@ -281,6 +357,12 @@ class Assignment(Base, TimestampMixin):
     rider = relationship("Rider", back_populates="assignments")
     assigned_by_staff = relationship("Staff", back_populates="assignments_made")
 
+    # A parcel's assignments, newest last (also serves the parcel_id foreign key)
+    __table_args__ = (
+        Index("ix_assignments_parcel_assigned_at", "parcel_id", "assigned_at"),
+        Index("ix_assignments_updated_at", "updated_at"),
+    )
+
 
 class DeliveryAttempt(Base, TimestampMixin):
     __tablename__ = "delivery_attempts"
@@ -305,6 +387,10 @@ class DeliveryAttempt(Base, TimestampMixin):
     parcel = relationship("Parcel", back_populates="delivery_attempts")
     rider = relationship("Rider", back_populates="delivery_attempts")
 
+    __table_args__ = (
+        Index("ix_delivery_attempts_updated_at", "updated_at"),
+    )
+
 
 class Payment(Base, TimestampMixin):
     __tablename__ = "payments"
@@ -325,6 +411,11 @@ class Payment(Base, TimestampMixin):
 
     parcel = relationship("Parcel", back_populates="payments")
 
+    __table_args__ = (
+        Index("ix_payments_paid_at", "paid_at"),
+        Index("ix_payments_updated_at", "updated_at"),
+    )
+
 
 class Receipt(Base, TimestampMixin):
     __tablename__ = "receipts"
@@ -350,6 +441,10 @@ class Receipt(Base, TimestampMixin):
 
     parcel = relationship("Parcel", back_populates="receipt")
 
+    __table_args__ = (
+        Index("ix_receipts_generated_at", "generated_at"),
+    )
+
 
 class Dispute(Base, TimestampMixin):
     __tablename__ = "disputes"
@@ -403,4 +498,172 @@ class InventoryItem(Base, TimestampMixin):
     sku: Mapped[Optional[str]] = mapped_column(String(64), unique=True)
     quantity: Mapped[float] = mapped_column(Float, default=0.0, nullable=False)
     unit: Mapped[str] = mapped_column(String(32), default="unit", nullable=False)
-    is_active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
+    is_active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False, index=True)
+
+
+class SmsOutbox(Base, TimestampMixin):
+    """
+    Outgoing SMS written in the same transaction as the change that triggers it,
+    delivered asynchronously by the outbox worker (see services/sms_outbox.py).
+    """
+    __tablename__ = "sms_outbox"
+
+    id: Mapped[str] = mapped_column(
+        UUID, primary_key=True, default=lambda: str(uuid4())
+    )
+    phone: Mapped[str] = mapped_column(String(32), nullable=False)
+    message: Mapped[str] = mapped_column(Text, nullable=False)
+    reference: Mapped[Optional[str]] = mapped_column(String(64))
+    status: Mapped[SmsStatus] = mapped_column(
+        SAEnum(SmsStatus), default=SmsStatus.PENDING, nullable=False
+    )
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    next_attempt_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow, nullable=False
+    )
+    claimed_by: Mapped[Optional[str]] = mapped_column(String(64))
+    claimed_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    sent_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    last_error: Mapped[Optional[str]] = mapped_column(Text)
+
+    __table_args__ = (
+        Index("ix_sms_outbox_status_next_attempt", "status", "next_attempt_at"),
+        Index("ix_sms_outbox_claimed_by_status", "claimed_by", "status"),
+    )
+
+
+class ParcelEvent(Base):
+    """
+    Append-only feed of parcel changes, written in the same transaction as the change.
+    Every API process tails it to push live tracking updates to its subscribers
+    (see services/live_tracking.py); rows are pruned after the retention period.
+    """
+    __tablename__ = "parcel_events"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    parcel_id: Mapped[str] = mapped_column(
+        UUID, ForeignKey("parcels.id", ondelete="CASCADE"), nullable=False
+    )
+    kind: Mapped[str] = mapped_column(String(32), nullable=False)
+    # JSON document sent to subscribers as is
+    payload: Mapped[str] = mapped_column(Text, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow, nullable=False, index=True
+    )
+
+    __table_args__ = (
+        # Last-Event-ID replay for one parcel
+        Index("ix_parcel_events_parcel_id_id", "parcel_id", "id"),
+        # Ids must keep growing after pruning empties the table, or tailing processes miss events
+        {"sqlite_autoincrement": True},
+    )
+
+
+class ChangeLog(Base):
+    """
+    Sequence of changes to the tables the mobile app syncs, one row per changed row,
+    written in the same flush as the change (see services/change_log.py). `seq` is
+    the delta-sync cursor; entries superseded by a later change of the same row are
+    compacted away, so the log holds about one entry per synced row.
+    """
+    __tablename__ = "change_log"
+
+    seq: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    entity: Mapped[str] = mapped_column(String(32), nullable=False)
+    entity_id: Mapped[str] = mapped_column(UUID, nullable=False)
+    # Row was deleted (deactivated riders are reported as deleted when read)
+    deleted: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+    changed_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        # Compaction: older entries of the same row
+        Index("ix_change_log_entity_entity_id_seq", "entity", "entity_id", "seq"),
+        # Cursors must stay valid after compaction empties the tail of the log
+        {"sqlite_autoincrement": True},
+    )
+
+
+# Rollups
+class DailyParcelStat(Base):
+    """
+    Running parcel counts per received day x current status x outcome x receiving staff.
+    Rows are adjusted in the same transaction as the parcel change (see services/rollups.py).
+    """
+    __tablename__ = "daily_parcel_stats"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    status: Mapped[ParcelStatus] = mapped_column(SAEnum(ParcelStatus), primary_key=True)
+    outcome: Mapped[DeliveryOutcome] = mapped_column(SAEnum(DeliveryOutcome), primary_key=True)
+    received_by_id: Mapped[str] = mapped_column(UUID, primary_key=True)
+
+    parcels: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    dispatched: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    delivered: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    value_amount: Mapped[float] = mapped_column(Float, default=0.0, nullable=False)
+    amount_paid_amount: Mapped[float] = mapped_column(Float, default=0.0, nullable=False)
+
+
+class DailyPaymentStat(Base):
+    """Running payment totals per paid day x method x currency."""
+    __tablename__ = "daily_payment_stats"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    method: Mapped[PaymentMethod] = mapped_column(SAEnum(PaymentMethod), primary_key=True)
+    currency: Mapped[str] = mapped_column(String(8), primary_key=True)
+
+    payments: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    amount: Mapped[float] = mapped_column(Float, default=0.0, nullable=False)
+
+
+# Cache coordination
+class CacheVersion(Base):
+    """
+    Version counter per cached entity type. Writers bump it in their transaction;
+    every process drops its local cache of that type when it sees a new version.
+    """
+    __tablename__ = "cache_versions"
+
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+
+# Request idempotency
+class IdempotencyKey(Base):
+    """
+    Response to a mutating request sent with an Idempotency-Key header, replayed to
+    retries of the same request (see services/idempotency.py). `status_code` is
+    null while the first request is still running; rows expire after the TTL.
+    """
+    __tablename__ = "idempotency_keys"
+
+    # Client the key belongs to (deps.client_key), so keys of different clients never meet
+    scope: Mapped[str] = mapped_column(String(64), primary_key=True)
+    key: Mapped[str] = mapped_column(String(128), primary_key=True)
+    # Hash of method, path, query and body; a key reused for another request is refused
+    fingerprint: Mapped[str] = mapped_column(String(64), nullable=False)
+    status_code: Mapped[Optional[int]] = mapped_column(Integer)
+    # JSON list of [name, value] response headers
+    headers: Mapped[Optional[str]] = mapped_column(Text)
+    # zlib-compressed response body
+    body: Mapped[Optional[bytes]] = mapped_column(LargeBinary)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, default=datetime.utcnow, nullable=False, index=True
+    )
+
+
+# Identifier sequences
+class CodeSequence(Base):
+    """
+    Counter behind a family of public codes (tracking and receipt numbers).
+    Processes reserve blocks of values from it; `key` scrambles values into codes
+    and is generated once per sequence so issued codes never change meaning.
+    """
+    __tablename__ = "code_sequences"
+
+    name: Mapped[str] = mapped_column(String(32), primary_key=True)
+    next_value: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+    key: Mapped[str] = mapped_column(String(64), nullable=False)
+
+
+# Registers the flush hook that fills change_log for every session
+from .services import change_log  # noqa: E402,F401
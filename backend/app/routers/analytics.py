@@ -0,0 +1,330 @@
+from datetime import datetime, time
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import Integer, case, cast, func
+from sqlalchemy.orm import Session
+
+from ..deps import get_read_db, require_roles
+from ..models import DailyParcelStat, DailyPaymentStat, DeliveryOutcome, Parcel, Payment, Staff, StaffRole, TrackingHistory
+
+router = APIRouter(
+    dependencies=[Depends(require_roles(StaffRole.MANAGER, StaffRole.ADMIN, StaffRole.SUPER_ADMIN))]
+)
+
+Bucket = Literal["day", "week"]
+
+
+# ---------------- Dialect helpers ----------------
+
+def _dialect(db: Session) -> str:
+    return db.get_bind().dialect.name
+
+
+def _bucket_expr(column, bucket: str, dialect: str):
+    """Truncate a timestamp column to the start of its day or (Monday-based) week."""
+    if dialect == "sqlite":
+        if bucket == "week":
+            return func.date(column, "weekday 0", "-6 days")
+        return func.date(column)
+    return func.date(func.date_trunc(bucket, column))
+
+
+def _seconds_between(start, end, dialect: str):
+    if dialect == "sqlite":
+        return (func.julianday(end) - func.julianday(start)) * 86400.0
+    return func.extract("epoch", end - start)
+
+
+def _filter_dates(query, column, date_from: Optional[datetime], date_to: Optional[datetime]):
+    if date_from:
+        query = query.filter(column >= date_from)
+    if date_to:
+        query = query.filter(column < date_to)
+    return query
+
+
+def _day_aligned(*bounds: Optional[datetime]) -> bool:
+    """Rollups are per day, so they can only answer ranges bounded at midnight."""
+    return all(b is None or b.time() == time.min for b in bounds)
+
+
+def _filter_days(query, column, date_from: Optional[datetime], date_to: Optional[datetime]):
+    return _filter_dates(
+        query, column,
+        date_from.date() if date_from else None,
+        date_to.date() if date_to else None,
+    )
+
+
+def _outcome_sum(outcome: DeliveryOutcome):
+    return func.sum(case((DailyParcelStat.outcome == outcome, DailyParcelStat.parcels), else_=0))
+
+
+def _percentiles(query, expr, count: int, points=(0.5, 0.9, 0.95)) -> dict:
+    """Nearest-rank percentiles, one ordered OFFSET query per point (works on every dialect)."""
+    out = {}
+    for p in points:
+        offset = min(count - 1, int(round(p * (count - 1))))
+        value = query.with_entities(expr).order_by(expr).offset(offset).limit(1).scalar()
+        out[f"p{int(p * 100)}"] = float(value) if value is not None else None
+    return out
+
+
+def _histogram(query, expr, lo: float, hi: float, bins: int) -> list:
+    width = (hi - lo) / bins if hi > lo else 1.0
+    index = cast((expr - lo) / width, Integer)
+    counts = [0] * bins
+    for idx, n in query.with_entities(index, func.count()).group_by(index).all():
+        # The maximum value lands exactly on the upper edge; fold it into the last bin
+        counts[min(max(int(idx or 0), 0), bins - 1)] += n
+    return [
+        {"start": lo + i * width, "end": lo + (i + 1) * width, "count": counts[i]}
+        for i in range(bins)
+    ]
+
+
+# ---------------- Endpoints ----------------
+
+@router.get("/summary")
+def summary(
+    date_from: Optional[datetime] = Query(None),
+    date_to: Optional[datetime] = Query(None),
+    db: Session = Depends(get_read_db),
+):
+    """Headline KPIs over parcels created in the date range"""
+    if _day_aligned(date_from, date_to):
+        query = _filter_days(db.query(DailyParcelStat), DailyParcelStat.day, date_from, date_to)
+        row = query.with_entities(
+            func.coalesce(func.sum(DailyParcelStat.parcels), 0),
+            func.sum(DailyParcelStat.dispatched),
+            func.sum(DailyParcelStat.delivered),
+            _outcome_sum(DeliveryOutcome.SUCCESS),
+            _outcome_sum(DeliveryOutcome.FAILED),
+            _outcome_sum(DeliveryOutcome.PENDING),
+            func.coalesce(func.sum(DailyParcelStat.amount_paid_amount), 0.0),
+            func.coalesce(func.sum(DailyParcelStat.value_amount), 0.0),
+        ).one()
+    else:
+        query = _filter_dates(db.query(Parcel), Parcel.created_at, date_from, date_to)
+        row = query.with_entities(
+            func.count(Parcel.id),
+            func.sum(case((Parcel.dispatched == True, 1), else_=0)),
+            func.sum(case((Parcel.delivered == True, 1), else_=0)),
+            func.sum(case((Parcel.delivery_outcome == DeliveryOutcome.SUCCESS, 1), else_=0)),
+            func.sum(case((Parcel.delivery_outcome == DeliveryOutcome.FAILED, 1), else_=0)),
+            func.sum(case((Parcel.delivery_outcome == DeliveryOutcome.PENDING, 1), else_=0)),
+            func.coalesce(func.sum(Parcel.amount_paid_amount), 0.0),
+            func.coalesce(func.sum(Parcel.value_amount), 0.0),
+        ).one()
+    total, dispatched, delivered, successful, failed, pending, revenue, value_total = row
+
+    return {
+        "total": total,
+        "dispatched": dispatched or 0,
+        "delivered": delivered or 0,
+        "successful": successful or 0,
+        "failed": failed or 0,
+        "pending": pending or 0,
+        "success_rate": (successful or 0) / total * 100 if total else 0.0,
+        "revenue": float(revenue),
+        "value_total": float(value_total),
+        "value_average": float(value_total) / total if total else 0.0,
+    }
+
+
+@router.get("/volume")
+def volume(
+    bucket: Bucket = Query("day"),
+    date_from: Optional[datetime] = Query(None),
+    date_to: Optional[datetime] = Query(None),
+    db: Session = Depends(get_read_db),
+):
+    """Parcels received per day/week with delivery outcome breakdown"""
+    if _day_aligned(date_from, date_to):
+        period = _bucket_expr(DailyParcelStat.day, bucket, _dialect(db))
+        query = _filter_days(db.query(DailyParcelStat), DailyParcelStat.day, date_from, date_to)
+        columns = (
+            period,
+            func.sum(DailyParcelStat.parcels),
+            _outcome_sum(DeliveryOutcome.SUCCESS),
+            _outcome_sum(DeliveryOutcome.FAILED),
+        )
+    else:
+        period = _bucket_expr(Parcel.created_at, bucket, _dialect(db))
+        query = _filter_dates(db.query(Parcel), Parcel.created_at, date_from, date_to)
+        columns = (
+            period,
+            func.count(Parcel.id),
+            func.sum(case((Parcel.delivery_outcome == DeliveryOutcome.SUCCESS, 1), else_=0)),
+            func.sum(case((Parcel.delivery_outcome == DeliveryOutcome.FAILED, 1), else_=0)),
+        )
+    rows = query.with_entities(*columns).group_by(period).order_by(period).all()
+    return [
+        {
+            "period": str(p),
+            "total": total,
+            "successful": successful or 0,
+            "failed": failed or 0,
+            "success_rate": (successful or 0) / total * 100 if total else 0.0,
+        }
+        for p, total, successful, failed in rows
+        if total
+    ]
+
+
+@router.get("/status")
+def status_breakdown(
+    date_from: Optional[datetime] = Query(None),
+    date_to: Optional[datetime] = Query(None),
+    db: Session = Depends(get_read_db),
+):
+    """Parcel counts by current status and by delivery outcome"""
+    if _day_aligned(date_from, date_to):
+        query = _filter_days(db.query(DailyParcelStat), DailyParcelStat.day, date_from, date_to)
+        count = func.sum(DailyParcelStat.parcels)
+        status_col, outcome_col = DailyParcelStat.status, DailyParcelStat.outcome
+    else:
+        query = _filter_dates(db.query(Parcel), Parcel.created_at, date_from, date_to)
+        count = func.count()
+        status_col, outcome_col = Parcel.current_status, Parcel.delivery_outcome
+    by_status = query.with_entities(status_col, count).group_by(status_col).all()
+    by_outcome = query.with_entities(outcome_col, count).group_by(outcome_col).all()
+    return {
+        "by_status": {s.value: n for s, n in by_status if n},
+        "by_outcome": {o.value: n for o, n in by_outcome if n},
+    }
+
+
+@router.get("/staff")
+def staff_performance(
+    date_from: Optional[datetime] = Query(None),
+    date_to: Optional[datetime] = Query(None),
+    db: Session = Depends(get_read_db),
+):
+    """Parcels received and successfully delivered per receiving staff member"""
+    if _day_aligned(date_from, date_to):
+        query = _filter_days(db.query(DailyParcelStat), DailyParcelStat.day, date_from, date_to)
+        staff_col = DailyParcelStat.received_by_id
+        handled = func.sum(DailyParcelStat.parcels)
+        successful = _outcome_sum(DeliveryOutcome.SUCCESS)
+    else:
+        query = _filter_dates(db.query(Parcel), Parcel.created_at, date_from, date_to)
+        staff_col = Parcel.received_by_id
+        handled = func.count(Parcel.id)
+        successful = func.sum(case((Parcel.delivery_outcome == DeliveryOutcome.SUCCESS, 1), else_=0))
+    rows = (
+        query.join(Staff, Staff.id == staff_col)
+        .with_entities(Staff.id, Staff.full_name, Staff.role, handled, successful)
+        .group_by(Staff.id, Staff.full_name, Staff.role)
+        .order_by(handled.desc())
+        .all()
+    )
+    return [
+        {
+            "staff_id": staff_id,
+            "full_name": full_name,
+            "role": role.value,
+            "parcels_handled": n,
+            "successful": ok or 0,
+        }
+        for staff_id, full_name, role, n, ok in rows
+        if n
+    ]
+
+
+@router.get("/delivery-times")
+def delivery_times(
+    bins: int = Query(20, ge=1, le=100),
+    date_from: Optional[datetime] = Query(None),
+    date_to: Optional[datetime] = Query(None),
+    db: Session = Depends(get_read_db),
+):
+    """Received-to-delivered time statistics (hours) for delivered parcels"""
+    dialect = _dialect(db)
+    hours = _seconds_between(Parcel.received_at, Parcel.delivered_at, dialect) / 3600.0
+    query = _filter_dates(
+        db.query(Parcel).filter(Parcel.delivered == True, Parcel.delivered_at.isnot(None)),
+        Parcel.created_at, date_from, date_to,
+    )
+
+    count, avg, lo, hi = query.with_entities(func.count(), func.avg(hours), func.min(hours), func.max(hours)).one()
+    if not count:
+        return {"count": 0, "average_hours": None, "percentiles": {}, "histogram": [], "fastest": None, "slowest": None}
+
+    def _extreme(order):
+        row = (
+            query.with_entities(Parcel.id, Parcel.sender_name, Parcel.receiver_name, hours)
+            .order_by(order)
+            .first()
+        )
+        return {"id": row[0], "sender_name": row[1], "receiver_name": row[2], "hours": float(row[3])}
+
+    return {
+        "count": count,
+        "average_hours": float(avg),
+        "min_hours": float(lo),
+        "max_hours": float(hi),
+        "percentiles": _percentiles(query, hours, count),
+        "histogram": _histogram(query, hours, float(lo), float(hi), bins),
+        "fastest": _extreme(hours.asc()),
+        "slowest": _extreme(hours.desc()),
+    }
+
+
+@router.get("/values")
+def value_distribution(
+    bins: int = Query(20, ge=1, le=100),
+    date_from: Optional[datetime] = Query(None),
+    date_to: Optional[datetime] = Query(None),
+    db: Session = Depends(get_read_db),
+):
+    """Histogram of declared parcel values"""
+    query = _filter_dates(db.query(Parcel), Parcel.created_at, date_from, date_to)
+    count, lo, hi = query.with_entities(func.count(), func.min(Parcel.value_amount), func.max(Parcel.value_amount)).one()
+    if not count:
+        return {"count": 0, "histogram": []}
+    return {"count": count, "histogram": _histogram(query, Parcel.value_amount, float(lo), float(hi), bins)}
+
+
+@router.get("/revenue")
+def revenue(
+    bucket: Bucket = Query("day"),
+    date_from: Optional[datetime] = Query(None),
+    date_to: Optional[datetime] = Query(None),
+    db: Session = Depends(get_read_db),
+):
+    """Recorded payments per day/week, currency and method"""
+    if _day_aligned(date_from, date_to):
+        period = _bucket_expr(DailyPaymentStat.day, bucket, _dialect(db))
+        query = _filter_days(db.query(DailyPaymentStat), DailyPaymentStat.day, date_from, date_to)
+        columns = (period, DailyPaymentStat.currency, DailyPaymentStat.method,
+                   func.sum(DailyPaymentStat.payments), func.sum(DailyPaymentStat.amount))
+    else:
+        period = _bucket_expr(Payment.paid_at, bucket, _dialect(db))
+        query = _filter_dates(db.query(Payment), Payment.paid_at, date_from, date_to)
+        columns = (period, Payment.currency, Payment.method, func.count(), func.sum(Payment.amount))
+    rows = query.with_entities(*columns).group_by(*columns[:3]).order_by(period).all()
+    return [
+        {"period": str(p), "currency": currency, "method": method.value, "payments": n, "amount": float(amount or 0)}
+        for p, currency, method, n, amount in rows
+    ]
+
+
+@router.get("/activity")
+def tracking_activity(
+    bucket: Bucket = Query("day"),
+    date_from: Optional[datetime] = Query(None),
+    date_to: Optional[datetime] = Query(None),
+    db: Session = Depends(get_read_db),
+):
+    """Tracking events recorded per day/week and status"""
+    period = _bucket_expr(TrackingHistory.created_at, bucket, _dialect(db))
+    query = _filter_dates(db.query(TrackingHistory), TrackingHistory.created_at, date_from, date_to)
+    rows = (
+        query.with_entities(period, TrackingHistory.status, func.count())
+        .group_by(period, TrackingHistory.status)
+        .order_by(period)
+        .all()
+    )
+    return [{"period": str(p), "status": s.value, "events": n} for p, s, n in rows]
@@ -1,24 +1,38 @@
-from datetime import datetime
+import json
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from ..deps import get_db, require_roles
-from ..models import Parcel, OTP, ParcelStatus, PhotoType, ParcelPhoto, StaffRole, DeliveryAttempt, DeliveryAttemptStatus, DeliveryOutcome
-from ..utils.otp import generate_otp_code, hash_otp, expiry_time
-from ..services.notifications import send_sms
-from ..schemas import OTPVerifyRequest, PhotoOut, DeliveryAttemptCreate, DeliveryAttemptOut
-from ..utils.security import verify_password
+from ..deps import get_async_db, get_current_staff, get_db, is_uuid, require_roles
+from ..models import Parcel, OTP, ParcelStatus, PhotoType, ParcelPhoto, RiderEvent, Staff, StaffRole, DeliveryAttempt, DeliveryAttemptStatus, DeliveryOutcome
+from ..core.config import settings
+from ..utils.media import save_parcel_photo
+from ..utils.otp import generate_otp_code, hash_otp, verify_otp_code, expiry_time
+from ..services import rollups
+from ..services.live_tracking import record_event
+from ..services.notifications import queue_sms
+from ..schemas import OTPVerifyRequest, PhotoOut, DeliveryAttemptCreate, DeliveryAttemptOut, PhotoEventData, RiderEventBatchOut, RiderEventIn
 from ..models import Assignment, Rider
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 
-@router.post("/{parcel_id}/verify-otp")
-def verify_otp(parcel_id: str, payload: OTPVerifyRequest, db: Session = Depends(get_db)):
-    parcel = db.get(Parcel, parcel_id)
-    if not parcel:
-        raise HTTPException(status_code=404, detail="Parcel not found")
+def _verify_otp(db: Session, parcel: Parcel, code: str, at: Optional[datetime] = None) -> None:
+    """
+    Check `code` against the parcel's active OTP and confirm the parcel for delivery.
+    Raises HTTPException when refused; a wrong code also rotates the OTP, which the
+    caller commits either way. `at` is when the code was entered (default now).
+    """
+    parcel_id = parcel.id
     otp = (
         db.query(OTP)
         .filter(OTP.parcel_id == parcel_id, OTP.consumed_at.is_(None))
@@ -27,43 +41,71 @@ def verify_otp(parcel_id: str, payload: OTPVerifyRequest, db: Session = Depends(
     )
     if not otp:
         raise HTTPException(status_code=400, detail="No active OTP")
-    if otp.expires_at < datetime.utcnow():
+    if otp.expires_at < (at or datetime.utcnow()):
         raise HTTPException(status_code=400, detail="OTP expired")
-    if not verify_password(payload.code, otp.code_hash):
+    # Every wrong code marks its OTP failed before rotating it
+    recent_failures = (
+        db.query(func.count(OTP.id))
+        .filter(
+            OTP.parcel_id == parcel_id,
+            OTP.failed_at >= datetime.utcnow() - timedelta(minutes=settings.otp_lockout_minutes),
+        )
+        .scalar()
+    )
+    if recent_failures >= settings.otp_max_attempts:
+        raise HTTPException(status_code=429, detail="Too many invalid OTP attempts. Try again later.")
+    if not verify_otp_code(code, otp.code_hash, parcel_id):
         # Invalidate current OTP and rotate a new one
-        otp.consumed_at = datetime.utcnow()
+        otp.consumed_at = otp.failed_at = datetime.utcnow()
         db.add(otp)
         # Create and send a new OTP
         new_code = generate_otp_code()
-        new_otp = OTP(parcel_id=parcel_id, code_hash=hash_otp(new_code), expires_at=expiry_time())
+        new_otp = OTP(parcel_id=parcel_id, code_hash=hash_otp(new_code, parcel_id), expires_at=expiry_time())
         db.add(new_otp)
-        db.commit()
         # Notify receiver with the rotated OTP
-        send_sms(parcel.receiver_phone, f"Tumia OTP mpya {new_code} kupokea mzigo wako")
+        queue_sms(db, parcel.receiver_phone, f"Tumia OTP mpya {new_code} kupokea mzigo wako")
+        # Sessions do not autoflush: later events of a rider batch must see the rotation
+        db.flush()
         raise HTTPException(status_code=400, detail="Invalid OTP. A new code has been sent.")
 
     otp.consumed_at = datetime.utcnow()
+    before = rollups.snapshot(parcel)
     parcel.current_status = ParcelStatus.OUT_FOR_DELIVERY
     parcel.dispatched = True
+    rollups.move_parcel(db, before, parcel)
     db.add(otp)
     db.add(parcel)
+    record_event(db, parcel, "otp_verified")
+
+
+@router.post("/{parcel_id}/verify-otp")
+def verify_otp(parcel_id: str, payload: OTPVerifyRequest, db: Session = Depends(get_db)):
+    parcel = db.get(Parcel, parcel_id)
+    if not parcel:
+        raise HTTPException(status_code=404, detail="Parcel not found")
+    try:
+        _verify_otp(db, parcel, payload.code)
+    except HTTPException:
+        # Keeps the rotated OTP after a wrong code
+        db.commit()
+        raise
     db.commit()
 
     return {"status": "otp_verified", "message": "OTP verified successfully. Parcel is now confirmed for delivery."}
 
 
 @router.get("/{parcel_id}/info")
-def get_delivery_info(parcel_id: str, db: Session = Depends(get_db)):
+async def get_delivery_info(parcel_id: str, db: AsyncSession = Depends(get_async_db)):
     """Get delivery information for a parcel (public access)"""
-    parcel = db.get(Parcel, parcel_id)
+    parcel = await db.get(Parcel, parcel_id)
     if not parcel:
         raise HTTPException(status_code=404, detail="Parcel not found")
     
     # Get rider assignment
-    assignment = db.query(Assignment).filter(Assignment.parcel_id == parcel_id).first()
+    assignment = (await db.execute(select(Assignment).filter(Assignment.parcel_id == parcel_id).limit(1))).scalars().first()
     rider_info = None
     if assignment:
-        rider = db.get(Rider, assignment.rider_id)
+        rider = await db.get(Rider, assignment.rider_id)
         if rider:
             rider_info = {
                 "name": rider.full_name,
@@ -72,11 +114,11 @@ def get_delivery_info(parcel_id: str, db: Session = Depends(get_db)):
             }
     
     # Get active OTP info
-    otp = db.query(OTP).filter(
+    otp = (await db.execute(select(OTP).filter(
         OTP.parcel_id == parcel_id, 
         OTP.consumed_at.is_(None),
         OTP.expires_at > datetime.utcnow()
-    ).first()
+    ).limit(1))).scalars().first()
     
     return {
         "parcel_id": parcel_id,
@@ -108,11 +150,14 @@ def mark_failed(parcel_id: str, reason: str, db: Session = Depends(get_db)):
     parcel = db.get(Parcel, parcel_id)
     if not parcel:
         raise HTTPException(status_code=404, detail="Parcel not found")
+    before = rollups.snapshot(parcel)
     parcel.delivered = False
     parcel.delivery_outcome = DeliveryOutcome.FAILED
     parcel.failure_reason = reason
     parcel.current_status = ParcelStatus.OUT_FOR_DELIVERY
+    rollups.move_parcel(db, before, parcel)
     db.add(parcel)
+    record_event(db, parcel, "failed", reason=reason)
     db.commit()
     return {"status": "failed"}
 
@@ -122,17 +167,191 @@ def confirm_delivery(parcel_id: str, db: Session = Depends(get_db)):
     parcel = db.get(Parcel, parcel_id)
     if not parcel:
         raise HTTPException(status_code=404, detail="Parcel not found")
+    before = rollups.snapshot(parcel)
     parcel.delivered = True
     parcel.delivered_at = datetime.utcnow()
     parcel.current_status = ParcelStatus.DELIVERED
     parcel.delivery_outcome = DeliveryOutcome.SUCCESS
     parcel.failure_reason = None
+    rollups.move_parcel(db, before, parcel)
     db.add(parcel)
-    db.commit()
     # Notify both sender and receiver upon successful delivery
-    try:
-        send_sms(parcel.sender_phone, f"Mzigo {parcel.tracking_number} umefikishwa kwa mafanikio.\nWasiliana nasi Huduma kwa wateja - +255 764 730 000")
-        send_sms(parcel.receiver_phone, f"Mzigo wako {parcel.tracking_number} umefikishwa.\nWasiliana nasi Huduma kwa wateja - +255 764 730 000")
-    except Exception:
-        pass
+    queue_sms(db, parcel.sender_phone, f"Mzigo {parcel.tracking_number} umefikishwa kwa mafanikio.\nWasiliana nasi Huduma kwa wateja - +255 764 730 000")
+    queue_sms(db, parcel.receiver_phone, f"Mzigo wako {parcel.tracking_number} umefikishwa.\nWasiliana nasi Huduma kwa wateja - +255 764 730 000")
+    record_event(db, parcel, "delivered")
+    db.commit()
     return {"status": "delivered"}
+
+
+RIDER_EVENTS = TypeAdapter(List[RiderEventIn])
+# Keys looked up per statement when checking for re-sent events
+KEY_LOOKUP_CHUNK = 500
+
+
+def _naive_utc(value: datetime) -> datetime:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _event_data(schema, data: dict):
+    try:
+        return schema.model_validate(data)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False))
+
+
+def _apply_rider_event(
+    db: Session, parcel: Optional[Parcel], event: RiderEventIn, uploads: Dict[str, UploadFile], saved: List[str]
+) -> dict:
+    """
+    Apply one offline event like its single-event endpoint would; returns the ids it
+    created. Photo files written are appended to `saved`, to be removed if the
+    transaction rolls back.
+    """
+    if parcel is None:
+        raise HTTPException(status_code=404, detail="Parcel not found")
+    now = datetime.utcnow()
+    occurred_at = min(_naive_utc(event.occurred_at), now)
+
+    if event.type == "attempt":
+        data = _event_data(DeliveryAttemptCreate, event.data)
+        if data.rider_id and not (is_uuid(data.rider_id) and db.get(Rider, data.rider_id)):
+            raise HTTPException(status_code=404, detail="Rider not found")
+        attempt = DeliveryAttempt(
+            parcel_id=parcel.id, rider_id=data.rider_id, status=data.status, note=data.note, attempted_at=occurred_at
+        )
+        db.add(attempt)
+        db.flush()
+        return {"attempt_id": attempt.id}
+
+    if event.type == "verify_otp":
+        data = _event_data(OTPVerifyRequest, event.data)
+        if parcel.delivered:
+            raise HTTPException(status_code=409, detail="Parcel already delivered")
+        # The code counts as entered when the rider entered it, but never earlier than one
+        # OTP lifetime ago, so a wrong device clock cannot revive long-expired codes
+        entered_at = max(occurred_at, now - timedelta(minutes=settings.otp_expiry_minutes))
+        _verify_otp(db, parcel, data.code, entered_at)
+        return {"status": "otp_verified"}
+
+    data = _event_data(PhotoEventData, event.data)
+    upload = uploads.get(data.file)
+    if upload is None:
+        raise HTTPException(status_code=400, detail=f"File {data.file} was not uploaded with the batch")
+    upload.file.seek(0)
+    path = save_parcel_photo(parcel.id, upload.filename, upload.file.read())
+    saved.append(path)
+    photo = ParcelPhoto(parcel_id=parcel.id, type=data.type, file_path=path)
+    db.add(photo)
+    db.flush()
+    return {"photo_id": photo.id}
+
+
+def _remove_files(paths: List[str]) -> None:
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            logger.warning("Could not remove %s after a rolled back rider event batch", path)
+
+
+def _stored_results(db: Session, keys: List[str]) -> Dict[str, dict]:
+    stored = {}
+    for start in range(0, len(keys), KEY_LOOKUP_CHUNK):
+        chunk = keys[start:start + KEY_LOOKUP_CHUNK]
+        for key, result in db.query(RiderEvent.key, RiderEvent.result).filter(RiderEvent.key.in_(chunk)):
+            stored[key] = json.loads(result)
+    return stored
+
+
+@router.post("/events", response_model=RiderEventBatchOut)
+def upload_rider_events(
+    events: str = Form(..., description="JSON array of {key, type, parcel_id, occurred_at, data}"),
+    files: List[UploadFile] = File(default=[]),
+    db: Session = Depends(get_db),
+    staff: Staff = Depends(get_current_staff),
+):
+    """
+    Apply a queue of events a rider device recorded offline: delivery attempts
+    ("attempt", data as for /{parcel_id}/attempts), OTP verifications ("verify_otp",
+    {"code"}) and photos ("photo", {"type", "file"} naming a part uploaded in `files`).
+
+    Events are applied per parcel in occurred_at order, one transaction per parcel,
+    and reported per event: "applied", "rejected" (with the code and detail the
+    single-event endpoint would give, e.g. 409 for an OTP on a delivered parcel),
+    or "error" (nothing stored; send it again). Every key is remembered, so a
+    re-sent event is answered as "duplicate" with its first outcome and never
+    applied twice.
+    """
+    try:
+        batch = RIDER_EVENTS.validate_json(events)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False))
+    if len(batch) > settings.rider_events_max_items:
+        raise HTTPException(status_code=400, detail=f"At most {settings.rider_events_max_items} events per request")
+    uploads = {upload.filename: upload for upload in files}
+
+    stored = _stored_results(db, list({event.key for event in batch}))
+    outcomes: Dict[int, dict] = {}
+    first_index: Dict[str, int] = {}
+    parcels: Dict[str, List[int]] = {}
+    for index, event in enumerate(batch):
+        if event.key in stored:
+            outcomes[index] = {**stored[event.key], "status": "duplicate"}
+        elif event.key not in first_index:
+            first_index[event.key] = index
+            parcels.setdefault(event.parcel_id, []).append(index)
+
+    for parcel_id, indexes in parcels.items():
+        indexes.sort(key=lambda index: _naive_utc(batch[index].occurred_at))
+        if not is_uuid(parcel_id):
+            for index in indexes:
+                outcomes[index] = {"status": "rejected", "code": 404, "detail": "Parcel not found"}
+            continue
+        saved: List[str] = []
+        try:
+            # Row lock: concurrent batches for the same parcel apply one after the other
+            parcel = db.get(Parcel, parcel_id, with_for_update=True)
+            applied = {}
+            for index in indexes:
+                event = batch[index]
+                try:
+                    outcome = {"status": "applied", "code": 200, "result": _apply_rider_event(db, parcel, event, uploads, saved)}
+                except HTTPException as e:
+                    outcome = {"status": "rejected", "code": e.status_code, "detail": e.detail}
+                applied[index] = outcome
+                db.add(RiderEvent(
+                    key=event.key,
+                    parcel_id=parcel_id,
+                    type=event.type,
+                    occurred_at=_naive_utc(event.occurred_at),
+                    uploaded_by_staff_id=staff.id,
+                    result=json.dumps(outcome, default=str),
+                ))
+            db.commit()
+            outcomes.update(applied)
+        except Exception:
+            # Includes a concurrent upload of the same keys; on retry they are duplicates
+            db.rollback()
+            # No ParcelPhoto rows point at them, and a retry writes the photos again
+            _remove_files(saved)
+            logger.exception("Rider events for parcel %s failed", parcel_id)
+            for index in indexes:
+                outcomes[index] = {"status": "error", "code": 500, "detail": "Not applied; send the event again"}
+
+    results = []
+    for index, event in enumerate(batch):
+        outcome = outcomes.get(index)
+        if outcome is None:
+            # Same key earlier in this batch
+            outcome = {**outcomes[first_index[event.key]], "status": "duplicate"}
+        results.append({"key": event.key, "parcel_id": event.parcel_id, **outcome})
+    counts = {status: sum(result["status"] == status for result in results) for status in ("applied", "rejected", "duplicate", "error")}
+    return {
+        "results": results,
+        "applied": counts["applied"],
+        "rejected": counts["rejected"],
+        "duplicates": counts["duplicate"],
+        "errors": counts["error"],
+    }
@@ -1,17 +1,23 @@
 from datetime import datetime
+from typing import Optional
 import uuid
 from sqlalchemy.orm import joinedload, selectinload
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 
-from ..deps import get_db, require_roles, get_current_staff
+from ..deps import get_db, get_read_db, is_uuid, require_roles, get_current_staff
 from ..models import Parcel, Assignment, Rider, StaffRole, ParcelStatus, OTP, Staff
 from ..schemas import AssignmentCreate, AssignmentOut, ParcelOutLite, RiderOutLite, StaffOutLite
 from ..utils.otp import generate_otp_code, hash_otp, expiry_time
-from ..services.notifications import send_sms
+from ..services import rollups
+from ..services.live_tracking import record_event
+from ..services.notifications import queue_sms
+from ..utils.serialization import JSONSerializer, projection
 
 router = APIRouter()
 
+ASSIGNMENT_LIST = JSONSerializer(list[AssignmentOut])
+
 def _to_e164(phone: str) -> str:
     p = str(phone or "").strip().replace(" ", "").replace("-", "")
     if not p:
@@ -36,7 +42,7 @@ def _ensure_reference(reference: str = None) -> str:
 @router.post("/{parcel_id}/assign", response_model=AssignmentOut)
 def assign_rider(parcel_id: str, payload: AssignmentCreate, db: Session = Depends(get_db), current=Depends(require_roles(StaffRole.DISPATCHER, StaffRole.MANAGER, StaffRole.ADMIN, StaffRole.SUPER_ADMIN))):
     parcel = db.get(Parcel, parcel_id)
-    rider = db.get(Rider, payload.rider_id)
+    rider = db.get(Rider, payload.rider_id) if is_uuid(payload.rider_id) else None
     if not parcel or not rider:
         raise HTTPException(status_code=404, detail="Parcel or Rider not found")
     
@@ -55,12 +61,15 @@ def assign_rider(parcel_id: str, payload: AssignmentCreate, db: Session = Depend
     
     # Generate OTP for delivery
     code = generate_otp_code()
-    otp = OTP(parcel_id=parcel_id, code_hash=hash_otp(code), expires_at=expiry_time())
+    otp = OTP(parcel_id=parcel_id, code_hash=hash_otp(code, parcel_id), expires_at=expiry_time())
     db.add(otp)
     
     # Update parcel status to indicate it's ready for delivery
+    before = rollups.snapshot(parcel)
     parcel.current_status = ParcelStatus.OUT_FOR_DELIVERY
+    rollups.move_parcel(db, before, parcel)
     
+    record_event(db, parcel, "assigned", rider={"id": rider.id, "full_name": rider.full_name, "phone": rider.phone})
     db.commit()
     db.refresh(assignment)
     
@@ -88,8 +97,12 @@ def assign_rider(parcel_id: str, payload: AssignmentCreate, db: Session = Depend
 
 @router.get("/", response_model=list[AssignmentOut])
 @router.get("", response_model=list[AssignmentOut], include_in_schema=False)
-def list_assignments(db: Session = Depends(get_db)):
+def list_assignments(
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return per assignment, e.g. id,rider"),
+    db: Session = Depends(get_read_db),
+):
     """List all parcel assignments with nested relationships"""
+    include = projection(fields, AssignmentOut)
     # Use joinedload to fetch all related data in one query
     assignments = db.query(Assignment).options(
         joinedload(Assignment.parcel),
@@ -97,7 +110,7 @@ def list_assignments(db: Session = Depends(get_db)):
         joinedload(Assignment.assigned_by_staff)
     ).all()
     
-    return assignments
+    return ASSIGNMENT_LIST.response(assignments, include)
 
 
 @router.post("/{parcel_id}/dispatch")
@@ -109,17 +122,20 @@ def dispatch_parcel(parcel_id: str, db: Session = Depends(get_db)):
         return {"status": "already_dispatched"}
 
     code = generate_otp_code()
-    otp = OTP(parcel_id=parcel_id, code_hash=hash_otp(code), expires_at=expiry_time())
+    otp = OTP(parcel_id=parcel_id, code_hash=hash_otp(code, parcel_id), expires_at=expiry_time())
 
+    before = rollups.snapshot(parcel)
     parcel.dispatched = True
     parcel.dispatched_at = datetime.utcnow()
-    parcel.current_status = ParcelStatus.DISPATCHED
+    parcel.current_status = ParcelStatus.IN_TRANSIT
+    rollups.move_parcel(db, before, parcel)
 
     db.add(otp)
     db.add(parcel)
-    db.commit()
 
     # Notify both sender and receiver on dispatch and send OTP to receiver
-    send_sms(_to_e164(parcel.sender_phone), f"Mzigo {parcel.tracking_number} unasafirishwa .")
-    send_sms(_to_e164(parcel.receiver_phone), f"Nambari yako ya OTP kwa kupokea mzigo ni {code}")
+    queue_sms(db, _to_e164(parcel.sender_phone), f"Mzigo {parcel.tracking_number} unasafirishwa .")
+    queue_sms(db, _to_e164(parcel.receiver_phone), f"Nambari yako ya OTP kwa kupokea mzigo ni {code}")
+    record_event(db, parcel, "dispatched")
+    db.commit()
     return {"status": "ok"}
\ No newline at end of file
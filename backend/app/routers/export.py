@@ -0,0 +1,117 @@
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime
+from enum import Enum
+from typing import Iterator, Literal, Optional
+
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+
+from ..db import open_read_session
+from ..deps import client_key, require_roles
+from ..models import Parcel, Payment, Receipt, StaffRole, TrackingHistory
+
+router = APIRouter(
+    dependencies=[Depends(require_roles(StaffRole.MANAGER, StaffRole.ADMIN, StaffRole.SUPER_ADMIN))]
+)
+
+# dataset -> (model, timestamp column used for the date range and ordering)
+DATASETS = {
+    "parcels": (Parcel, Parcel.created_at),
+    "tracking": (TrackingHistory, TrackingHistory.created_at),
+    "payments": (Payment, Payment.paid_at),
+    "receipts": (Receipt, Receipt.generated_at),
+}
+
+Dataset = Literal["parcels", "tracking", "payments", "receipts"]
+ExportFormat = Literal["csv", "ndjson"]
+
+# Rows fetched per round trip (server-side cursor on PostgreSQL)
+FETCH_SIZE = 1000
+# Bytes buffered before a chunk is sent
+CHUNK_BYTES = 64 * 1024
+
+
+def _value(value):
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _lines(columns: list[str], rows, fmt: str) -> Iterator[str]:
+    if fmt == "ndjson":
+        for row in rows:
+            yield json.dumps({col: _value(v) for col, v in zip(columns, row)}, default=str) + "\n"
+        return
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow([_value(v) for v in row])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _stream(dataset: str, fmt: str, compress: bool, client: str,
+            date_from: Optional[datetime], date_to: Optional[datetime]) -> Iterator[bytes]:
+    """
+    Rows of `dataset` encoded as `fmt`, in chunks of about CHUNK_BYTES. The session
+    lives inside the generator so it stays open exactly as long as the download.
+    """
+    model, stamp = DATASETS[dataset]
+    table = model.__table__
+    query = select(*table.columns)
+    if date_from:
+        query = query.filter(stamp >= date_from)
+    if date_to:
+        query = query.filter(stamp < date_to)
+    query = query.order_by(stamp).execution_options(yield_per=FETCH_SIZE)
+
+    gzip = zlib.compressobj(wbits=31) if compress else None
+    db = open_read_session(client)
+    try:
+        pending, size = [], 0
+        for line in _lines([col.name for col in table.columns], db.execute(query), fmt):
+            pending.append(line)
+            size += len(line)
+            if size >= CHUNK_BYTES:
+                data = "".join(pending).encode()
+                yield gzip.compress(data) if gzip else data
+                pending, size = [], 0
+        data = "".join(pending).encode()
+        if gzip:
+            yield gzip.compress(data) + gzip.flush()
+        elif data:
+            yield data
+    finally:
+        db.close()
+
+
+@router.get("/{dataset}")
+def export_dataset(
+    dataset: Dataset,
+    request: Request,
+    format: ExportFormat = Query("csv"),
+    gzip: bool = Query(False, description="Compress the download (.gz)"),
+    date_from: Optional[datetime] = Query(None, description="Rows at or after this time (UTC)"),
+    date_to: Optional[datetime] = Query(None, description="Rows before this time (UTC)"),
+):
+    """Stream a whole table as CSV or NDJSON, oldest first, in constant memory."""
+    filename = f"{dataset}.{format}" + (".gz" if gzip else "")
+    media_type = "application/gzip" if gzip else ("text/csv" if format == "csv" else "application/x-ndjson")
+    return StreamingResponse(
+        _stream(dataset, format, gzip, client_key(request), date_from, date_to),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            # Let nginx pass chunks through instead of buffering the whole export
+            "X-Accel-Buffering": "no",
+        },
+    )
@@ -3,7 +3,7 @@ from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
-from ..deps import get_db, require_roles
+from ..deps import get_db, is_uuid, require_roles
 from ..models import Dispute, Refund, Parcel, StaffRole, DisputeStatus
 from ..schemas import DisputeCreate, DisputeOut, RefundCreate, RefundOut
 
@@ -24,7 +24,7 @@ def create_dispute(parcel_id: str, payload: DisputeCreate, db: Session = Depends
 
 @router.post("/refunds", response_model=RefundOut)
 def process_refund(payload: RefundCreate, db: Session = Depends(get_db), current=Depends(require_roles(StaffRole.MANAGER, StaffRole.ADMIN, StaffRole.SUPER_ADMIN))):
-    dispute = db.get(Dispute, payload.dispute_id)
+    dispute = db.get(Dispute, payload.dispute_id) if is_uuid(payload.dispute_id) else None
     if not dispute:
         raise HTTPException(status_code=404, detail="Dispute not found")
     refund = Refund(dispute_id=payload.dispute_id, amount=payload.amount, currency=payload.currency, approved_by_staff_id=current.id)
@@ -1,19 +1,33 @@
+import asyncio
 from datetime import datetime
-import os
 from typing import List, Optional
+from uuid import uuid4
 
 from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, UploadFile, status
-from sqlalchemy.orm import Session
-import hashlib
+from pydantic import ValidationError
+from sqlalchemy import insert, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
 
 from ..core.config import settings
-from ..deps import get_db, get_current_staff
-from ..models import DeliveryOutcome, Parcel, ParcelPhoto, PhotoType, Payment, PaymentMethod, ParcelStatus, TrackingHistory, Staff
-from ..services.notifications import send_sms
-from ..schemas import ParcelCreate, ParcelOut, PaymentCreate, PaymentOut, PhotoOut, ParcelUpdate, TrackingHistoryCreate, TrackingHistoryOut, TrackingHistoryUpdate
+from ..deps import get_async_db, get_async_read_db, get_db, get_read_db, get_current_staff, get_current_staff_async
+from ..models import Assignment, DeliveryOutcome, Parcel, ParcelPhoto, PhotoType, Payment, PaymentMethod, ParcelStatus, TrackingHistory, Staff
+from ..services import change_log, rollups
+from ..services.codes import tracking_numbers
+from ..services.live_tracking import history_details, record_event
+from ..services.notifications import queue_bulk_sms, queue_sms
+from ..services.tracking_cache import phone_lookups, tracking_cache
+from ..utils.media import save_parcel_photo
+from ..utils.phone import phone_key
+from ..utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor, encode_cursor
+from ..utils.serialization import JSONSerializer, projection
+from ..schemas import ParcelBulkCreate, ParcelBulkOut, ParcelCreate, ParcelListItem, ParcelOut, ParcelPage, PaymentCreate, PaymentOut, PhotoOut, ParcelUpdate, TrackingHistoryCreate, TrackingHistoryOut, TrackingHistoryUpdate
 
 router = APIRouter()
 
+PARCEL_PAGE = JSONSerializer(ParcelPage)
+TRACKING_LIST = JSONSerializer(List[TrackingHistoryOut])
+
 
 def validate_status_transition(current_status: ParcelStatus, new_status: ParcelStatus) -> bool:
     """Validate if the status transition is allowed"""
@@ -31,54 +45,65 @@ def validate_status_transition(current_status: ParcelStatus, new_status: ParcelS
     return new_status in status_flow.get(current_status, [])
 
 
-import hashlib
-from datetime import datetime
-
 def generate_tracking_number() -> str:
-    now_str = datetime.utcnow().strftime("%Y%m%d%H%M%S%f")
-    # hash current datetime
-    full_hash = hashlib.sha1(now_str.encode()).hexdigest().upper()
-    # define safe characters (exclude O, 0, I, L)
-    safe_chars = "ABCDEFGHJKMNPQRSTUVWXYZ123456789"
-    # filter hash to only safe characters
-    filtered = "".join(ch for ch in full_hash if ch in safe_chars)
-    # take first 5 safe chars
-    random_part = filtered[:5]
-    return f"TRK-{random_part}"
+    """Unique tracking number from the shared sequence, e.g. TRK-7KQ2MX (last char is a check character)."""
+    return tracking_numbers.next()
+
+
+def parcel_columns(payload: ParcelCreate) -> dict:
+    """Parcel column values taken from a create payload."""
+    return {
+        "sender_name": payload.sender_name,
+        "sender_phone": payload.sender_phone,
+        "sender_phone_key": phone_key(payload.sender_phone),
+        "sender_location": payload.sender_location,
+        "sender_country_code": payload.sender_country_code,
+        "receiver_name": payload.receiver_name,
+        "receiver_phone": payload.receiver_phone,
+        "receiver_phone_key": phone_key(payload.receiver_phone),
+        "receiver_location": payload.receiver_location,
+        "receiver_country_code": payload.receiver_country_code,
+        "parcel_type": payload.parcel_type,
+        "value_amount": payload.value.amount,
+        "value_currency": payload.value.currency,
+        "amount_paid_amount": payload.amount_paid.amount,
+        "amount_paid_currency": payload.amount_paid.currency,
+        "special_instructions": payload.special_instructions,
+    }
+
+
+def intake_messages(payload: ParcelCreate, tracking_number: str) -> List[dict]:
+    """'Parcel received' SMS for the sender and the receiver."""
+    details = (
+        f"Mzigo namba {tracking_number} - {payload.parcel_type} kutoka {payload.sender_location}, "
+        f"unatumwa Leo kutoka {payload.sender_location} kuja {payload.receiver_location}. Utapokea Leo. "
+        f"Wasiliana nasi Huduma kwa wateja - +255 764 730 000"
+    )
+    return [
+        {"phone": payload.sender_phone, "message": f"Habari {payload.sender_name}, {details}"},
+        {"phone": payload.receiver_phone, "message": f"Habari {payload.receiver_name}, {details}"},
+    ]
 
 
 
 @router.post("/", response_model=ParcelOut)
 @router.post("", response_model=ParcelOut, include_in_schema=False)
-def create_parcel(
+async def create_parcel(
     payload: ParcelCreate, 
-    db: Session = Depends(get_db), 
-    staff: Staff = Depends(get_current_staff)
+    db: AsyncSession = Depends(get_async_db), 
+    staff: Staff = Depends(get_current_staff_async)
 ):
-    tracking_number = generate_tracking_number()
+    # Usually served from memory; a block refill is a short write of its own
+    tracking_number = await asyncio.to_thread(generate_tracking_number)
 
     parcel = Parcel(
-        sender_name=payload.sender_name,
-        sender_phone=payload.sender_phone,
-        sender_location=payload.sender_location,
-        sender_country_code=payload.sender_country_code,
-        receiver_name=payload.receiver_name,
-        receiver_phone=payload.receiver_phone,
-        receiver_location=payload.receiver_location,
-        receiver_country_code=payload.receiver_country_code,
-        parcel_type=payload.parcel_type,
-        value_amount=payload.value.amount,
-        value_currency=payload.value.currency,
-        amount_paid_amount=payload.amount_paid.amount,
-        amount_paid_currency=payload.amount_paid.currency,
-        special_instructions=payload.special_instructions,
+        **parcel_columns(payload),
         received_by_id=staff.id,
         current_status=ParcelStatus.RECEIVED,
         tracking_number=tracking_number,
     )
     db.add(parcel)
-    db.commit()
-    db.refresh(parcel)
+    await db.flush()
     
     # Create initial tracking history
     initial_tracking = TrackingHistory(
@@ -89,30 +114,154 @@ def create_parcel(
         updated_by_staff_id=staff.id
     )
     db.add(initial_tracking)
-    db.commit()
+    await db.run_sync(rollups.add_parcel, parcel)
     
-    # Notify sender and receiver
-    try:
-        send_sms(parcel.sender_phone, f"Habari {parcel.sender_name}, Mzigo namba {parcel.tracking_number} - {parcel.parcel_type} kutoka {parcel.sender_location}, unatumwa Leo kutoka {parcel.sender_location} kuja {parcel.receiver_location}. Utapokea Leo. Wasiliana nasi Huduma kwa wateja - +255 764 730 000")
-        send_sms(parcel.receiver_phone, f"Habari {parcel.receiver_name}, Mzigo namba {parcel.tracking_number} - {parcel.parcel_type} kutoka {parcel.sender_location}, unatumwa Leo kutoka {parcel.sender_location} kuja {parcel.receiver_location}. Utapokea Leo. Wasiliana nasi Huduma kwa wateja - +255 764 730 000")
-    except Exception:
-        pass
+    # Notify sender and receiver (delivered by the outbox worker after commit)
+    for sms in intake_messages(payload, tracking_number):
+        queue_sms(db, sms["phone"], sms["message"])
     
+    await db.commit()
+    await db.refresh(parcel)
     return parcel
 
 
-@router.get("/", response_model=List[ParcelOut])
-@router.get("", response_model=List[ParcelOut], include_in_schema=False)
-def list_parcels(
-    db: Session = Depends(get_db),
+@router.post("/bulk", response_model=ParcelBulkOut)
+async def create_parcels_bulk(
+    payload: ParcelBulkCreate,
+    db: AsyncSession = Depends(get_async_db),
+    staff: Staff = Depends(get_current_staff_async),
+):
+    """
+    Receive many parcels in one transaction: parcels and their initial tracking
+    entries are inserted as two batched statements and notifications are queued
+    together. Items failing validation are reported by index; the rest are created.
+    """
+    if len(payload.items) > settings.parcel_bulk_max_items:
+        raise HTTPException(status_code=400, detail=f"At most {settings.parcel_bulk_max_items} parcels per request")
+
+    valid, errors = [], []
+    for index, item in enumerate(payload.items):
+        try:
+            valid.append((index, ParcelCreate.model_validate(item)))
+        except ValidationError as e:
+            errors.append({"index": index, "errors": e.errors(include_url=False, include_context=False)})
+    if not valid:
+        return {"created": [], "errors": errors}
+
+    tracking = await asyncio.to_thread(tracking_numbers.next_many, len(valid))
+    now = datetime.utcnow()
+    location = settings.default_location or "Main Office"
+
+    parcel_rows, history_rows, contributions, messages, created = [], [], [], [], []
+    for (index, item), tracking_number in zip(valid, tracking):
+        parcel_id = str(uuid4())
+        parcel_rows.append({
+            **parcel_columns(item),
+            "id": parcel_id,
+            "tracking_number": tracking_number,
+            "received_by_id": staff.id,
+            "received_at": now,
+            "current_status": ParcelStatus.RECEIVED,
+            "created_at": now,
+            "updated_at": now,
+        })
+        history_rows.append({
+            "id": str(uuid4()),
+            "parcel_id": parcel_id,
+            "status": ParcelStatus.RECEIVED,
+            "location": location,
+            "notes": f"Parcel received at facility. Tracking: {tracking_number}",
+            "updated_by_staff_id": staff.id,
+            "created_at": now,
+            "updated_at": now,
+        })
+        contributions.append(rollups.ParcelContribution(
+            day=now.date(),
+            status=ParcelStatus.RECEIVED,
+            outcome=DeliveryOutcome.PENDING,
+            received_by_id=staff.id,
+            dispatched=False,
+            delivered=False,
+            value_amount=item.value.amount,
+            amount_paid_amount=item.amount_paid.amount,
+        ))
+        messages.extend(intake_messages(item, tracking_number))
+        created.append({"index": index, "id": parcel_id, "tracking_number": tracking_number})
+
+    await db.execute(insert(Parcel), parcel_rows)
+    await db.execute(insert(TrackingHistory), history_rows)
+    await db.run_sync(rollups.add_parcels, contributions)
+    await db.run_sync(change_log.record_changes, "parcels", [row["id"] for row in parcel_rows])
+    await db.run_sync(change_log.record_changes, "tracking_history", [row["id"] for row in history_rows])
+    queue_bulk_sms(db, messages)
+    await db.commit()
+    # Core inserts pass the session hooks by; other processes see these on expiry
+    tracking_cache.invalidate(lookups=[
+        key for row in parcel_rows for key in phone_lookups(row["sender_phone_key"], row["receiver_phone_key"])
+    ])
+
+    return {"created": created, "errors": errors}
+
+
+@router.get("/", response_model=ParcelPage)
+@router.get("", response_model=ParcelPage, include_in_schema=False)
+async def list_parcels(
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page's next_cursor"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    status_filter: Optional[ParcelStatus] = Query(None, alias="status"),
+    delivery_outcome: Optional[DeliveryOutcome] = Query(None),
+    received_by_id: Optional[str] = Query(None),
+    date_from: Optional[datetime] = Query(None, description="Only parcels created at or after this time (UTC)"),
+    date_to: Optional[datetime] = Query(None, description="Only parcels created before this time (UTC)"),
+    dispatched: Optional[bool] = Query(None),
+    delivered: Optional[bool] = Query(None),
+    include_assignment: bool = Query(False, description="Embed the current rider assignment of each parcel"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return per parcel, e.g. id,tracking_number,current_status"),
+    db: AsyncSession = Depends(get_async_read_db),
 ):
-    return db.query(Parcel).order_by(Parcel.created_at.desc()).all()
+    """List parcels newest first, one keyset page at a time."""
+    item_fields = projection(fields, ParcelListItem)
+    query = select(Parcel)
+    if include_assignment:
+        # Loaded in the same statement as the page, no per-parcel lookups
+        query = query.options(joinedload(Parcel.assignments).joinedload(Assignment.rider))
+
+    if status_filter is not None:
+        query = query.filter(Parcel.current_status == status_filter)
+    if delivery_outcome is not None:
+        query = query.filter(Parcel.delivery_outcome == delivery_outcome)
+    if received_by_id:
+        query = query.filter(Parcel.received_by_id == received_by_id)
+    if date_from:
+        query = query.filter(Parcel.created_at >= date_from)
+    if date_to:
+        query = query.filter(Parcel.created_at < date_to)
+    if dispatched is not None:
+        query = query.filter(Parcel.dispatched == dispatched)
+    if delivered is not None:
+        query = query.filter(Parcel.delivered == delivered)
+
+    position = decode_cursor(cursor)
+    if position:
+        query = query.filter(tuple_(Parcel.created_at, Parcel.id) < position)
+
+    # Fetch one extra row to know whether another page exists
+    result = await db.execute(query.order_by(Parcel.created_at.desc(), Parcel.id.desc()).limit(limit + 1))
+    rows = result.unique().scalars().all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+
+    include = {"items": item_fields, "next_cursor": True} if item_fields else None
+    return PARCEL_PAGE.response({"items": rows, "next_cursor": next_cursor}, include)
 
 
 @router.get("/{parcel_id}", response_model=ParcelOut)
 def get_parcel(
     parcel_id: str,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     parcel = db.get(Parcel, parcel_id)
     if not parcel:
@@ -132,18 +281,7 @@ def upload_photo(
     if not parcel:
         raise HTTPException(status_code=404, detail="Parcel not found")
     
-    # Create media directory if it doesn't exist
-    os.makedirs(settings.media_dir, exist_ok=True)
-    
-    filename = f"parcel_{parcel_id}_{int(datetime.utcnow().timestamp())}_{file.filename}"
-    dest = os.path.join(settings.media_dir, filename)
-    
-    try:
-        with open(dest, "wb") as f:
-            content = file.file.read()
-            f.write(content)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to save file: {str(e)}")
+    dest = save_parcel_photo(parcel_id, file.filename, file.file.read())
     
     photo = ParcelPhoto(
         parcel_id=parcel_id, 
@@ -175,6 +313,8 @@ def add_payment(
         reference=payload.reference,
     )
     db.add(payment)
+    db.flush()
+    rollups.add_payment(db, payment)
     db.commit()
     db.refresh(payment)
     return payment
@@ -191,32 +331,38 @@ def update_parcel(
     if not parcel:
         raise HTTPException(status_code=404, detail="Parcel not found")
     
+    before = rollups.snapshot(parcel)
+    
     # Update fields
     update_data = payload.dict(exclude_unset=True)
     for field, value in update_data.items():
         if hasattr(parcel, field):
             setattr(parcel, field, value)
         elif field == 'value' and value:
-            parcel.value_amount = value.amount
-            parcel.value_currency = value.currency
+            parcel.value_amount = value["amount"]
+            parcel.value_currency = value["currency"]
         elif field == 'amount_paid' and value:
-            parcel.amount_paid_amount = value.amount
-            parcel.amount_paid_currency = value.currency
+            parcel.amount_paid_amount = value["amount"]
+            parcel.amount_paid_currency = value["currency"]
     
+    parcel.sender_phone_key = phone_key(parcel.sender_phone)
+    parcel.receiver_phone_key = phone_key(parcel.receiver_phone)
     parcel.updated_at = datetime.utcnow()
+    rollups.move_parcel(db, before, parcel)
+    record_event(db, parcel, "updated")
     db.commit()
     db.refresh(parcel)
     return parcel
 
 
 @router.post("/{parcel_id}/track", response_model=TrackingHistoryOut)
-def add_tracking_history(
+async def add_tracking_history(
     parcel_id: str, 
     payload: TrackingHistoryCreate, 
-    db: Session = Depends(get_db),
-    staff: Staff = Depends(get_current_staff)
+    db: AsyncSession = Depends(get_async_db),
+    staff: Staff = Depends(get_current_staff_async)
 ):
-    parcel = db.get(Parcel, parcel_id)
+    parcel = await db.get(Parcel, parcel_id)
     if not parcel:
         raise HTTPException(status_code=404, detail="Parcel not found")
     
@@ -237,6 +383,7 @@ def add_tracking_history(
     )
     
     # Update parcel status
+    before = rollups.snapshot(parcel)
     parcel.current_status = payload.status
     
     # Update specific timestamps based on status
@@ -249,25 +396,26 @@ def add_tracking_history(
         parcel.delivery_outcome = DeliveryOutcome.SUCCESS
     
     db.add(tracking_history)
-    db.commit()
-    db.refresh(tracking_history)
+    await db.run_sync(rollups.move_parcel, before, parcel)
     
     # Send notification for important status changes
     if payload.status in [ParcelStatus.DELIVERED, ParcelStatus.OUT_FOR_DELIVERY]:
-        try:
-            if payload.status == ParcelStatus.DELIVERED:
-                status_text = "umefikishwa"
-            elif payload.status == ParcelStatus.OUT_FOR_DELIVERY:
-                status_text = "uko njiani"
-
-            message = f"Mzigo wako: {parcel.tracking_number} {status_text}"
-            if payload.status == ParcelStatus.OUT_FOR_DELIVERY:
-                message += ". Tafadhali kaa tayari kupokea!"
-
-            send_sms(parcel.receiver_phone, message)
-        except Exception:
-            pass
-
+        if payload.status == ParcelStatus.DELIVERED:
+            status_text = "umefikishwa"
+        elif payload.status == ParcelStatus.OUT_FOR_DELIVERY:
+            status_text = "uko njiani"
+
+        message = f"Mzigo wako: {parcel.tracking_number} {status_text}"
+        if payload.status == ParcelStatus.OUT_FOR_DELIVERY:
+            message += ". Tafadhali kaa tayari kupokea!"
+
+        queue_sms(db, parcel.receiver_phone, message)
+
+    await db.flush()
+    record_event(db, parcel, "tracking", **history_details(tracking_history))
+    await db.commit()
+    # Load the relationships the response serializes; lazy loads are not possible here
+    await db.refresh(tracking_history, ["parcel", "updated_by_staff", "rider"])
     return tracking_history
 
 
@@ -298,7 +446,9 @@ def update_tracking_history(
         ).order_by(TrackingHistory.created_at.desc()).first()
         
         if latest_tracking and latest_tracking.id == tracking_history_id:
+            before = rollups.snapshot(parcel)
             parcel.current_status = payload.status
+            rollups.move_parcel(db, before, parcel)
     
     # Update tracking history
     if payload.status:
@@ -308,6 +458,7 @@ def update_tracking_history(
     if payload.notes is not None:
         tracking_history.notes = payload.notes
     
+    record_event(db, db.get(Parcel, parcel_id), "tracking_updated", **history_details(tracking_history))
     db.commit()
     db.refresh(tracking_history)
     return tracking_history
@@ -316,16 +467,22 @@ def update_tracking_history(
 @router.get("/{parcel_id}/track", response_model=List[TrackingHistoryOut])
 def list_tracking_history(
     parcel_id: str, 
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return per entry, e.g. id,status,created_at"),
     db: Session = Depends(get_db),
     staff: Optional[Staff] = Depends(get_current_staff)  # Optional auth for public tracking
 ):
+    include = projection(fields, TrackingHistoryOut)
     parcel = db.get(Parcel, parcel_id)
     if not parcel:
         raise HTTPException(status_code=404, detail="Parcel not found")
     
-    return db.query(TrackingHistory).filter(
+    history = db.query(TrackingHistory).options(
+        joinedload(TrackingHistory.updated_by_staff),
+        joinedload(TrackingHistory.rider),
+    ).filter(
         TrackingHistory.parcel_id == parcel_id
     ).order_by(TrackingHistory.created_at.asc()).all()  # Changed to ascending for timeline
+    return TRACKING_LIST.response(history, include)
 
 
 @router.get("/{parcel_id}/track/{tracking_history_id}", response_model=TrackingHistoryOut)
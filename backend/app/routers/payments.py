@@ -1,29 +1,17 @@
-from datetime import datetime
-import hashlib 
-
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
 from ..deps import get_db, require_roles
 from ..models import Parcel, Receipt, Payment, StaffRole
 from ..schemas import ReceiptOut
+from ..services.codes import receipt_numbers
 
 router = APIRouter()
 
 
-import hashlib
-from datetime import datetime
-
 def generate_receipt_number() -> str:
-    now_str = datetime.utcnow().strftime("%Y%m%d%H%M%S%f")
-    full_hash = hashlib.sha1(now_str.encode()).hexdigest().upper()
-    # safe characters (exclude O, 0, I, L)
-    safe_chars = "ABCDEFGHJKMNPQRSTUVWXYZ123456789"
-    # filter hash to safe chars only
-    filtered = "".join(ch for ch in full_hash if ch in safe_chars)
-    # take first 5 safe chars
-    random_part = filtered[:5]
-    return f"RCPT-{random_part}"
+    """Unique receipt number from the shared sequence, e.g. RCPT-M3D9WQ."""
+    return receipt_numbers.next()
 
 
 
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
-from ..deps import get_db, require_roles
+from ..deps import get_db, get_read_db, require_roles
 from ..models import Rider, StaffRole
 from ..schemas import RiderCreate, RiderOut
 
@@ -22,7 +22,7 @@ def create_rider(payload: RiderCreate, db: Session = Depends(get_db), _=Depends(
 
 @router.get("/", response_model=list[RiderOut])
 @router.get("", response_model=list[RiderOut], include_in_schema=False)
-def list_riders(db: Session = Depends(get_db)):
+def list_riders(db: Session = Depends(get_read_db)):
     return db.query(Rider).all()
 
 
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
-from typing import List, Dict, Optional
+from typing import List, Optional
 from pydantic import BaseModel
-from ..services.sms_service import sms_service, get_sms_delivery_report, poll_sms_status
+from ..services.sms_service import sms_service
 from ..deps import require_roles, StaffRole
 import uuid
 
@@ -15,6 +15,18 @@ class SMSRequest(BaseModel):
 class BulkSMSRequest(BaseModel):
     messages: List[SMSRequest]
 
+class BulkSMSResult(BaseModel):
+    index: int
+    reference: Optional[str] = None
+    success: bool
+
+class BulkSMSResponse(BaseModel):
+    success: int
+    failed: int
+    failed_indices: List[int]
+    chunks: int
+    results: List[BulkSMSResult]
+
 class SMSResponse(BaseModel):
     success: bool
     message: str
@@ -25,7 +37,7 @@ class SMSResponse(BaseModel):
 async def check_sms_balance():
     """Check SMS balance"""
     try:
-        balance = sms_service.check_balance()
+        balance = await sms_service.check_balance_async()
         return balance
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to check balance: {str(e)}")
@@ -35,7 +47,7 @@ async def send_single_sms(request: SMSRequest):
     """Send a single SMS"""
     try:
         ref = request.reference if request.reference else uuid.uuid4().hex
-        success = sms_service.send_single_sms(
+        success = await sms_service.send_single_sms_async(
             phone=request.phone,
             message=request.message,
             reference=ref
@@ -61,30 +73,36 @@ async def send_single_sms(request: SMSRequest):
             error=str(e)
         )
 
-@router.post("/bulk", response_model=Dict[str, int])
+@router.post("/bulk", response_model=BulkSMSResponse)
 async def send_bulk_sms(request: BulkSMSRequest):
-    """Send bulk SMS messages"""
+    """Send bulk SMS messages (any number; chunked and sent concurrently)"""
     try:
         # Convert to the format expected by the service
         messages = [
             {
                 "phone": msg.phone,
-                "message": msg.message
+                "message": msg.message,
+                "reference": msg.reference
             }
             for msg in request.messages
         ]
         
-        result = sms_service.send_bulk_sms(messages)
+        result = await sms_service.send_bulk_sms_async(messages)
         return result
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to send bulk SMS: {str(e)}")
 
+@router.get("/metrics")
+async def get_sms_metrics():
+    """Gateway circuit breaker and rate limiter metrics"""
+    return sms_service.metrics()
+
 @router.get("/reports/{reference_id}")
 async def get_delivery_reports(reference_id: str):
     """Get SMS delivery reports"""
     try:
-        reports = get_sms_delivery_report(reference_id)
+        reports = await sms_service.get_delivery_reports_async(reference_id)
         return reports
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get delivery reports: {str(e)}")
@@ -93,7 +111,8 @@ async def get_delivery_reports(reference_id: str):
 async def poll_messages(reference_id: str):
     """Poll for incoming messages"""
     try:
-        messages = poll_sms_status(reference_id)
+        # The provider exposes incoming messages through the delivery report polling handler
+        messages = await sms_service.get_delivery_reports_async(reference_id)
         return messages
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to poll messages: {str(e)}")
@@ -103,7 +122,7 @@ async def test_sms_service():
     """Test SMS service connectivity"""
     try:
         # Test with a simple balance check
-        balance = sms_service.check_balance()
+        balance = await sms_service.check_balance_async()
         
         # Get service configuration info
         config_info = {
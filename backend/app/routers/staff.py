@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
-from ..deps import get_db, get_current_staff, require_roles
+from ..deps import get_db, get_read_db, get_current_staff, require_roles
 from ..models import Staff, StaffRole
 from ..schemas import StaffOut, StaffUpdate
+from ..services.staff_cache import staff_cache
 from ..utils.security import get_password_hash
 
 router = APIRouter()
@@ -14,9 +15,15 @@ def me(current: Staff = Depends(get_current_staff)):
     return current
 
 
+@router.get("/cache/metrics")
+def staff_cache_metrics(_: Staff = Depends(require_roles(StaffRole.ADMIN, StaffRole.SUPER_ADMIN))):
+    """Hit/miss counters of the authenticated staff cache in this process"""
+    return staff_cache.metrics()
+
+
 @router.get("/", response_model=list[StaffOut])
 @router.get("", response_model=list[StaffOut], include_in_schema=False)
-def list_staff(db: Session = Depends(get_db), _: Staff = Depends(require_roles(StaffRole.MANAGER, StaffRole.ADMIN, StaffRole.SUPER_ADMIN))):
+def list_staff(db: Session = Depends(get_read_db), _: Staff = Depends(require_roles(StaffRole.MANAGER, StaffRole.ADMIN, StaffRole.SUPER_ADMIN))):
     return db.query(Staff).all()
 
 
@@ -49,7 +56,9 @@ def update_staff(staff_id: str, payload: StaffUpdate, db: Session = Depends(get_
         staff.password_hash = get_password_hash(payload.password)
     
     db.add(staff)
+    staff_cache.bump_version(db)
     db.commit()
+    staff_cache.invalidate(staff_id)
     db.refresh(staff)
     return staff
 
@@ -63,6 +72,8 @@ def delete_staff(staff_id: str, db: Session = Depends(get_db), _=Depends(require
     # Soft delete by setting is_active to False
     staff.is_active = False
     db.add(staff)
+    staff_cache.bump_version(db)
     db.commit()
+    staff_cache.invalidate(staff_id)
     
     return {"status": "deleted", "message": f"Staff {staff.full_name} has been deactivated"}
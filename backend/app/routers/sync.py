@@ -0,0 +1,39 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..deps import get_current_staff, get_read_db
+from ..services import change_log
+
+router = APIRouter(dependencies=[Depends(get_current_staff)])
+
+
+@router.get("/changes")
+def sync_changes(
+    since: Optional[str] = Query(None, description="Cursor from the previous sync; omit for a full sync"),
+    tables: Optional[str] = Query(
+        None, description=f"Comma-separated subset of {', '.join(change_log.SYNCED)}; keep it the same between syncs"
+    ),
+    limit: Optional[int] = Query(None, ge=1, le=settings.sync_max_page_size),
+    db: Session = Depends(get_read_db),
+):
+    """
+    Rows of parcels, assignments, tracking_history, delivery_attempts and riders
+    changed after `since`, for devices keeping a local copy. Per table: `columns`,
+    `rows` (current values in column order, to upsert) and `deleted` ids (including
+    deactivated riders). Store the returned `cursor` and call again while
+    `has_more` is true.
+    """
+    position = change_log.parse_cursor(since)
+    if position is None:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    entities = list(change_log.SYNCED)
+    if tables:
+        entities = [name.strip() for name in tables.split(",") if name.strip()]
+        unknown = sorted(set(entities) - set(change_log.SYNCED))
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown tables: {', '.join(unknown)}")
+    return JSONResponse(change_log.changes_since(db, position, entities, limit or settings.sync_page_size))
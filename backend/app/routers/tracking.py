@@ -1,47 +1,259 @@
-from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
+import asyncio
+import json
+import time
+from typing import AsyncIterator, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, WebSocket
+from fastapi.responses import StreamingResponse
+from starlette.websockets import WebSocketState
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import select
 
-from ..deps import get_db
-from ..models import Parcel, TrackingHistory
-from ..schemas import TrackingHistoryOut
+from ..core.config import settings
+from ..db import AsyncSessionLocal
+from ..deps import async_read_session, get_read_db, is_uuid, require_roles
+from ..models import Parcel, Staff, StaffRole, TrackingHistory
+from ..schemas import TrackingHistoryOut, TrackingLookupOut
+from ..services import live_tracking
+from ..services.live_tracking import LiveEvent, Subscription
+from ..services.tracking_cache import etag_for, tracking_cache
+from ..utils.phone import phone_key
+from ..utils.serialization import JSONSerializer, projection
 
 router = APIRouter()
 
+TRACKING_LIST = JSONSerializer(list[TrackingHistoryOut])
+TRACKING_LOOKUP = JSONSerializer(TrackingLookupOut)
+FIELDS_QUERY = Query(None, description="Comma-separated fields to return per entry, e.g. id,status,created_at")
+
+# Nested objects of TrackingHistoryOut, loaded with the rows instead of one query per row
+TRACKING_RELATIONS = (
+    joinedload(TrackingHistory.parcel),
+    joinedload(TrackingHistory.updated_by_staff),
+    joinedload(TrackingHistory.rider),
+)
+
 @router.get("/", response_model=list[TrackingHistoryOut])
 @router.get("", response_model=list[TrackingHistoryOut], include_in_schema=False)
-def list_all_tracking_histories(db: Session = Depends(get_db)):
-    return db.query(TrackingHistory).all()
+def list_all_tracking_histories(fields: Optional[str] = FIELDS_QUERY, db: Session = Depends(get_read_db)):
+    include = projection(fields, TrackingHistoryOut)
+    rows = db.query(TrackingHistory).options(*TRACKING_RELATIONS).all()
+    return TRACKING_LIST.response(rows, include)
 
 @router.get("/parcel/{parcel_id}", response_model=list[TrackingHistoryOut])
-def list_tracking_histories_by_parcel_id(parcel_id: str, db: Session = Depends(get_db)):
-    return db.query(TrackingHistory).filter(TrackingHistory.parcel_id == parcel_id).all()
+def list_tracking_histories_by_parcel_id(
+    parcel_id: str, fields: Optional[str] = FIELDS_QUERY, db: Session = Depends(get_read_db)
+):
+    include = projection(fields, TrackingHistoryOut)
+    rows = db.query(TrackingHistory).options(*TRACKING_RELATIONS).filter(TrackingHistory.parcel_id == parcel_id).all()
+    return TRACKING_LIST.response(rows, include)
+
+def _lookup_key(sender_phone: Optional[str], receiver_phone: Optional[str], tracking_number: Optional[str]) -> tuple:
+    """Normalized lookup: the tracking number when given, else the phone keys."""
+    if tracking_number and tracking_number.strip():
+        return ("number", tracking_number.strip().upper())
+    sender, receiver = phone_key(sender_phone), phone_key(receiver_phone)
+    if not sender and not receiver:
+        raise HTTPException(status_code=400, detail="At least one phone number or tracking number is required")
+    return ("phone", sender, receiver)
 
-@router.get("/track")
-def track_parcel(
+
+def _not_modified(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return "*" in tags or etag in tags
+
+
+async def _find_parcel(db: AsyncSession, key: tuple) -> Optional[Parcel]:
+    """The parcel a lookup resolves to, or None if no parcel matches."""
+    query = select(Parcel)
+    if key[0] == "number":
+        query = query.filter(Parcel.tracking_number == key[1])
+    else:
+        _, sender, receiver = key
+        if sender:
+            query = query.filter(Parcel.sender_phone_key == sender)
+        if receiver:
+            query = query.filter(Parcel.receiver_phone_key == receiver)
+        query = query.order_by(Parcel.created_at.desc())
+    return (await db.execute(query.limit(1))).scalar()
+
+
+async def _render_lookup(db: AsyncSession, parcel: Parcel) -> bytes:
+    history = (await db.execute(
+        select(TrackingHistory)
+        .options(joinedload(TrackingHistory.updated_by_staff), joinedload(TrackingHistory.rider))
+        .filter(TrackingHistory.parcel_id == parcel.id)
+        .order_by(TrackingHistory.created_at.asc())
+    )).scalars().all()
+    return TRACKING_LOOKUP.dump({"parcel": parcel, "history": history})
+
+
+@router.get("/track", response_model=TrackingLookupOut)
+async def track_parcel(
+    request: Request,
     sender_phone: Optional[str] = Query(None), 
     receiver_phone: Optional[str] = Query(None),
     tracking_number: Optional[str] = Query(None),
-    db: Session = Depends(get_db)
 ):
-    query = db.query(Parcel)
-
-    if sender_phone and receiver_phone:
-        parcel = query.filter(and_(Parcel.sender_phone == sender_phone,
-                                   Parcel.receiver_phone == receiver_phone)).first()
-    elif sender_phone:
-        parcel = query.filter(Parcel.sender_phone == sender_phone).first()
-    elif receiver_phone:
-        parcel = query.filter(Parcel.receiver_phone == receiver_phone).first()
-    elif tracking_number:
-        parcel = query.filter(Parcel.tracking_number == tracking_number).first()
+    """
+    Public tracking: the parcel with `tracking_number`, or the newest parcel for the
+    sender and/or receiver phone, with its history oldest first. Repeat polls are
+    answered from the per-process cache without a database session; send the ETag
+    back as If-None-Match to get a 304 while nothing has changed.
+    """
+    key = _lookup_key(sender_phone, receiver_phone, tracking_number)
+    cached = tracking_cache.get(key)
+    if cached:
+        etag, body = cached
     else:
-        raise HTTPException(status_code=400, detail="At least one phone number or tracking number is required")
+        generation = tracking_cache.generation
+        async with async_read_session(request) as db:
+            parcel = await _find_parcel(db, key)
+            if parcel is None:
+                raise HTTPException(status_code=404, detail="Parcel not found")
+            body = await _render_lookup(db, parcel)
+            parcel_id = parcel.id
+        etag = etag_for(body)
+        tracking_cache.put(key, parcel_id, etag, body, generation)
+
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+
+@router.get("/cache/metrics")
+def tracking_cache_metrics(_: Staff = Depends(require_roles(StaffRole.ADMIN, StaffRole.SUPER_ADMIN))):
+    """Hit/miss counters of the public tracking cache in this process"""
+    return tracking_cache.metrics()
+
+
+async def _resolve_parcel(db: AsyncSession, parcel_id: Optional[str], tracking_number: Optional[str]) -> Optional[str]:
+    """Parcel id for a subscription by id or tracking number, or None when there is no such parcel."""
+    if tracking_number and tracking_number.strip():
+        query = select(Parcel.id).filter(Parcel.tracking_number == tracking_number.strip().upper())
+    elif parcel_id:
+        if not is_uuid(parcel_id):
+            return None
+        query = select(Parcel.id).filter(Parcel.id == parcel_id)
+    else:
+        return None
+    return (await db.execute(query)).scalar()
+
+
+def _sse_frame(event: LiveEvent) -> str:
+    return f"id: {event.id}\nevent: {event.kind}\ndata: {event.payload}\n\n"
+
+
+async def _sse_stream(request: Request, subscription: Subscription, backlog: List[LiveEvent]) -> AsyncIterator[str]:
+    try:
+        # Reconnect quickly after the server ends a stream
+        yield "retry: 2000\n\n"
+        replayed = {event.id for event in backlog}
+        for event in backlog:
+            yield _sse_frame(event)
+        deadline = time.monotonic() + settings.live_tracking_max_stream_seconds
+        while not subscription.closed and time.monotonic() < deadline:
+            wait = min(settings.live_tracking_heartbeat_seconds, deadline - time.monotonic())
+            event = await subscription.get(max(wait, 0))
+            if event is None:
+                if await request.is_disconnected():
+                    break
+                # Comment line keeps proxies from timing out an idle stream
+                yield ": ping\n\n"
+            elif event.id not in replayed:
+                yield _sse_frame(event)
+    finally:
+        subscription.close()
+
+
+@router.get("/stream")
+async def stream_tracking(
+    request: Request,
+    parcel_id: Optional[str] = Query(None),
+    tracking_number: Optional[str] = Query(None),
+):
+    """
+    Server-Sent Events for one parcel (by id or tracking number): an event per tracking
+    entry, parcel edit, assignment, dispatch, OTP verification, delivery or failure, as
+    it commits.
+    Reconnecting with Last-Event-ID replays what was missed.
+    """
+    if not settings.live_tracking_enabled:
+        raise HTTPException(status_code=503, detail="Live tracking is disabled")
+    try:
+        after_id = int(request.headers.get("last-event-id") or 0)
+    except ValueError:
+        after_id = 0
+
+    subscription = live_tracking.hub.subscribe()
+    # A short session of its own: the stream itself must not hold a connection
+    async with AsyncSessionLocal() as db:
+        resolved = await _resolve_parcel(db, parcel_id, tracking_number)
+        if resolved is None:
+            raise HTTPException(status_code=404, detail="Parcel not found")
+        # Subscribe before replaying so nothing committed in between is lost
+        subscription.add(resolved)
+        backlog = await live_tracking.replay(db, resolved, after_id) if after_id else []
+
+    return StreamingResponse(
+        _sse_stream(request, subscription, backlog),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/ws")
+async def tracking_websocket(websocket: WebSocket):
+    """
+    Live tracking over a WebSocket, for clients watching several parcels. Send
+    {"subscribe": {"parcel_id": ...}} or {"subscribe": {"tracking_number": ...}}, and
+    {"unsubscribe": {"parcel_id": ...}}; events arrive as JSON with the feed "id".
+    """
+    await websocket.accept()
+    if not settings.live_tracking_enabled:
+        await websocket.close(code=1013, reason="Live tracking is disabled")
+        return
+    subscription = live_tracking.hub.subscribe()
+
+    async def receive() -> None:
+        while True:
+            try:
+                message = json.loads(await websocket.receive_text())
+            except ValueError:
+                message = None
+            action = next((key for key in ("subscribe", "unsubscribe") if isinstance(message, dict) and key in message), None)
+            target = message[action] if action else None
+            if not isinstance(target, dict):
+                await websocket.send_json({"error": "Send {\"subscribe\": {...}} or {\"unsubscribe\": {...}}"})
+                continue
+            async with AsyncSessionLocal() as db:
+                resolved = await _resolve_parcel(db, target.get("parcel_id"), target.get("tracking_number"))
+            if resolved is None:
+                await websocket.send_json({"error": "Parcel not found", action: target})
+            elif action == "subscribe":
+                subscription.add(resolved)
+                await websocket.send_json({"subscribed": resolved})
+            else:
+                subscription.remove(resolved)
+                await websocket.send_json({"unsubscribed": resolved})
 
-    if not parcel:
-        raise HTTPException(status_code=404, detail="Parcel not found")
+    async def send() -> None:
+        while not subscription.closed:
+            event = await subscription.get(settings.live_tracking_heartbeat_seconds)
+            if event is not None:
+                await websocket.send_text(json.dumps({"id": event.id, **json.loads(event.payload)}))
 
-    history = db.query(TrackingHistory).filter(TrackingHistory.parcel_id == parcel.id).all()
-    
-    return {"parcel": parcel, "history": history}
+    tasks = [asyncio.create_task(receive()), asyncio.create_task(send())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        subscription.close()
+        if websocket.client_state == WebSocketState.CONNECTED:
+            await websocket.close()
@@ -0,0 +1,44 @@
+import logging
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+from .db import engine
+from . import models  # noqa: F401  (registers every table on Base.metadata)
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+# Arbitrary key so concurrently starting replicas run migrations one at a time
+MIGRATION_LOCK_KEY = 73160425
+
+
+def alembic_config() -> Config:
+    cfg = Config(str(BACKEND_DIR / "alembic.ini"))
+    cfg.set_main_option("script_location", str(BACKEND_DIR / "migrations"))
+    return cfg
+
+
+def migrate(bind: Engine = engine) -> None:
+    """
+    Bring the database schema to the latest Alembic revision.
+
+    A database created by `create_all` before migrations existed has tables but
+    no `alembic_version`. Its schema is a subset of the baseline revision, which
+    skips what already exists, so it is upgraded from scratch like an empty one:
+    the baseline fills in the missing tables/indexes and later revisions add their
+    columns and backfills.
+    """
+    cfg = alembic_config()
+    with bind.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+        cfg.attributes["connection"] = conn
+
+        inspector = inspect(conn)
+        if inspector.has_table("parcels") and not inspector.has_table("alembic_version"):
+            logger.warning("Database predates migrations; completing the baseline schema and upgrading")
+        command.upgrade(cfg, "head")
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional, List
+from typing import Any, Dict, Literal, Optional, List
 
 from pydantic import BaseModel, Field, ConfigDict
 
@@ -140,6 +140,43 @@ class ParcelOut(ORMModel):
     tracking_number: Optional[str]
 
 
+class ParcelAssignmentOut(ORMModel):
+    id: str
+    rider: RiderOutLite
+    assigned_by_staff_id: str
+    assigned_at: datetime
+
+
+class ParcelListItem(ParcelOut):
+    current_assignment: Optional[ParcelAssignmentOut] = None
+
+
+class ParcelPage(BaseModel):
+    items: List[ParcelListItem]
+    next_cursor: Optional[str] = None
+
+
+class ParcelBulkCreate(BaseModel):
+    # Validated one by one so a bad item is reported instead of rejecting the batch
+    items: List[Dict[str, Any]]
+
+
+class ParcelBulkCreated(BaseModel):
+    index: int
+    id: str
+    tracking_number: str
+
+
+class ParcelBulkError(BaseModel):
+    index: int
+    errors: List[Dict[str, Any]]
+
+
+class ParcelBulkOut(BaseModel):
+    created: List[ParcelBulkCreated]
+    errors: List[ParcelBulkError]
+
+
 class AssignmentCreate(BaseModel):
     rider_id: str
 
@@ -180,6 +217,39 @@ class DeliveryAttemptOut(ORMModel):
     attempted_at: datetime
 
 
+# Offline rider events
+class RiderEventIn(BaseModel):
+    key: str = Field(min_length=1, max_length=64)
+    type: Literal["attempt", "verify_otp", "photo"]
+    parcel_id: str
+    occurred_at: datetime
+    # DeliveryAttemptCreate, OTPVerifyRequest or PhotoEventData by type; checked per event
+    data: Dict[str, Any] = {}
+
+
+class PhotoEventData(BaseModel):
+    type: PhotoType
+    # Filename of the part uploaded with the batch
+    file: str
+
+
+class RiderEventResult(BaseModel):
+    key: str
+    parcel_id: str
+    status: Literal["applied", "rejected", "duplicate", "error"]
+    code: int
+    detail: Optional[Any] = None
+    result: Optional[Dict[str, Any]] = None
+
+
+class RiderEventBatchOut(BaseModel):
+    results: List[RiderEventResult]
+    applied: int
+    rejected: int
+    duplicates: int
+    errors: int
+
+
 
 # Payments / Receipts
 class PaymentCreate(BaseModel):
@@ -286,6 +356,11 @@ class TrackingHistoryOut(ORMModel):
     created_at: datetime
 
 
+class TrackingLookupOut(BaseModel):
+    parcel: ParcelOut
+    history: List[TrackingHistoryOut]
+
+
 class TrackingHistoryUpdate(BaseModel):
     status: Optional[ParcelStatus] = None
     location: Optional[str] = None
@@ -0,0 +1,186 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from enum import Enum
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, event, func, insert, select
+from sqlalchemy.orm import Session, aliased
+
+from ..core.config import settings
+from ..db import SessionLocal
+from ..models import Assignment, ChangeLog, DeliveryAttempt, Parcel, Rider, TrackingHistory
+
+logger = logging.getLogger(__name__)
+
+# Synced entity name -> model
+SYNCED = {
+    "parcels": Parcel,
+    "assignments": Assignment,
+    "tracking_history": TrackingHistory,
+    "delivery_attempts": DeliveryAttempt,
+    "riders": Rider,
+}
+ENTITY_OF = {model: entity for entity, model in SYNCED.items()}
+
+# Lookup-only columns the app has no use for
+OMITTED_COLUMNS = {"sender_phone_key", "receiver_phone_key"}
+COLUMNS = {
+    entity: [column for column in model.__table__.columns if column.name not in OMITTED_COLUMNS]
+    for entity, model in SYNCED.items()
+}
+
+# Superseded entries deleted per statement while compacting
+COMPACT_BATCH = 5000
+
+
+@event.listens_for(Session, "after_flush")
+def _log_flushed_changes(session: Session, flush_context) -> None:
+    """Log every synced row this flush inserted, updated or deleted (AsyncSession flushes included)."""
+    changes: Dict[Tuple[str, str], bool] = {}
+    for obj in session.new:
+        entity = ENTITY_OF.get(type(obj))
+        if entity:
+            changes[(entity, obj.id)] = False
+    for obj in session.dirty:
+        entity = ENTITY_OF.get(type(obj))
+        if entity and session.is_modified(obj, include_collections=False):
+            changes[(entity, obj.id)] = False
+    for obj in session.deleted:
+        entity = ENTITY_OF.get(type(obj))
+        if entity:
+            changes[(entity, obj.id)] = True
+    if changes:
+        session.connection().execute(insert(ChangeLog), [
+            {"entity": entity, "entity_id": entity_id, "deleted": deleted, "changed_at": datetime.utcnow()}
+            for (entity, entity_id), deleted in changes.items()
+        ])
+
+
+def record_changes(db: Session, entity: str, ids: Iterable[str]) -> None:
+    """Log rows written with Core statements, which the flush hook does not see."""
+    now = datetime.utcnow()
+    rows = [{"entity": entity, "entity_id": entity_id, "deleted": False, "changed_at": now} for entity_id in ids]
+    if rows:
+        db.execute(insert(ChangeLog), rows)
+
+
+def parse_cursor(cursor: Optional[str]) -> Optional[int]:
+    """Sequence number behind a sync cursor (0 for a first sync), or None if it is malformed."""
+    if not cursor:
+        return 0
+    return int(cursor) if cursor.isdigit() else None
+
+
+def _value(value):
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def changes_since(db: Session, since: int, entities: List[str], limit: int) -> dict:
+    """
+    Changed rows of `entities` among the next `limit` log entries after cursor
+    `since`, grouped per entity as column names plus value rows (current state) and
+    ids of deleted rows. Entries of other entities are skipped, not filtered in SQL,
+    so the scan follows the primary key.
+
+    Sequence numbers are taken at flush but become visible at commit, so a missing
+    number may still arrive. The cursor stops below the first gap younger than
+    `sync_gap_grace_seconds` (by the entry after it, which was numbered later);
+    older gaps are rolled back transactions or compacted entries.
+    """
+    unsettled = datetime.utcnow() - timedelta(seconds=settings.sync_gap_grace_seconds)
+    entries = db.execute(
+        select(ChangeLog.seq, ChangeLog.entity, ChangeLog.entity_id, ChangeLog.deleted, ChangeLog.changed_at)
+        .filter(ChangeLog.seq > since)
+        .order_by(ChangeLog.seq)
+        .limit(limit + 1)
+    ).all()
+
+    cursor, has_more = since, False
+    latest: Dict[str, Dict[str, bool]] = {}
+    for index, entry in enumerate(entries):
+        if index == limit:
+            has_more = True
+            break
+        if entry.seq > cursor + 1 and entry.changed_at > unsettled:
+            # Everything from here on waits for the next sync
+            break
+        if entry.entity in entities:
+            latest.setdefault(entry.entity, {})[entry.entity_id] = entry.deleted
+        cursor = entry.seq
+
+    changes = {}
+    for entity, states in latest.items():
+        model, columns = SYNCED[entity], COLUMNS[entity]
+        live_ids = [entity_id for entity_id, deleted in states.items() if not deleted]
+        rows = db.execute(select(*columns).filter(model.id.in_(live_ids))).all() if live_ids else []
+        if entity == "riders":
+            # Deactivation is the riders' delete
+            rows = [row for row in rows if row.is_active]
+        found = {row.id for row in rows}
+        changes[entity] = {
+            "columns": [column.name for column in columns],
+            "rows": [[_value(value) for value in row] for row in rows],
+            "deleted": [entity_id for entity_id in states if entity_id not in found],
+        }
+    return {"cursor": str(cursor), "has_more": has_more, "changes": changes}
+
+
+class Compactor:
+    """
+    Removes log entries superseded by a later change of the same row, once that
+    change is older than `sync_gap_grace_seconds`, so the gaps it leaves never hold
+    back a sync cursor.
+    """
+
+    def __init__(self):
+        # Entries up to here have had their older versions removed
+        self._compacted_through = 0
+
+    def compact(self) -> int:
+        db = SessionLocal()
+        try:
+            settled = datetime.utcnow() - timedelta(seconds=settings.sync_gap_grace_seconds)
+            newest = db.execute(select(func.max(ChangeLog.seq)).filter(ChangeLog.changed_at < settled)).scalar() or 0
+            recent, older = aliased(ChangeLog), aliased(ChangeLog)
+            superseded = (
+                select(older.seq)
+                .join(recent, (recent.entity == older.entity) & (recent.entity_id == older.entity_id) & (recent.seq > older.seq))
+                .filter(recent.seq > self._compacted_through, recent.seq <= newest, recent.changed_at < settled)
+                .limit(COMPACT_BATCH)
+            )
+            removed = 0
+            while True:
+                seqs = db.execute(superseded).scalars().all()
+                if not seqs:
+                    break
+                db.execute(delete(ChangeLog).where(ChangeLog.seq.in_(seqs)))
+                db.commit()
+                removed += len(seqs)
+            self._compacted_through = newest
+            return removed
+        finally:
+            db.close()
+
+
+compactor = Compactor()
+
+
+async def run_compaction(stop: asyncio.Event) -> None:
+    """Compact the change log every `sync_compact_interval_seconds` until `stop` is set."""
+    interval = settings.sync_compact_interval_seconds
+    while not stop.is_set():
+        try:
+            removed = await asyncio.to_thread(compactor.compact)
+            if removed:
+                logger.info("Compacted %d change log entries", removed)
+        except Exception:
+            logger.exception("Change log compaction failed")
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            pass
@@ -0,0 +1,136 @@
+import hashlib
+import hmac
+import secrets
+import threading
+from typing import List, Optional, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine
+
+from ..core.config import settings
+from ..db import engine
+from ..models import CodeSequence
+
+# Uppercase letters and digits without the look-alikes O, 0, I and L
+SAFE_ALPHABET = "ABCDEFGHJKMNPQRSTUVWXYZ123456789"
+BASE = len(SAFE_ALPHABET)
+BITS_PER_CHAR = 5
+MIN_WIDTH = 5
+FEISTEL_ROUNDS = 4
+
+
+def check_char(body: str) -> str:
+    """Luhn mod 32 check character: catches any single wrong character and most swaps of neighbours."""
+    total = 0
+    factor = 2
+    for ch in reversed(body):
+        addend = factor * SAFE_ALPHABET.index(ch)
+        total += addend // BASE + addend % BASE
+        factor = 1 if factor == 2 else 2
+    return SAFE_ALPHABET[-total % BASE]
+
+
+def is_valid_code(code: str, prefix: str) -> bool:
+    """True when `code` is well formed for `prefix` and its check character matches."""
+    head, _, tail = code.upper().partition("-")
+    if head != prefix or len(tail) < MIN_WIDTH + 1 or any(ch not in SAFE_ALPHABET for ch in tail):
+        return False
+    return check_char(tail[:-1]) == tail[-1]
+
+
+def _permute(value: int, bits: int, key: bytes) -> int:
+    """
+    Keyed bijection on [0, 2**bits): a Feistel network over the next even bit width,
+    cycle-walked until the result is back in range. Consecutive sequence values
+    come out unrelated, so codes cannot be enumerated from a known one.
+    """
+    half = (bits + 1) // 2
+    mask = (1 << half) - 1
+    while True:
+        left, right = value >> half, value & mask
+        for round_no in range(FEISTEL_ROUNDS):
+            digest = hmac.new(key, f"{bits}:{round_no}:{right}".encode(), hashlib.sha256).digest()
+            left, right = right, left ^ (int.from_bytes(digest[:8], "big") & mask)
+        value = (left << half) | right
+        if value < (1 << bits):
+            return value
+
+
+def encode(value: int, key: bytes) -> str:
+    """Body of the code for sequence `value`: at least MIN_WIDTH characters plus the check character."""
+    width = MIN_WIDTH
+    while value >= BASE ** width:
+        width += 1
+    scrambled = _permute(value, width * BITS_PER_CHAR, key)
+    chars = []
+    for _ in range(width):
+        scrambled, digit = divmod(scrambled, BASE)
+        chars.append(SAFE_ALPHABET[digit])
+    body = "".join(reversed(chars))
+    return body + check_char(body)
+
+
+class CodeGenerator:
+    """
+    Unique codes like TRK-7KQ2MX for one `CodeSequence`.
+
+    Each process reserves a block of `block_size` sequence values in its own short
+    transaction and hands them out from memory, so codes are unique across workers
+    without retries and the database is touched once per block. Values left in a
+    block when the process exits are skipped, never reused.
+    """
+
+    def __init__(self, name: str, prefix: str, block_size: Optional[int] = None, bind: Engine = engine):
+        self.name = name
+        self.prefix = prefix
+        self.block_size = block_size or settings.code_block_size
+        self.bind = bind
+
+        self._next = 0
+        self._end = 0
+        self._key = b""
+        self._lock = threading.Lock()
+
+    def next(self) -> str:
+        return self.next_many(1)[0]
+
+    def next_many(self, count: int) -> List[str]:
+        with self._lock:
+            values = []
+            while len(values) < count:
+                if self._next >= self._end:
+                    self._next, self._end, self._key = self._reserve(max(self.block_size, count - len(values)))
+                take = min(count - len(values), self._end - self._next)
+                values.extend(range(self._next, self._next + take))
+                self._next += take
+            key = self._key
+        return [f"{self.prefix}-{encode(value, key)}" for value in values]
+
+    def _reserve(self, size: int) -> Tuple[int, int, bytes]:
+        """Claim [start, start + size) from the shared counter; committed independently of any request."""
+        with self.bind.begin() as conn:
+            self._ensure_sequence(conn)
+            end, key = conn.execute(
+                update(CodeSequence)
+                .where(CodeSequence.name == self.name)
+                .values(next_value=CodeSequence.next_value + size)
+                .returning(CodeSequence.next_value, CodeSequence.key)
+            ).one()
+        return end - size, end, key.encode()
+
+    def _ensure_sequence(self, conn) -> None:
+        if conn.execute(select(CodeSequence.name).where(CodeSequence.name == self.name)).first():
+            return
+        dialect = conn.dialect.name
+        values = {"name": self.name, "next_value": 0, "key": secrets.token_hex(32)}
+        if dialect == "postgresql":
+            conn.execute(postgresql.insert(CodeSequence).values(**values).on_conflict_do_nothing())
+        elif dialect == "sqlite":
+            conn.execute(sqlite.insert(CodeSequence).values(**values).on_conflict_do_nothing())
+        else:
+            conn.execute(CodeSequence.__table__.insert().values(**values))
+
+
+tracking_numbers = CodeGenerator("tracking", "TRK")
+receipt_numbers = CodeGenerator("receipt", "RCPT")
@@ -0,0 +1,22 @@
+import asyncio
+import logging
+
+from ..core.config import settings
+from ..db import sqlite_maintenance
+
+logger = logging.getLogger(__name__)
+
+
+async def run_maintenance(stop: asyncio.Event) -> None:
+    """Run `sqlite_maintenance` every `sqlite_maintenance_interval_seconds` until `stop` is set."""
+    interval = settings.sqlite_maintenance_interval_seconds
+    while not stop.is_set():
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=interval)
+            break
+        except asyncio.TimeoutError:
+            pass
+        try:
+            await asyncio.to_thread(sqlite_maintenance)
+        except Exception:
+            logger.exception("SQLite maintenance failed")
@@ -0,0 +1,183 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+import zlib
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError
+
+from ..core.config import settings
+from ..db import AsyncSessionLocal
+from ..models import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+HEADER = "idempotency-key"
+MAX_KEY_LENGTH = 128
+MUTATING_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+# How often a retry checks whether a request running in another process has finished
+POLL_SECONDS = 0.2
+PRUNE_EVERY_SECONDS = 600.0
+# Set again for the replayed body rather than stored
+UNSTORED_HEADERS = {"content-length", "date", "server"}
+
+
+def _fingerprint(request: Request, body: bytes) -> str:
+    digest = hashlib.sha256()
+    for part in (request.method.encode(), request.url.path.encode(), request.url.query.encode(), body):
+        digest.update(len(part).to_bytes(8, "big"))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+class IdempotencyKeys:
+    """
+    Makes mutating requests sent with an Idempotency-Key header safe to retry.
+
+    The first request claims the key (a row in idempotency_keys) before its handler
+    runs and stores the response afterwards; a retry with the same key and request
+    gets that response back without the handler running again. A retry arriving
+    while the first request is still running waits for it (an in-process event, or
+    polling the row when the first request is on another worker) instead of
+    executing in parallel. 5xx responses are not kept, so the retry runs again.
+    """
+
+    def __init__(self):
+        self._running: Dict[Tuple[str, str], asyncio.Event] = {}
+        self._pruned_at = 0.0
+
+    async def handle(
+        self, request: Request, call_next: Callable[[Request], Awaitable[Response]], scope: str
+    ) -> Response:
+        key = request.headers.get(HEADER)
+        if request.method not in MUTATING_METHODS or not key:
+            return await call_next(request)
+        if len(key) > MAX_KEY_LENGTH:
+            return JSONResponse({"detail": f"Idempotency-Key is longer than {MAX_KEY_LENGTH} characters"}, status_code=400)
+
+        fingerprint = _fingerprint(request, await request.body())
+        deadline = time.monotonic() + settings.idempotency_wait_seconds
+        while True:
+            record = await self._claim(scope, key, fingerprint)
+            if record is None:
+                break
+            if record.fingerprint != fingerprint:
+                return JSONResponse(
+                    {"detail": "Idempotency-Key was already used for a different request"}, status_code=422
+                )
+            if record.status_code is not None:
+                return self._replay(record)
+            if time.monotonic() >= deadline:
+                return JSONResponse(
+                    {"detail": "A request with this Idempotency-Key is still in progress"}, status_code=409
+                )
+            await self._wait(scope, key, deadline)
+
+        done = self._running[(scope, key)] = asyncio.Event()
+        try:
+            try:
+                response = await call_next(request)
+                content = b"".join([chunk async for chunk in response.body_iterator])
+            except BaseException:
+                await self._release(scope, key)
+                raise
+            if response.status_code >= 500:
+                await self._release(scope, key)
+            else:
+                try:
+                    await self._store(scope, key, response, content)
+                except Exception:
+                    # The handler did run: keep the claim so retries are refused until it lapses
+                    logger.exception("Could not store the response for Idempotency-Key %s", key)
+        finally:
+            done.set()
+            del self._running[(scope, key)]
+
+        replayable = Response(content, status_code=response.status_code)
+        replayable.raw_headers = list(response.raw_headers)
+        return replayable
+
+    async def _claim(self, scope: str, key: str, fingerprint: str) -> Optional[IdempotencyKey]:
+        """Claim the key for this request (None), or return the live record of an earlier request."""
+        while True:
+            now = datetime.utcnow()
+            async with AsyncSessionLocal() as db:
+                db.add(IdempotencyKey(scope=scope, key=key, fingerprint=fingerprint, created_at=now))
+                try:
+                    await db.commit()
+                    return None
+                except IntegrityError:
+                    await db.rollback()
+                record = await db.get(IdempotencyKey, (scope, key))
+                if record is None:
+                    # Released in the meantime; claim again
+                    continue
+                expired = record.created_at < now - timedelta(hours=settings.idempotency_ttl_hours)
+                abandoned = record.status_code is None and record.created_at < now - timedelta(
+                    seconds=settings.idempotency_lock_seconds
+                )
+                if not (expired or abandoned):
+                    return record
+                await db.execute(
+                    delete(IdempotencyKey).where(
+                        IdempotencyKey.scope == scope,
+                        IdempotencyKey.key == key,
+                        IdempotencyKey.created_at == record.created_at,
+                    )
+                )
+                await db.commit()
+
+    async def _wait(self, scope: str, key: str, deadline: float) -> None:
+        running = self._running.get((scope, key))
+        timeout = max(deadline - time.monotonic(), 0)
+        if running is None:
+            await asyncio.sleep(min(POLL_SECONDS, timeout))
+            return
+        try:
+            await asyncio.wait_for(running.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _store(self, scope: str, key: str, response: Response, content: bytes) -> None:
+        headers = [
+            [name.decode("latin-1"), value.decode("latin-1")]
+            for name, value in response.raw_headers
+            if name.decode("latin-1").lower() not in UNSTORED_HEADERS
+        ]
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(IdempotencyKey)
+                .where(IdempotencyKey.scope == scope, IdempotencyKey.key == key)
+                .values(status_code=response.status_code, headers=json.dumps(headers), body=zlib.compress(content))
+            )
+            if time.monotonic() - self._pruned_at > PRUNE_EVERY_SECONDS:
+                self._pruned_at = time.monotonic()
+                cutoff = datetime.utcnow() - timedelta(hours=settings.idempotency_ttl_hours)
+                await db.execute(delete(IdempotencyKey).where(IdempotencyKey.created_at < cutoff))
+            await db.commit()
+
+    async def _release(self, scope: str, key: str) -> None:
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(delete(IdempotencyKey).where(IdempotencyKey.scope == scope, IdempotencyKey.key == key))
+                await db.commit()
+        except Exception:
+            # The claim then lapses after idempotency_lock_seconds
+            logger.exception("Could not release Idempotency-Key %s", key)
+
+    def _replay(self, record: IdempotencyKey) -> Response:
+        response = Response(zlib.decompress(record.body or b""), status_code=record.status_code)
+        response.raw_headers.extend(
+            (name.encode("latin-1"), value.encode("latin-1")) for name, value in json.loads(record.headers or "[]")
+        )
+        response.raw_headers.append((b"idempotent-replayed", b"true"))
+        return response
+
+
+idempotency_keys = IdempotencyKeys()
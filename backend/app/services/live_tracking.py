@@ -0,0 +1,222 @@
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, NamedTuple, Optional, Set
+
+from sqlalchemy import delete, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..db import SessionLocal
+from ..models import Parcel, ParcelEvent, TrackingHistory
+
+logger = logging.getLogger(__name__)
+
+# Events read from the feed per poll
+FETCH_SIZE = 500
+# An id below the highest one seen may still commit (its transaction took the id
+# earlier but finished later); missing ids are looked for this long
+GAP_GRACE_SECONDS = 10.0
+# Larger jumps in the id sequence are not tracked as gaps
+MAX_GAP = 1000
+PRUNE_EVERY_SECONDS = 600.0
+
+
+class LiveEvent(NamedTuple):
+    id: int
+    parcel_id: str
+    kind: str
+    payload: str
+
+
+def record_event(db: Session, parcel: Parcel, kind: str, **details) -> None:
+    """
+    Queue a live tracking event about `parcel` in the caller's transaction; it is
+    pushed to subscribers once the transaction commits. Only calls `db.add`, so an
+    AsyncSession works as well.
+    """
+    payload = {
+        "type": kind,
+        "parcel_id": parcel.id,
+        "tracking_number": parcel.tracking_number,
+        "status": parcel.current_status,
+        "delivery_outcome": parcel.delivery_outcome,
+        "at": datetime.utcnow().isoformat(),
+        **details,
+    }
+    db.add(ParcelEvent(parcel_id=parcel.id, kind=kind, payload=json.dumps(payload, default=str)))
+
+
+def history_details(entry: TrackingHistory) -> dict:
+    """The `history` part of a tracking event; `entry` must be flushed."""
+    return {
+        "history": {
+            "id": entry.id,
+            "status": entry.status,
+            "location": entry.location,
+            "notes": entry.notes,
+            "rider_id": entry.rider_id,
+            "created_at": entry.created_at.isoformat(),
+        }
+    }
+
+
+async def replay(db: AsyncSession, parcel_id: str, after_id: int) -> List[LiveEvent]:
+    """Events of one parcel after `after_id` still in the feed, for clients resuming a stream."""
+    rows = await db.execute(
+        select(ParcelEvent.id, ParcelEvent.parcel_id, ParcelEvent.kind, ParcelEvent.payload)
+        .filter(ParcelEvent.parcel_id == parcel_id, ParcelEvent.id > after_id)
+        .order_by(ParcelEvent.id)
+        .limit(FETCH_SIZE)
+    )
+    return [LiveEvent(*row) for row in rows]
+
+
+class Subscription:
+    """One client's interest in a set of parcels and the queue its events arrive on."""
+
+    def __init__(self, hub: "LiveTrackingHub"):
+        self.hub = hub
+        self.parcel_ids: Set[str] = set()
+        self.queue: "asyncio.Queue[Optional[LiveEvent]]" = asyncio.Queue(maxsize=settings.live_tracking_queue_size)
+        # Set when the client fell behind or the process is stopping; the stream should end
+        self.closed = False
+
+    def add(self, parcel_id: str) -> None:
+        self.parcel_ids.add(parcel_id)
+        self.hub._subscribers.setdefault(parcel_id, set()).add(self)
+
+    def remove(self, parcel_id: str) -> None:
+        self.parcel_ids.discard(parcel_id)
+        subscribers = self.hub._subscribers.get(parcel_id)
+        if subscribers is not None:
+            subscribers.discard(self)
+            if not subscribers:
+                del self.hub._subscribers[parcel_id]
+
+    def close(self) -> None:
+        for parcel_id in list(self.parcel_ids):
+            self.remove(parcel_id)
+        self.closed = True
+
+    def push(self, event: Optional[LiveEvent]) -> None:
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Dropping events silently would leave the client wrong; end the stream
+            # instead and let it resume from its last event id
+            self.closed = True
+
+    async def get(self, timeout: float) -> Optional[LiveEvent]:
+        """Next event, or None after `timeout` seconds or when the subscription is closed."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class LiveTrackingHub:
+    """
+    In-process fan-out of parcel events. `run_feed` tails the parcel_events table
+    (the change feed every worker shares) and hands new rows to the subscriptions
+    of their parcel, so an event committed by any worker reaches clients on all of them.
+    Listeners get every event, e.g. to drop cached state of the parcels written.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self.listeners: List[Callable[[List[LiveEvent]], None]] = []
+        self._last_id: Optional[int] = None
+        self._missing: Dict[int, float] = {}
+        self._pruned_at = time.monotonic()
+
+    def subscribe(self) -> Subscription:
+        return Subscription(self)
+
+    @property
+    def watched_parcels(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, events: List[LiveEvent]) -> None:
+        for listener in self.listeners:
+            listener(events)
+        for event in events:
+            for subscription in list(self._subscribers.get(event.parcel_id, ())):
+                subscription.push(event)
+
+    def close_all(self) -> None:
+        subscriptions = {s for subscribers in self._subscribers.values() for s in subscribers}
+        for subscription in subscriptions:
+            subscription.close()
+            subscription.push(None)
+
+    def poll(self) -> List[LiveEvent]:
+        """Read events committed since the last poll. Blocking; runs in a worker thread."""
+        db = SessionLocal()
+        try:
+            self._maybe_prune(db)
+            if self._last_id is None or not (self._subscribers or self.listeners):
+                # Nobody to deliver to: only keep the position current
+                self._last_id = db.execute(select(func.max(ParcelEvent.id))).scalar() or 0
+                self._missing.clear()
+                return []
+
+            condition = ParcelEvent.id > self._last_id
+            if self._missing:
+                condition = or_(condition, ParcelEvent.id.in_(list(self._missing)))
+            rows = db.execute(
+                select(ParcelEvent.id, ParcelEvent.parcel_id, ParcelEvent.kind, ParcelEvent.payload)
+                .filter(condition)
+                .order_by(ParcelEvent.id)
+                .limit(FETCH_SIZE)
+            ).all()
+        finally:
+            db.close()
+
+        now = time.monotonic()
+        for row in rows:
+            self._missing.pop(row.id, None)
+            if row.id > self._last_id:
+                if row.id - self._last_id <= MAX_GAP:
+                    for gap in range(self._last_id + 1, row.id):
+                        self._missing[gap] = now + GAP_GRACE_SECONDS
+                self._last_id = row.id
+        for gap, deadline in list(self._missing.items()):
+            if deadline < now:
+                del self._missing[gap]
+        return [LiveEvent(*row) for row in rows]
+
+    def _maybe_prune(self, db: Session) -> None:
+        if time.monotonic() - self._pruned_at < PRUNE_EVERY_SECONDS:
+            return
+        self._pruned_at = time.monotonic()
+        cutoff = datetime.utcnow() - timedelta(hours=settings.live_tracking_retention_hours)
+        db.execute(delete(ParcelEvent).where(ParcelEvent.created_at < cutoff))
+        db.commit()
+
+
+hub = LiveTrackingHub()
+
+
+async def run_feed(stop: asyncio.Event) -> None:
+    """Tail the parcel event feed until `stop` is set, then end every open stream."""
+    logger.info("Live tracking feed started")
+    while not stop.is_set():
+        try:
+            events = await asyncio.to_thread(hub.poll)
+            hub.publish(events)
+        except Exception:
+            logger.exception("Live tracking feed iteration failed")
+            events = []
+        if len(events) >= FETCH_SIZE:
+            # More may be waiting; go again without sleeping
+            continue
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=settings.live_tracking_poll_seconds)
+        except asyncio.TimeoutError:
+            pass
+    hub.close_all()
+    logger.info("Live tracking feed stopped")
@@ -1,5 +1,13 @@
 from typing import Optional, List, Dict
-from .sms_service import send_sms as send_sms_service, send_bulk_sms, check_sms_balance
+
+from sqlalchemy.orm import Session
+
+from .sms_service import (
+    send_sms as send_sms_service,
+    send_bulk_sms as send_bulk_sms_service,
+    check_sms_balance as check_sms_balance_service,
+)
+from .sms_outbox import enqueue_sms, enqueue_sms_many
 
 
 def send_sms(phone: str, message: str, reference: Optional[str] = None) -> bool:
@@ -17,6 +25,33 @@ def send_sms(phone: str, message: str, reference: Optional[str] = None) -> bool:
     return send_sms_service(phone, message, reference)
 
 
+def queue_sms(db: Session, phone: str, message: str, reference: Optional[str] = None) -> None:
+    """
+    Queue an SMS for asynchronous delivery in the current transaction.
+    Preferred over `send_sms` inside request handlers: the message is only
+    sent if the surrounding change commits, and the gateway is never awaited.
+    
+    Args:
+        db: Session whose transaction the message joins
+        phone: Phone number (with country code)
+        message: SMS message content
+        reference: Optional reference ID for tracking
+    """
+    enqueue_sms(db, phone, message, reference)
+
+
+def queue_bulk_sms(db: Session, messages: List[Dict[str, str]]) -> None:
+    """
+    Queue many SMS in the current transaction; the outbox worker delivers them
+    through the gateway's bulk API.
+    
+    Args:
+        db: Session whose transaction the messages join
+        messages: List of message dictionaries with 'phone' and 'message' keys
+    """
+    enqueue_sms_many(db, messages)
+
+
 def send_bulk_sms(messages: List[Dict[str, str]]) -> Dict[str, int]:
     """
     Send bulk SMS messages
@@ -27,7 +62,7 @@ def send_bulk_sms(messages: List[Dict[str, str]]) -> Dict[str, int]:
     Returns:
         Dict with success count and failure count
     """
-    result = send_bulk_sms(messages)
+    result = send_bulk_sms_service(messages)
     return {
         "success": result["success"],
         "failed": result["failed"]
@@ -36,7 +71,7 @@ def send_bulk_sms(messages: List[Dict[str, str]]) -> Dict[str, int]:
 
 def check_sms_balance() -> Optional[Dict]:
     """Check SMS account balance"""
-    return check_sms_balance()
+    return check_sms_balance_service()
 
 
 def send_push(user_id: Optional[int], title: str, body: str) -> None:
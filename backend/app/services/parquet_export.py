@@ -0,0 +1,165 @@
+"""
+Incremental columnar export of the operational tables for analytics.
+
+Each table is written to `<parquet_export_dir>/<table>/day=YYYY-MM-DD/data.parquet`,
+partitioned by the date each row was created, readable with `pyarrow.dataset` /
+`pandas.read_parquet` using hive partitioning. A run only reads rows whose
+`updated_at` is at or after the table's watermark (minus an overlap), and merges them
+into the partitions they belong to by id, so partitions always hold the latest
+version of each row. `created_at` never changes, so a row stays in one partition;
+event columns such as `assigned_at` are rewritten on reassignment and would leave
+the old version behind in another day. Deleted rows are only removed by a full run.
+"""
+import json
+import logging
+import os
+import shutil
+from datetime import date, datetime, timedelta
+from enum import Enum
+from typing import Dict, List, Optional
+
+from sqlalchemy import Boolean, Date, DateTime, Float, Integer, select
+
+from ..core.config import settings
+from ..db import open_read_session
+from ..models import Assignment, DeliveryAttempt, Parcel, Payment, TrackingHistory
+
+logger = logging.getLogger(__name__)
+
+TABLES = {
+    "parcels": Parcel,
+    "tracking_history": TrackingHistory,
+    "payments": Payment,
+    "assignments": Assignment,
+    "delivery_attempts": DeliveryAttempt,
+}
+
+WATERMARKS_FILE = "_watermarks.json"
+
+
+def _arrow():
+    try:
+        import pyarrow
+        import pyarrow.compute
+        import pyarrow.parquet
+    except ImportError as e:
+        raise RuntimeError("Parquet export needs pyarrow: pip install pyarrow") from e
+    return pyarrow
+
+
+def _arrow_schema(pa, table):
+    """Arrow types from the column types, so every file of a table has the same schema."""
+    fields = []
+    for col in table.columns:
+        if isinstance(col.type, DateTime):
+            arrow_type = pa.timestamp("us")
+        elif isinstance(col.type, Date):
+            arrow_type = pa.date32()
+        elif isinstance(col.type, Boolean):
+            arrow_type = pa.bool_()
+        elif isinstance(col.type, Integer):
+            arrow_type = pa.int64()
+        elif isinstance(col.type, Float):
+            arrow_type = pa.float64()
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(col.name, arrow_type, nullable=col.nullable or col.primary_key))
+    return pa.schema(fields)
+
+
+def _load_watermarks(out_dir: str) -> Dict[str, str]:
+    path = os.path.join(out_dir, WATERMARKS_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _save_watermarks(out_dir: str, watermarks: Dict[str, str]) -> None:
+    path = os.path.join(out_dir, WATERMARKS_FILE)
+    with open(path + ".tmp", "w") as f:
+        json.dump(watermarks, f, indent=2, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+
+def _write_partition(pa, schema, table_dir: str, day: date, rows: List[dict]) -> None:
+    """Merge `rows` into the day's partition: new versions replace old ones with the same id."""
+    part_dir = os.path.join(table_dir, f"day={day.isoformat()}")
+    os.makedirs(part_dir, exist_ok=True)
+    path = os.path.join(part_dir, "data.parquet")
+
+    new = pa.Table.from_pylist(rows, schema=schema)
+    if os.path.exists(path):
+        old = pa.parquet.read_table(path, schema=schema)
+        keep = pa.compute.invert(pa.compute.is_in(old["id"], value_set=new["id"]))
+        new = pa.concat_tables([old.filter(keep), new])
+    pa.parquet.write_table(new, path + ".tmp", compression="zstd")
+    os.replace(path + ".tmp", path)
+
+
+def _value(value):
+    return value.value if isinstance(value, Enum) else value
+
+
+def export_table(name: str, out_dir: str, since: Optional[datetime]) -> Optional[datetime]:
+    """
+    Export rows of `name` updated at or after `since` (all rows when None).
+    Returns the largest `updated_at` exported, or None when nothing changed.
+    """
+    pa = _arrow()
+    table = TABLES[name].__table__
+    day_column = table.c.created_at
+    schema = _arrow_schema(pa, table)
+    table_dir = os.path.join(out_dir, name)
+
+    query = select(*table.columns)
+    if since is not None:
+        query = query.filter(table.c.updated_at >= since)
+    # Partition by partition, so only one day's rows are held in memory at a time
+    query = query.order_by(day_column).execution_options(yield_per=settings.parquet_export_batch_rows)
+
+    db = open_read_session()
+    try:
+        columns = [col.name for col in table.columns]
+        day_index = columns.index(day_column.name)
+        current_day, rows, exported, high = None, [], 0, None
+        for row in db.execute(query):
+            day = row[day_index].date()
+            if day != current_day and rows:
+                _write_partition(pa, schema, table_dir, current_day, rows)
+                rows = []
+            current_day = day
+            record = {col: _value(v) for col, v in zip(columns, row)}
+            rows.append(record)
+            exported += 1
+            if high is None or record["updated_at"] > high:
+                high = record["updated_at"]
+        if rows:
+            _write_partition(pa, schema, table_dir, current_day, rows)
+    finally:
+        db.close()
+
+    logger.info("Parquet export: %s rows of %s", exported, name)
+    return high
+
+
+def export_all(out_dir: Optional[str] = None, full: bool = False) -> Dict[str, str]:
+    """
+    Bring the Parquet export up to date for every table; `full` ignores the
+    watermarks and rebuilds every table's partitions from scratch. Returns the
+    watermark per table.
+    """
+    out_dir = out_dir or settings.parquet_export_dir
+    os.makedirs(out_dir, exist_ok=True)
+    watermarks = {} if full else _load_watermarks(out_dir)
+    overlap = timedelta(seconds=settings.parquet_export_overlap_seconds)
+
+    for name in TABLES:
+        if full:
+            shutil.rmtree(os.path.join(out_dir, name), ignore_errors=True)
+        mark = datetime.fromisoformat(watermarks[name]) if name in watermarks else None
+        high = export_table(name, out_dir, mark - overlap if mark else None)
+        if high is not None and (mark is None or high > mark):
+            watermarks[name] = high.isoformat()
+            _save_watermarks(out_dir, watermarks)
+    return watermarks
@@ -0,0 +1,163 @@
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import case, func, insert, select, delete
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from ..models import DailyParcelStat, DailyPaymentStat, DeliveryOutcome, Parcel, ParcelStatus, Payment
+
+
+@dataclass(frozen=True)
+class ParcelContribution:
+    """What a single parcel adds to its `daily_parcel_stats` row."""
+    day: date
+    status: ParcelStatus
+    outcome: DeliveryOutcome
+    received_by_id: str
+    dispatched: bool
+    delivered: bool
+    value_amount: float
+    amount_paid_amount: float
+
+
+def snapshot(parcel: Parcel) -> Optional[ParcelContribution]:
+    """
+    Capture a parcel's current rollup contribution. Call before mutating the parcel,
+    then pass the result to `move_parcel` once the changes have been applied.
+    Returns None for a parcel that has not been flushed yet.
+    """
+    if parcel.created_at is None:
+        return None
+    return ParcelContribution(
+        day=parcel.created_at.date(),
+        status=parcel.current_status,
+        outcome=parcel.delivery_outcome,
+        received_by_id=parcel.received_by_id,
+        dispatched=bool(parcel.dispatched),
+        delivered=bool(parcel.delivered),
+        value_amount=parcel.value_amount or 0.0,
+        amount_paid_amount=parcel.amount_paid_amount or 0.0,
+    )
+
+
+def _upsert_increment(db: Session, model, key: dict, deltas: dict) -> None:
+    """Atomically add `deltas` to the row identified by `key`, creating it if missing."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        stmt = postgresql.insert(model)
+    elif dialect == "sqlite":
+        stmt = sqlite.insert(model)
+    else:
+        # Generic fallback: read-modify-write under the current transaction
+        row = db.get(model, tuple(key.values()))
+        if row is None:
+            db.add(model(**key, **deltas))
+        else:
+            for col, delta in deltas.items():
+                setattr(row, col, getattr(row, col) + delta)
+        db.flush()
+        return
+
+    stmt = stmt.values(**key, **deltas).on_conflict_do_update(
+        index_elements=list(key),
+        set_={col: getattr(model, col) + getattr(stmt.excluded, col) for col in deltas},
+    )
+    db.execute(stmt)
+
+
+def _deltas(c: ParcelContribution, sign: int) -> dict:
+    return {
+        "parcels": sign,
+        "dispatched": sign * int(c.dispatched),
+        "delivered": sign * int(c.delivered),
+        "value_amount": sign * c.value_amount,
+        "amount_paid_amount": sign * c.amount_paid_amount,
+    }
+
+
+def _apply(db: Session, c: ParcelContribution, sign: int) -> None:
+    _upsert_increment(
+        db,
+        DailyParcelStat,
+        {"day": c.day, "status": c.status, "outcome": c.outcome, "received_by_id": c.received_by_id},
+        _deltas(c, sign),
+    )
+
+
+def add_parcel(db: Session, parcel: Parcel) -> None:
+    """Count a newly created parcel. The parcel must already be flushed."""
+    _apply(db, snapshot(parcel), 1)
+
+
+def add_parcels(db: Session, contributions: Iterable[ParcelContribution]) -> None:
+    """Count a batch of new parcels with one upsert per distinct rollup row."""
+    totals: Dict[tuple, dict] = {}
+    for c in contributions:
+        key = (c.day, c.status, c.outcome, c.received_by_id)
+        deltas = _deltas(c, 1)
+        if key in totals:
+            deltas = {col: totals[key][col] + delta for col, delta in deltas.items()}
+        totals[key] = deltas
+    for (day, status, outcome, received_by_id), deltas in totals.items():
+        _upsert_increment(
+            db,
+            DailyParcelStat,
+            {"day": day, "status": status, "outcome": outcome, "received_by_id": received_by_id},
+            deltas,
+        )
+
+
+def move_parcel(db: Session, before: Optional[ParcelContribution], parcel: Parcel) -> None:
+    """Move a parcel's contribution from its `before` snapshot to its current state."""
+    after = snapshot(parcel)
+    if before == after:
+        return
+    if before is not None:
+        _apply(db, before, -1)
+    _apply(db, after, 1)
+
+
+def add_payment(db: Session, payment: Payment) -> None:
+    """Count a newly recorded payment. The payment must already be flushed."""
+    _upsert_increment(
+        db,
+        DailyPaymentStat,
+        {"day": payment.paid_at.date(), "method": payment.method, "currency": payment.currency},
+        {"payments": 1, "amount": payment.amount},
+    )
+
+
+def rebuild(db: Session) -> None:
+    """Recompute both rollup tables from the source tables (backfill / repair)."""
+    day = func.date(Parcel.created_at)
+    db.execute(delete(DailyParcelStat))
+    db.execute(
+        insert(DailyParcelStat).from_select(
+            ["day", "status", "outcome", "received_by_id",
+             "parcels", "dispatched", "delivered", "value_amount", "amount_paid_amount"],
+            select(
+                day,
+                Parcel.current_status,
+                Parcel.delivery_outcome,
+                Parcel.received_by_id,
+                func.count(),
+                func.sum(case((Parcel.dispatched == True, 1), else_=0)),
+                func.sum(case((Parcel.delivered == True, 1), else_=0)),
+                func.sum(Parcel.value_amount),
+                func.sum(Parcel.amount_paid_amount),
+            ).group_by(day, Parcel.current_status, Parcel.delivery_outcome, Parcel.received_by_id),
+        )
+    )
+
+    paid_day = func.date(Payment.paid_at)
+    db.execute(delete(DailyPaymentStat))
+    db.execute(
+        insert(DailyPaymentStat).from_select(
+            ["day", "method", "currency", "payments", "amount"],
+            select(paid_day, Payment.method, Payment.currency, func.count(), func.sum(Payment.amount))
+            .group_by(paid_day, Payment.method, Payment.currency),
+        )
+    )
+    db.commit()
@@ -0,0 +1,148 @@
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..db import SessionLocal
+from ..models import SmsOutbox, SmsStatus
+from ..utils.resilience import CircuitBreaker
+from .sms_service import sms_service
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_sms(db: Session, phone: str, message: str, reference: Optional[str] = None) -> SmsOutbox:
+    """
+    Queue an SMS in the caller's transaction. Nothing is sent until the
+    transaction commits and the outbox worker picks the row up. Only calls
+    `db.add`, so an AsyncSession works as well.
+    """
+    row = SmsOutbox(phone=phone, message=message, reference=reference)
+    db.add(row)
+    return row
+
+
+def enqueue_sms_many(db: Session, messages: List[Dict[str, str]]) -> None:
+    """
+    Queue many SMS (dicts with 'phone', 'message' and optional 'reference') in the
+    caller's transaction; they are flushed as one batched insert.
+    """
+    db.add_all(
+        SmsOutbox(phone=m["phone"], message=m["message"], reference=m.get("reference")) for m in messages
+    )
+
+
+def _claim_batch(db: Session, worker_id: str, limit: int) -> list[SmsOutbox]:
+    """
+    Mark up to `limit` due rows as SENDING for this worker. The conditional UPDATE
+    makes the claim safe when several processes drain the same outbox; rows left in
+    SENDING by a crashed worker become claimable again after the claim timeout.
+    """
+    now = datetime.utcnow()
+    stale = now - timedelta(seconds=settings.sms_outbox_claim_timeout_seconds)
+    due = or_(
+        and_(SmsOutbox.status == SmsStatus.PENDING, SmsOutbox.next_attempt_at <= now),
+        and_(SmsOutbox.status == SmsStatus.SENDING, SmsOutbox.claimed_at < stale),
+    )
+    ids = [
+        row_id for (row_id,) in db.query(SmsOutbox.id)
+        .filter(due)
+        .order_by(SmsOutbox.next_attempt_at)
+        .limit(limit)
+        .all()
+    ]
+    if not ids:
+        return []
+
+    db.query(SmsOutbox).filter(SmsOutbox.id.in_(ids), due).update(
+        {"status": SmsStatus.SENDING, "claimed_by": worker_id, "claimed_at": now},
+        synchronize_session=False,
+    )
+    db.commit()
+    return (
+        db.query(SmsOutbox)
+        .filter(SmsOutbox.claimed_by == worker_id, SmsOutbox.status == SmsStatus.SENDING)
+        .order_by(SmsOutbox.next_attempt_at)
+        .all()
+    )
+
+
+def _mark_failed(row: SmsOutbox, error: str, now: datetime) -> None:
+    row.attempts += 1
+    row.last_error = error
+    row.claimed_by = None
+    if row.attempts >= settings.sms_outbox_max_attempts:
+        row.status = SmsStatus.FAILED
+        logger.error("SMS %s to %s gave up after %d attempts", row.id, row.phone, row.attempts)
+        return
+    # Exponential backoff: base, 2x base, 4x base, ...
+    row.status = SmsStatus.PENDING
+    row.next_attempt_at = now + timedelta(seconds=settings.sms_outbox_retry_base_seconds * 2 ** (row.attempts - 1))
+
+
+def drain_once(worker_id: Optional[str] = None, batch_size: Optional[int] = None) -> int:
+    """
+    Claim one batch of due messages, send it through the gateway's bulk API (chunked
+    to the provider limit when the batch is larger) and record the per-message outcome. Returns the number of rows processed.
+    """
+    if sms_service.breaker.state == CircuitBreaker.OPEN:
+        # Leave rows pending instead of burning their attempts while the gateway is down
+        return 0
+
+    worker_id = worker_id or uuid.uuid4().hex
+    db = SessionLocal()
+    try:
+        rows = _claim_batch(db, worker_id, batch_size or settings.sms_outbox_batch_size)
+        if not rows:
+            return 0
+
+        try:
+            result = sms_service.send_bulk_sms(
+                [{"phone": r.phone, "message": r.message, "reference": r.reference} for r in rows]
+            )
+            failed = set(result.get("failed_indices", []))
+            error = "Gateway rejected message"
+        except Exception as e:
+            logger.exception("Outbox batch send failed")
+            failed = set(range(len(rows)))
+            error = str(e)
+
+        now = datetime.utcnow()
+        for i, row in enumerate(rows):
+            if i in failed:
+                _mark_failed(row, error, now)
+            else:
+                row.status = SmsStatus.SENT
+                row.attempts += 1
+                row.sent_at = now
+                row.claimed_by = None
+                row.last_error = None
+        db.commit()
+        return len(rows)
+    finally:
+        db.close()
+
+
+async def run_worker(stop: asyncio.Event) -> None:
+    """Drain the outbox until `stop` is set. Blocking gateway I/O runs in a thread."""
+    worker_id = uuid.uuid4().hex
+    logger.info("SMS outbox worker %s started", worker_id)
+    while not stop.is_set():
+        try:
+            processed = await asyncio.to_thread(drain_once, worker_id)
+        except Exception:
+            logger.exception("SMS outbox worker iteration failed")
+            processed = 0
+        if processed:
+            # More may be waiting; go again without sleeping
+            continue
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=settings.sms_outbox_poll_seconds)
+        except asyncio.TimeoutError:
+            pass
+    logger.info("SMS outbox worker %s stopped", worker_id)
@@ -1,22 +1,47 @@
+import asyncio
 import json
 import logging
+import threading
+import time
 import uuid
-from typing import Dict, List, Optional, Union
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple, Union
+
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
 from requests.exceptions import RequestException
 
 from ..core.config import settings
+from ..utils.resilience import CircuitBreaker, TokenBucket
 
 logger = logging.getLogger(__name__)
 # Optionally configure logger in your app's startup if not already configured:
 # logging.basicConfig(level=logging.DEBUG)
 
+OK_STATUSES = (True, "true", "success", "ok", "OK", "SUCCESS")
+OK_RESULT_STATUSES = (True, "true", "success", "ok", 200)
+
 
 class BlkSMSService:
     """
     SMS service client for FastHub / BulkSMS provider.
+
+    Every public call has a blocking variant (for worker threads and scripts) and an
+    `*_async` variant (for `async def` routes) that shares one pooled keep-alive
+    httpx client and caps in-flight gateway requests with a semaphore.
+
+    Bulk sends of any size are split into provider-sized chunks that are sent
+    concurrently; results are reported against the caller's original list.
+
+    Every gateway request passes a circuit breaker (fail fast while the gateway
+    is erroring) and a per-sender-id token bucket (provider throughput limit).
     """
 
+    # FastHub accepts at most 50 messages per request; larger lists are chunked.
+    MAX_BATCH = 50
+    BALANCE_ENDPOINTS = ["/api/account/balance", "/api/sms/balance", "/api/balance"]
+
     def __init__(self):
         base = (settings.blksms_base_url or "").strip()
         # remove trailing slash if present for consistent concatenation
@@ -26,6 +51,16 @@ class BlkSMSService:
         self.client_secret = settings.blksms_client_secret
         self.sender_id = settings.blksms_sender_id  # must be approved on provider
         self.enabled = bool(settings.blksms_enabled)
+        self.timeout = settings.blksms_timeout_seconds
+
+        # Connection pools, created lazily
+        self._session: Optional[requests.Session] = None
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._async_semaphore: Optional[asyncio.Semaphore] = None
+
+        self.breaker = CircuitBreaker(settings.blksms_breaker_failure_threshold, settings.blksms_breaker_reset_seconds)
+        self._rate_limiters: Dict[str, TokenBucket] = {}
+        self._rate_limiters_lock = threading.Lock()
 
         if not self.enabled:
             logger.warning("BlkSMS service is DISABLED by configuration.")
@@ -80,104 +115,238 @@ class BlkSMSService:
             "clientSecret": self.client_secret,
         }
 
-    
+    def _get_session(self) -> requests.Session:
+        if self._session is None:
+            session = requests.Session()
+            # Bulk chunks are sent from several threads; size the pool to match
+            adapter = HTTPAdapter(pool_maxsize=settings.blksms_max_connections)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            self._session = session
+        return self._session
+
+    def _get_async_client(self) -> httpx.AsyncClient:
+        if self._async_client is None or self._async_client.is_closed:
+            self._async_client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=settings.blksms_max_connections,
+                    max_keepalive_connections=settings.blksms_max_connections,
+                ),
+            )
+        return self._async_client
+
+    def _get_async_semaphore(self) -> asyncio.Semaphore:
+        if self._async_semaphore is None:
+            self._async_semaphore = asyncio.Semaphore(settings.blksms_max_concurrency)
+        return self._async_semaphore
+
+    async def aclose(self) -> None:
+        """Close the async connection pool (call on application shutdown)."""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+        self._async_client = None
+        self._async_semaphore = None
+
+    def _can_request(self, endpoint: str) -> bool:
+        if not self.enabled:
+            logger.warning("SMS service disabled; skipping request to %s", endpoint)
+            return False
+
+        if not self.client_id or not self.client_secret:
+            logger.error("BlkSMS credentials not configured.")
+            return False
+        return True
+
+    def _rate_limiter(self, sender_id: str) -> Optional[TokenBucket]:
+        if settings.blksms_rate_limit_per_second <= 0:
+            return None
+        with self._rate_limiters_lock:
+            bucket = self._rate_limiters.get(sender_id)
+            if bucket is None:
+                bucket = TokenBucket(settings.blksms_rate_limit_per_second, settings.blksms_rate_limit_burst)
+                self._rate_limiters[sender_id] = bucket
+            return bucket
+
+    def _admit(self, endpoint: str, payload: Dict) -> Optional[float]:
+        """
+        Pass the breaker and the rate limiter. Returns the seconds to wait before
+        sending, or None if the request must not be sent at all.
+        """
+        if not self.breaker.allow():
+            logger.warning("BlkSMS circuit open; failing fast for %s", endpoint)
+            return None
+
+        messages = payload.get("messages") or []
+        sender_id = messages[0].get("source") if messages else self.sender_id
+        bucket = self._rate_limiter(sender_id or "")
+        if bucket is None:
+            return 0.0
+        wait = bucket.reserve(max(1, len(messages)), max_wait=settings.blksms_rate_limit_max_wait_seconds)
+        if wait is None:
+            self.breaker.cancel()
+            logger.warning("BlkSMS rate limit for sender %s exceeded; dropping request to %s", sender_id, endpoint)
+        return wait
+
+    def _record_error(self, status_code: Optional[int]) -> None:
+        # Only an unreachable or overloaded gateway counts against the breaker;
+        # other 4xx responses mean the gateway is up and rejected the request.
+        if status_code is None or status_code >= 500 or status_code == 429:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+    def metrics(self) -> Dict:
+        """Circuit breaker state and per-sender rate limiter counters."""
+        with self._rate_limiters_lock:
+            limiters = dict(self._rate_limiters)
+        return {
+            "circuit_breaker": self.breaker.snapshot(),
+            "rate_limit_enabled": settings.blksms_rate_limit_per_second > 0,
+            "rate_limiters": {sender: bucket.snapshot() for sender, bucket in limiters.items()},
+        }
+
+    def _log_request(self, method: str, url: str, payload: Dict) -> None:
+        logger.info("➡️ HTTP %s -> %s", method.upper(), url)
+        logger.debug("Request headers:\n%s", json.dumps(self._headers(), indent=2))
+        logger.debug("Request payload:\n%s", json.dumps(payload, indent=2, ensure_ascii=False))
+
+    @staticmethod
+    def _parse_response(resp, url: str) -> Optional[Dict]:
+        """Log and decode a requests/httpx response (both expose the same attributes)."""
+        logger.info("⬅️ API Response Status: %s", resp.status_code)
+        try:
+            logger.debug("Response Headers:\n%s", json.dumps(dict(resp.headers), indent=2))
+        except Exception:
+            logger.debug("Response Headers (raw): %s", resp.headers)
+
+        logger.debug("Response Body:\n%s", resp.text)
+
+        resp.raise_for_status()
+
+        try:
+            parsed = resp.json()
+            logger.debug("Parsed JSON:\n%s", json.dumps(parsed, indent=2, ensure_ascii=False))
+            return parsed
+        except ValueError:
+            logger.error("Failed to parse JSON from response at %s", url)
+            return None
+
+    @staticmethod
+    def _log_error_response(resp) -> None:
+        if resp is None:
+            return
+        try:
+            logger.error("Error response status: %s", resp.status_code)
+            logger.error("Error response headers: %s", dict(resp.headers))
+            logger.error("Error response text: %s", resp.text)
+        except Exception:
+            logger.exception("Failed to log response details")
 
     def _make_request(self, endpoint: str, payload: Dict, method: str = "POST") -> Optional[Dict]:
         """
         Make HTTP request with error handling.
         Logs request + response in full detail.
         """
-        if not self.enabled:
-            logger.warning("SMS service disabled; skipping request to %s", endpoint)
+        if not self._can_request(endpoint):
             return None
 
-        if not self.client_id or not self.client_secret:
-            logger.error("BlkSMS credentials not configured.")
+        wait = self._admit(endpoint, payload)
+        if wait is None:
             return None
 
         url = f"{self.base_url}{endpoint}"
         try:
-            logger.info("➡️ HTTP %s -> %s", method.upper(), url)
-            logger.debug("Request headers:\n%s", json.dumps(self._headers(), indent=2))
-            logger.debug("Request payload:\n%s", json.dumps(payload, indent=2, ensure_ascii=False))
+            if wait:
+                time.sleep(wait)
+            self._log_request(method, url, payload)
 
+            session = self._get_session()
             if method.upper() == "POST":
-                resp = requests.post(url, json=payload, headers=self._headers(), timeout=30)
+                resp = session.post(url, json=payload, headers=self._headers(), timeout=self.timeout)
             else:
-                resp = requests.get(url, params=payload, headers=self._headers(), timeout=30)
-
-            logger.info("⬅️ API Response Status: %s", resp.status_code)
-            try:
-                logger.debug("Response Headers:\n%s", json.dumps(dict(resp.headers), indent=2))
-            except Exception:
-                logger.debug("Response Headers (raw): %s", resp.headers)
-
-            logger.debug("Response Body:\n%s", resp.text)
+                resp = session.get(url, params=payload, headers=self._headers(), timeout=self.timeout)
 
-            resp.raise_for_status()
-
-            try:
-                parsed = resp.json()
-                logger.debug("Parsed JSON:\n%s", json.dumps(parsed, indent=2, ensure_ascii=False))
-                return parsed
-            except json.JSONDecodeError:
-                logger.error("Failed to parse JSON from response at %s", url)
-                return None
+            parsed = self._parse_response(resp, url)
+            self.breaker.record_success()
+            return parsed
 
         except RequestException as e:
             logger.error("HTTP request failed for %s: %s", endpoint, str(e))
             resp = getattr(e, "response", None)
-            if resp is not None:
-                try:
-                    logger.error("Error response status: %s", resp.status_code)
-                    logger.error("Error response headers: %s", dict(resp.headers))
-                    logger.error("Error response text: %s", resp.text)
-                except Exception:
-                    logger.exception("Failed to log response details")
+            self._record_error(resp.status_code if resp is not None else None)
+            self._log_error_response(resp)
             return None
         except Exception as e:
             logger.exception("Unexpected error in _make_request for %s: %s", endpoint, str(e))
+            self.breaker.record_failure()
             return None
+        except BaseException:
+            # Interrupted before an outcome: give back the permit (it may be the half-open probe)
+            self.breaker.cancel()
+            raise
 
-
-    # ---------------- Public API ----------------
-
-    def send_single_sms(self, phone: str, message: str, reference: Optional[str] = None) -> bool:
+    async def _make_request_async(self, endpoint: str, payload: Dict, method: str = "POST") -> Optional[Dict]:
         """
-        Send a single SMS message.
-        Returns True on success, False otherwise.
+        Non-blocking counterpart of `_make_request` on the pooled httpx client.
+        At most `blksms_max_concurrency` requests are in flight per process.
         """
-        if not self.enabled:
-            logger.info("[SMS DISABLED] Would send to %s: %s", phone, message)
-            return False
+        if not self._can_request(endpoint):
+            return None
 
-        ref = self._ensure_reference(reference)
-        msisdn = self._to_e164(phone)
+        wait = self._admit(endpoint, payload)
+        if wait is None:
+            return None
 
-        if not msisdn:
-            logger.error("Invalid phone number provided: %s", phone)
-            return False
+        url = f"{self.base_url}{endpoint}"
+        try:
+            if wait:
+                await asyncio.sleep(wait)
+            self._log_request(method, url, payload)
+
+            client = self._get_async_client()
+            async with self._get_async_semaphore():
+                if method.upper() == "POST":
+                    resp = await client.post(url, json=payload, headers=self._headers())
+                else:
+                    resp = await client.get(url, params=payload, headers=self._headers())
+
+            parsed = self._parse_response(resp, url)
+            self.breaker.record_success()
+            return parsed
+
+        except httpx.HTTPError as e:
+            logger.error("HTTP request failed for %s: %s", endpoint, str(e))
+            resp = e.response if isinstance(e, httpx.HTTPStatusError) else None
+            self._record_error(resp.status_code if resp is not None else None)
+            self._log_error_response(resp)
+            return None
+        except Exception as e:
+            logger.exception("Unexpected error in _make_request_async for %s: %s", endpoint, str(e))
+            self.breaker.record_failure()
+            return None
+        except BaseException:
+            # Cancelled (e.g. the outbox worker stopping) before an outcome: give back the permit
+            self.breaker.cancel()
+            raise
 
-        payload = {
-            "auth": self._auth_body(),
-            "messages": [
-                {
-                    "text": message,
-                    "msisdn": msisdn,
-                    "source": self.sender_id,
-                    "reference": ref,
-                    "coding": "GSM7"
-                }
-            ]
-        }
+    # ---------------- Payloads / response interpretation ----------------
 
-        res = self._make_request("/api/sms/send", payload, method="POST")
+    def _message(self, msisdn: str, text: str, reference: str) -> Dict[str, str]:
+        return {
+            "text": text,
+            "msisdn": msisdn,
+            "source": self.sender_id,
+            "reference": reference,
+            "coding": "GSM7"
+        }
 
+    @staticmethod
+    def _interpret_single(res: Optional[Dict], msisdn: str, ref: str) -> bool:
         # Interpret gateway response - providers vary
         if isinstance(res, dict):
             # provider returns {"status": false/true, ...}
-            status = res.get("status")
-            if status in (True, "true", "success", "ok", "OK", "SUCCESS"):
+            if res.get("status") in OK_STATUSES:
                 logger.info("SMS sent successfully to %s (reference=%s)", msisdn, ref)
                 return True
 
@@ -186,7 +355,7 @@ class BlkSMSService:
             if isinstance(results, list):
                 # treat success if any item indicates success
                 for r in results:
-                    if isinstance(r, dict) and r.get("status") in (True, "true", "success", "ok", 200):
+                    if isinstance(r, dict) and r.get("status") in OK_RESULT_STATUSES:
                         logger.info("SMS partial success to %s (reference=%s) result=%s", msisdn, ref, r)
                         return True
 
@@ -194,68 +363,202 @@ class BlkSMSService:
         logger.error("Failed to send SMS to %s. Gateway response: %s", msisdn, res)
         return False
 
-    def send_bulk_sms(self, messages: List[Dict[str, str]]) -> Dict[str, Union[int, List[int]]]:
+    def _prepare_bulk(self, messages: List[Dict[str, str]]) -> Tuple[List[Dict[str, str]], List[int], List[int]]:
         """
-        Send bulk SMS messages.
-        messages: list of {"phone": "...", "message": "..."}
-        Returns: {"success": n, "failed": m, "failed_indices": [i, ...]}
+        Build gateway messages for a bulk request.
+        Returns (payload messages, their original indices, indices of invalid messages).
         """
-        if not self.enabled:
-            logger.info("[BULK SMS DISABLED] -> %d messages", len(messages))
-            return {"success": 0, "failed": len(messages), "failed_indices": list(range(len(messages)))}
-
-        # FastHub limit example: 50 per request. If larger, truncate and warn.
-        max_batch = 50
-        if len(messages) > max_batch:
-            logger.warning("Bulk request length %d exceeds %d; truncating to first %d", len(messages), max_batch, max_batch)
-            messages = messages[:max_batch]
-
-        sms_messages = []
-        for msg in messages:
-            msg_phone = msg.get("phone")
-            msg_text = msg.get("message", "")
-            ref = self._ensure_reference(msg.get("reference"))
-            msisdn = self._to_e164(msg_phone)
+        payload_messages, valid_indices, failed_indices = [], [], []
+        for i, msg in enumerate(messages):
+            msisdn = self._to_e164(msg.get("phone"))
             if not msisdn:
-                # append an invalid placeholder; we'll count it as failure
-                sms_messages.append({"invalid": True, "original": msg})
+                # counted as failure without being sent
+                failed_indices.append(i)
                 continue
+            ref = self._ensure_reference(msg.get("reference"))
+            payload_messages.append(self._message(msisdn, msg.get("message", ""), ref))
+            valid_indices.append(i)
+        return payload_messages, valid_indices, failed_indices
 
-            sms_messages.append({
-                "text": msg_text,
-                "msisdn": msisdn,
-                "source": self.sender_id,
-                "reference": ref,
-                "coding": "GSM7"
-            })
-
-        # Remove invalid placeholders for payload and track indices
-        valid_payload_messages = [m for m in sms_messages if "invalid" not in m]
-        failed_indices = [i for i, m in enumerate(sms_messages) if "invalid" in m]
-        payload = {
-            "auth": self._auth_body(),
-            "messages": valid_payload_messages
+    @staticmethod
+    def _interpret_bulk(res: Optional[Dict], total: int, valid_indices: List[int], failed_indices: List[int]) -> Dict[str, Union[int, List[int]]]:
+        """Interpret the gateway response for one request; indices are relative to that request."""
+        failed_indices = list(failed_indices)
+        success_count = 0
+        if isinstance(res, dict) and res.get("status") in OK_STATUSES:
+            # assume all valid payload messages succeeded
+            success_count = len(valid_indices)
+        else:
+            # try to parse per-message results; without them every valid message counts as failed
+            results = (res.get("results") or res.get("data")) if isinstance(res, dict) else None
+            if isinstance(results, list) and len(results) == len(valid_indices):
+                for i, r in enumerate(results):
+                    if isinstance(r, dict) and r.get("status") in OK_RESULT_STATUSES:
+                        success_count += 1
+                    else:
+                        failed_indices.append(valid_indices[i])
+            else:
+                failed_indices.extend(valid_indices)
+
+        return {"success": success_count, "failed": total - success_count, "failed_indices": sorted(failed_indices)}
+
+    @staticmethod
+    def _interpret_balance(res: Optional[Dict]) -> Optional[Dict[str, Union[str, float, int]]]:
+        if not isinstance(res, dict):
+            return None
+        # common shapes
+        if res.get("status") in OK_STATUSES:
+            # direct balance
+            if "balance" in res:
+                return {"status": "success", "balance": res.get("balance")}
+            # nested data
+            data = res.get("data")
+            if isinstance(data, dict) and "balance" in data:
+                out = {"status": "success", "balance": data.get("balance")}
+                if data.get("currency"):
+                    out["currency"] = data.get("currency")
+                return out
+        return None
+
+    def _chunk_bulk(self, messages: List[Dict[str, str]]) -> List[Tuple[int, List[Dict[str, str]]]]:
+        """Split messages into (offset, chunk) pairs no larger than the provider limit."""
+        size = max(1, min(settings.blksms_bulk_chunk_size, self.MAX_BATCH))
+        return [(start, messages[start:start + size]) for start in range(0, len(messages), size)]
+
+    def _bulk_chunk_request(self, messages: List[Dict[str, str]]) -> Tuple[Optional[Dict], List[Optional[str]], List[int], List[int]]:
+        """
+        Prepare one chunk. Returns (request payload or None if nothing is sendable,
+        per-message references, valid indices, invalid indices).
+        """
+        payload_messages, valid_indices, failed_indices = self._prepare_bulk(messages)
+        references: List[Optional[str]] = [None] * len(messages)
+        for msg, i in zip(payload_messages, valid_indices):
+            references[i] = msg["reference"]
+        payload = {"auth": self._auth_body(), "messages": payload_messages} if payload_messages else None
+        return payload, references, valid_indices, failed_indices
+
+    @staticmethod
+    def _chunk_result(res: Optional[Dict], references: List[Optional[str]], valid_indices: List[int], failed_indices: List[int]) -> Dict:
+        result = BlkSMSService._interpret_bulk(res, len(references), valid_indices, failed_indices)
+        result["references"] = references
+        return result
+
+    @staticmethod
+    def _merge_bulk(total: int, parts: List[Tuple[int, Dict]]) -> Dict:
+        """Combine per-chunk results, shifting chunk-relative indices by each chunk's offset."""
+        success_count = 0
+        failed_indices: List[int] = []
+        results: List[Dict] = []
+        for offset, part in parts:
+            success_count += part["success"]
+            chunk_failed = set(part["failed_indices"])
+            failed_indices.extend(offset + i for i in part["failed_indices"])
+            results.extend(
+                {"index": offset + i, "reference": ref, "success": i not in chunk_failed}
+                for i, ref in enumerate(part["references"])
+            )
+        return {
+            "success": success_count,
+            "failed": total - success_count,
+            "failed_indices": sorted(failed_indices),
+            "chunks": len(parts),
+            "results": results,
+        }
+
+    @staticmethod
+    def _disabled_bulk(total: int) -> Dict:
+        return {
+            "success": 0,
+            "failed": total,
+            "failed_indices": list(range(total)),
+            "chunks": 0,
+            "results": [{"index": i, "reference": None, "success": False} for i in range(total)],
         }
 
+    def _send_bulk_chunk(self, messages: List[Dict[str, str]]) -> Dict:
+        payload, references, valid_indices, failed_indices = self._bulk_chunk_request(messages)
+        res = self._make_request("/api/sms/send", payload, method="POST") if payload else None
+        return self._chunk_result(res, references, valid_indices, failed_indices)
+
+    async def _send_bulk_chunk_async(self, messages: List[Dict[str, str]], limit: asyncio.Semaphore) -> Dict:
+        payload, references, valid_indices, failed_indices = self._bulk_chunk_request(messages)
+        res = None
+        if payload:
+            async with limit:
+                res = await self._make_request_async("/api/sms/send", payload, method="POST")
+        return self._chunk_result(res, references, valid_indices, failed_indices)
+
+    # ---------------- Public API ----------------
+
+    def send_single_sms(self, phone: str, message: str, reference: Optional[str] = None) -> bool:
+        """
+        Send a single SMS message.
+        Returns True on success, False otherwise.
+        """
+        if not self.enabled:
+            logger.info("[SMS DISABLED] Would send to %s: %s", phone, message)
+            return False
+
+        ref = self._ensure_reference(reference)
+        msisdn = self._to_e164(phone)
+
+        if not msisdn:
+            logger.error("Invalid phone number provided: %s", phone)
+            return False
+
+        payload = {"auth": self._auth_body(), "messages": [self._message(msisdn, message, ref)]}
         res = self._make_request("/api/sms/send", payload, method="POST")
+        return self._interpret_single(res, msisdn, ref)
 
-        success_count = 0
-        if isinstance(res, dict):
-            if res.get("status") in (True, "true", "success", "ok", "OK", "SUCCESS"):
-                # assume all valid payload messages succeeded
-                success_count = len(valid_payload_messages)
-            else:
-                # try to parse per-message results
-                results = res.get("results") or res.get("data") or None
-                if isinstance(results, list) and len(results) == len(valid_payload_messages):
-                    for i, r in enumerate(results):
-                        if isinstance(r, dict) and r.get("status") in (True, "true", "success", "ok", 200):
-                            success_count += 1
-                        else:
-                            failed_indices.append(i)
-
-        failed_count = len(messages) - success_count
-        return {"success": success_count, "failed": failed_count, "failed_indices": failed_indices}
+    async def send_single_sms_async(self, phone: str, message: str, reference: Optional[str] = None) -> bool:
+        """Async variant of `send_single_sms`."""
+        if not self.enabled:
+            logger.info("[SMS DISABLED] Would send to %s: %s", phone, message)
+            return False
+
+        ref = self._ensure_reference(reference)
+        msisdn = self._to_e164(phone)
+
+        if not msisdn:
+            logger.error("Invalid phone number provided: %s", phone)
+            return False
+
+        payload = {"auth": self._auth_body(), "messages": [self._message(msisdn, message, ref)]}
+        res = await self._make_request_async("/api/sms/send", payload, method="POST")
+        return self._interpret_single(res, msisdn, ref)
+
+    def send_bulk_sms(self, messages: List[Dict[str, str]]) -> Dict:
+        """
+        Send bulk SMS messages of any length. Lists larger than the provider limit are
+        split into chunks sent concurrently (`blksms_bulk_concurrency` at a time).
+        messages: list of {"phone": "...", "message": "...", "reference": optional}
+        Returns: {"success": n, "failed": m, "failed_indices": [i, ...], "chunks": c,
+                  "results": [{"index": i, "reference": "...", "success": bool}, ...]}
+        with every index pointing into the original `messages` list.
+        """
+        if not self.enabled:
+            logger.info("[BULK SMS DISABLED] -> %d messages", len(messages))
+            return self._disabled_bulk(len(messages))
+
+        chunks = self._chunk_bulk(messages)
+        workers = min(settings.blksms_bulk_concurrency, len(chunks))
+        if workers <= 1:
+            parts = [self._send_bulk_chunk(chunk) for _, chunk in chunks]
+        else:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="blksms-bulk") as pool:
+                parts = list(pool.map(lambda c: self._send_bulk_chunk(c[1]), chunks))
+        return self._merge_bulk(len(messages), [(offset, part) for (offset, _), part in zip(chunks, parts)])
+
+    async def send_bulk_sms_async(self, messages: List[Dict[str, str]]) -> Dict:
+        """Async variant of `send_bulk_sms`; chunks share the pooled httpx client."""
+        if not self.enabled:
+            logger.info("[BULK SMS DISABLED] -> %d messages", len(messages))
+            return self._disabled_bulk(len(messages))
+
+        chunks = self._chunk_bulk(messages)
+        limit = asyncio.Semaphore(max(1, settings.blksms_bulk_concurrency))
+        parts = await asyncio.gather(*(self._send_bulk_chunk_async(chunk, limit) for _, chunk in chunks))
+        return self._merge_bulk(len(messages), [(offset, part) for (offset, _), part in zip(chunks, parts)])
 
     def check_balance(self) -> Optional[Dict[str, Union[str, float, int]]]:
         """
@@ -266,30 +569,40 @@ class BlkSMSService:
             return None
 
         payload = {"auth": self._auth_body()}
-        possible_endpoints = ["/api/account/balance", "/api/sms/balance", "/api/balance"]
+        last_response = None
+        for ep in self.BALANCE_ENDPOINTS:
+            last_response = self._make_request(ep, payload, method="POST")
+            balance = self._interpret_balance(last_response)
+            if balance:
+                return balance
+
+        logger.error("Balance check failed. Last response: %s", last_response)
+        return None
+
+    async def check_balance_async(self) -> Optional[Dict[str, Union[str, float, int]]]:
+        """Async variant of `check_balance`."""
+        if not self.enabled:
+            logger.warning("SMS service disabled; cannot check balance.")
+            return None
 
+        payload = {"auth": self._auth_body()}
         last_response = None
-        for ep in possible_endpoints:
-            res = self._make_request(ep, payload, method="POST")
-            last_response = res
-            if not isinstance(res, dict):
-                continue
-            # common shapes
-            if res.get("status") in (True, "true", "success", "ok", "OK", "SUCCESS"):
-                # direct balance
-                if "balance" in res:
-                    return {"status": "success", "balance": res.get("balance")}
-                # nested data
-                data = res.get("data")
-                if isinstance(data, dict) and "balance" in data:
-                    out = {"status": "success", "balance": data.get("balance")}
-                    if data.get("currency"):
-                        out["currency"] = data.get("currency")
-                    return out
+        for ep in self.BALANCE_ENDPOINTS:
+            last_response = await self._make_request_async(ep, payload, method="POST")
+            balance = self._interpret_balance(last_response)
+            if balance:
+                return balance
 
         logger.error("Balance check failed. Last response: %s", last_response)
         return None
 
+    def _delivery_report_payload(self, reference_id: str, channel: str) -> Dict:
+        return {
+            "auth": self._auth_body(),
+            "channel": channel,
+            "reference_id": reference_id
+        }
+
     def get_delivery_reports(self, reference_id: str, channel: str = "default") -> Optional[Dict]:
         """
         Fetch delivery reports for a given reference. Endpoint name may vary with provider.
@@ -298,12 +611,21 @@ class BlkSMSService:
             logger.warning("SMS service disabled; cannot fetch delivery reports.")
             return None
 
-        payload = {
-            "auth": self._auth_body(),
-            "channel": channel,
-            "reference_id": reference_id
-        }
-        res = self._make_request("/api/dlr/request/polling/handler", payload, method="POST")
+        res = self._make_request("/api/dlr/request/polling/handler", self._delivery_report_payload(reference_id, channel), method="POST")
+        if res:
+            logger.info("Delivery report fetched for %s: %s", reference_id, res)
+            return res
+
+        logger.error("Failed to get delivery report for %s", reference_id)
+        return None
+
+    async def get_delivery_reports_async(self, reference_id: str, channel: str = "default") -> Optional[Dict]:
+        """Async variant of `get_delivery_reports`."""
+        if not self.enabled:
+            logger.warning("SMS service disabled; cannot fetch delivery reports.")
+            return None
+
+        res = await self._make_request_async("/api/dlr/request/polling/handler", self._delivery_report_payload(reference_id, channel), method="POST")
         if res:
             logger.info("Delivery report fetched for %s: %s", reference_id, res)
             return res
@@ -320,7 +642,7 @@ def send_sms(phone: str, message: str, reference: Optional[str] = None) -> bool:
     return sms_service.send_single_sms(phone, message, reference)
 
 
-def send_bulk_sms(messages: List[Dict[str, str]]) -> Dict[str, Union[int, List[int]]]:
+def send_bulk_sms(messages: List[Dict[str, str]]) -> Dict:
     return sms_service.send_bulk_sms(messages)
 
 
@@ -0,0 +1,132 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import inspect
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from ..core.config import settings
+from ..models import CacheVersion, Staff
+
+CACHE_NAME = "staff"
+
+
+class StaffCache:
+    """
+    Bounded, TTL-limited LRU cache of active staff principals keyed by staff id.
+
+    Entries are detached copies; `get` attaches one to the request session with
+    `merge(load=False)`, so a hit costs no query. Writers call `bump_version`
+    in their transaction; each process compares the shared version at most every
+    `staff_cache_version_check_seconds` and clears itself when it has changed.
+    """
+
+    def __init__(self):
+        self.ttl = settings.staff_cache_ttl_seconds
+        self.max_entries = settings.staff_cache_max_entries
+        self.version_check = settings.staff_cache_version_check_seconds
+
+        self._entries: "OrderedDict[str, Tuple[float, Staff]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._version: Optional[int] = None
+        self._version_checked_at = 0.0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_entries > 0
+
+    def _sync_version(self, db: Session) -> None:
+        now = time.monotonic()
+        if now - self._version_checked_at < self.version_check:
+            return
+        version = db.query(CacheVersion.version).filter(CacheVersion.name == CACHE_NAME).scalar() or 0
+        with self._lock:
+            self._version_checked_at = now
+            if self._version is not None and version != self._version:
+                self.invalidations += 1
+                self._entries.clear()
+            self._version = version
+
+    def get(self, db: Session, staff_id: str) -> Optional[Staff]:
+        """Return the cached staff attached to `db`, or None on a miss."""
+        if not self.enabled:
+            return None
+        self._sync_version(db)
+        with self._lock:
+            entry = self._entries.get(staff_id)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[staff_id]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(staff_id)
+            self.hits += 1
+            cached = entry[1]
+        return db.merge(cached, load=False)
+
+    def put(self, staff: Staff) -> None:
+        """Cache a detached copy of a loaded staff row."""
+        if not self.enabled:
+            return
+        copy = Staff(**{attr.key: getattr(staff, attr.key) for attr in inspect(Staff).column_attrs})
+        make_transient_to_detached(copy)
+        with self._lock:
+            self._entries[staff.id] = (time.monotonic() + self.ttl, copy)
+            self._entries.move_to_end(staff.id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, staff_id: str) -> None:
+        with self._lock:
+            self._entries.pop(staff_id, None)
+
+    def bump_version(self, db: Session) -> None:
+        """Mark cached staff stale in every process. Call before the writer commits."""
+        dialect = db.get_bind().dialect.name
+        if dialect == "postgresql":
+            stmt = postgresql.insert(CacheVersion)
+        elif dialect == "sqlite":
+            stmt = sqlite.insert(CacheVersion)
+        else:
+            # Generic fallback: two first writers may both find no row to update
+            updated = (
+                db.query(CacheVersion)
+                .filter(CacheVersion.name == CACHE_NAME)
+                .update({CacheVersion.version: CacheVersion.version + 1}, synchronize_session=False)
+            )
+            if not updated:
+                db.add(CacheVersion(name=CACHE_NAME, version=1))
+            return
+
+        # One statement, so concurrent first writers cannot both insert the row
+        db.execute(stmt.values(name=CACHE_NAME, version=1).on_conflict_do_update(
+            index_elements=[CacheVersion.name],
+            set_={"version": CacheVersion.version + 1},
+        ))
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "version": self._version,
+            }
+
+
+staff_cache = StaffCache()
@@ -0,0 +1,180 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..models import Parcel, TrackingHistory
+from . import live_tracking
+
+# session.info keys: parcel ids and lookups a transaction wrote, evicted at commit
+WRITTEN_PARCELS = "tracking_cache_parcels"
+WRITTEN_LOOKUPS = "tracking_cache_lookups"
+
+
+def etag_for(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def phone_lookups(sender: Optional[str], receiver: Optional[str]) -> List[Tuple]:
+    """Phone lookup keys (see `routers.tracking._lookup_key`) a parcel with these phone keys can answer."""
+    keys = [("phone", sender, receiver)] if sender and receiver else []
+    if sender:
+        keys.append(("phone", sender, None))
+    if receiver:
+        keys.append(("phone", None, receiver))
+    return keys
+
+
+class TrackingCache:
+    """
+    Bounded, TTL-limited LRU cache of rendered public tracking responses keyed by
+    lookup (tracking number or phone keys), holding the parcel it resolved to, the
+    JSON body and its ETag. A hit, conditional or not, is answered from memory.
+
+    Entries are evicted by parcel when it or its history is written: in the writing
+    process as the transaction commits (the session hooks below), in every other
+    process when the write's parcel event comes through the live tracking feed. A
+    new parcel also evicts the phone lookups it now answers, which other processes
+    only see when their entries expire, as with renamed riders and staff.
+    """
+
+    def __init__(self):
+        self.ttl = settings.tracking_cache_ttl_seconds
+        self.max_entries = settings.tracking_cache_max_entries
+
+        self._entries: "OrderedDict[Tuple, Tuple[float, str, str, bytes]]" = OrderedDict()
+        self._by_parcel: Dict[str, Set[Tuple]] = {}
+        self._lock = threading.Lock()
+        # Bumped by every eviction of written parcels; see `put`
+        self._generation = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_entries > 0
+
+    @property
+    def generation(self) -> int:
+        """Read before rendering a miss and hand to `put`."""
+        return self._generation
+
+    def get(self, key: Tuple) -> Optional[Tuple[str, bytes]]:
+        """(etag, body) for a cached lookup, or None on a miss."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._drop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2], entry[3]
+
+    def put(self, key: Tuple, parcel_id: str, etag: str, body: bytes, generation: int) -> None:
+        """
+        Cache a lookup rendered after reading `generation`. Skipped if a write was
+        evicted since: the body may predate it and nothing would evict it again.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._drop(key)
+            self._entries[key] = (time.monotonic() + self.ttl, parcel_id, etag, body)
+            self._by_parcel.setdefault(parcel_id, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, parcel_ids: Iterable[str] = (), lookups: Iterable[Tuple] = ()) -> None:
+        """Evict the lookups of written parcels and any of `lookups`."""
+        with self._lock:
+            self._generation += 1
+            keys = set(lookups)
+            for parcel_id in parcel_ids:
+                keys |= self._by_parcel.get(parcel_id, set())
+            for key in keys:
+                if self._drop(key):
+                    self.invalidations += 1
+
+    def evict_events(self, events: List[live_tracking.LiveEvent]) -> None:
+        """Live tracking feed listener: writes committed by any process."""
+        if events:
+            self.invalidate(event.parcel_id for event in events)
+
+    def _drop(self, key: Tuple) -> bool:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        keys = self._by_parcel.get(entry[1])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_parcel[entry[1]]
+        return True
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+tracking_cache = TrackingCache()
+if tracking_cache.enabled:
+    live_tracking.hub.listeners.append(tracking_cache.evict_events)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_written(session: Session, flush_context) -> None:
+    """Note the parcels this flush wrote (AsyncSession flushes included)."""
+    parcel_ids = session.info.setdefault(WRITTEN_PARCELS, set())
+    lookups = session.info.setdefault(WRITTEN_LOOKUPS, set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, TrackingHistory):
+            parcel_ids.add(obj.parcel_id)
+        elif isinstance(obj, Parcel):
+            parcel_ids.add(obj.id)
+            lookups.update(phone_lookups(obj.sender_phone_key, obj.receiver_phone_key))
+
+
+@event.listens_for(Session, "after_commit")
+def _evict_committed(session: Session) -> None:
+    if session.in_nested_transaction():
+        # A released savepoint; the writes are not visible until the outer commit
+        return
+    parcel_ids = session.info.pop(WRITTEN_PARCELS, None)
+    lookups = session.info.pop(WRITTEN_LOOKUPS, None)
+    if parcel_ids or lookups:
+        tracking_cache.invalidate(parcel_ids or (), lookups or ())
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _forget_rolled_back(session: Session, previous_transaction) -> None:
+    if previous_transaction.parent is not None:
+        # A savepoint; what it wrote stays noted, evicting it at commit is harmless
+        return
+    session.info.pop(WRITTEN_PARCELS, None)
+    session.info.pop(WRITTEN_LOOKUPS, None)
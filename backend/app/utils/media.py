@@ -0,0 +1,18 @@
+import os
+from datetime import datetime
+
+from fastapi import HTTPException
+
+from ..core.config import settings
+
+
+def save_parcel_photo(parcel_id: str, filename: str, content: bytes) -> str:
+    """Write an uploaded parcel photo under the media directory and return its path."""
+    os.makedirs(settings.media_dir, exist_ok=True)
+    dest = os.path.join(settings.media_dir, f"parcel_{parcel_id}_{int(datetime.utcnow().timestamp())}_{filename}")
+    try:
+        with open(dest, "wb") as f:
+            f.write(content)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to save file: {str(e)}")
+    return dest
@@ -1,8 +1,14 @@
+import hashlib
+import hmac
 import secrets
 from datetime import datetime, timedelta
 
 from ..core.config import settings
-from .security import get_password_hash
+from .security import verify_password
+
+
+# Prefix that distinguishes HMAC hashes from legacy bcrypt rows ("$2b$...")
+OTP_HASH_PREFIX = "hmac-sha256$"
 
 
 def generate_otp_code(length: int = 6) -> str:
@@ -10,8 +16,26 @@ def generate_otp_code(length: int = 6) -> str:
     return "".join(str(secrets.randbelow(10)) for _ in range(length))
 
 
-def hash_otp(code: str) -> str:
-    return get_password_hash(code)
+def _otp_digest(code: str, parcel_id: str) -> str:
+    key = (settings.otp_secret_key or settings.secret_key).encode()
+    # Bind the code to its parcel so a hash cannot be replayed against another parcel
+    return hmac.new(key, f"{parcel_id}:{code}".encode(), hashlib.sha256).hexdigest()
+
+
+def hash_otp(code: str, parcel_id: str) -> str:
+    # A keyed HMAC is enough for a short-lived code: brute force is bounded by
+    # attempt limiting in verify_otp, not by hashing cost
+    return OTP_HASH_PREFIX + _otp_digest(code, parcel_id)
+
+
+def verify_otp_code(code: str, code_hash: str, parcel_id: str) -> bool:
+    """Constant-time check of `code` against an HMAC hash, or a legacy bcrypt hash."""
+    if code_hash.startswith(OTP_HASH_PREFIX):
+        return hmac.compare_digest(code_hash[len(OTP_HASH_PREFIX):], _otp_digest(code, parcel_id))
+    try:
+        return verify_password(code, code_hash)
+    except ValueError:
+        return False
 
 
 def expiry_time() -> datetime:
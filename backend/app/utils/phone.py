@@ -0,0 +1,14 @@
+import re
+from typing import Optional
+
+_NON_DIGITS = re.compile(r"[^0-9]")
+
+
+def phone_key(phone: Optional[str]) -> Optional[str]:
+    """
+    Digits of a phone number, the form parcels are looked up by, so
+    "+255 700-000 001" and "255700000001" find the same parcels.
+    """
+    if phone is None:
+        return None
+    return _NON_DIGITS.sub("", str(phone)) or None
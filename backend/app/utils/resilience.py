@@ -0,0 +1,151 @@
+import threading
+import time
+from typing import Dict, Optional, Union
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. `rate` tokens are added per second up to `burst`.
+
+    `reserve` takes tokens immediately (the balance may go negative) and returns
+    how long the caller must wait before using them, so concurrent callers are
+    spaced out fairly without holding the lock while they sleep.
+    """
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+        self.granted = 0
+        self.rejected = 0
+        self.waited_seconds = 0.0
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, tokens: float = 1, max_wait: Optional[float] = None) -> Optional[float]:
+        """
+        Reserve `tokens` and return the seconds to wait before proceeding,
+        or None (nothing reserved) if the wait would exceed `max_wait`.
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            deficit = tokens - self._tokens
+            wait = deficit / self.rate if deficit > 0 else 0.0
+            if max_wait is not None and wait > max_wait:
+                self.rejected += 1
+                return None
+            self._tokens -= tokens
+            self.granted += 1
+            self.waited_seconds += wait
+            return wait
+
+    def snapshot(self) -> Dict[str, Union[int, float]]:
+        with self._lock:
+            self._refill(time.monotonic())
+            return {
+                "rate_per_second": self.rate,
+                "burst": self.burst,
+                "available_tokens": round(self._tokens, 3),
+                "granted": self.granted,
+                "rejected": self.rejected,
+                "waited_seconds": round(self.waited_seconds, 3),
+            }
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    CLOSED: calls pass; `failure_threshold` consecutive failures open the circuit.
+    OPEN: calls are rejected immediately until `reset_timeout` seconds have passed.
+    HALF_OPEN: a single probe call is let through; its success closes the circuit,
+    its failure re-opens it for another `reset_timeout`.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_timeout = float(reset_timeout)
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+        self.successes = 0
+        self.failures = 0
+        self.rejected = 0
+        self.times_opened = 0
+
+    def _current_state(self, now: float) -> str:
+        if self._state == self.OPEN and now - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._probe_in_flight = False
+        return self._state
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state(time.monotonic())
+
+    def allow(self) -> bool:
+        """Return True if a call may proceed. Must be followed by record_success/record_failure/cancel."""
+        with self._lock:
+            state = self._current_state(time.monotonic())
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+
+    def cancel(self) -> None:
+        """Give back a permit from `allow` without reporting an outcome."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.successes += 1
+            self._consecutive_failures = 0
+            self._probe_in_flight = False
+            self._state = self.CLOSED
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._consecutive_failures += 1
+            now = time.monotonic()
+            half_open = self._current_state(now) == self.HALF_OPEN
+            self._probe_in_flight = False
+            if half_open or self._consecutive_failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self.times_opened += 1
+                self._state = self.OPEN
+                self._opened_at = now
+
+    def snapshot(self) -> Dict[str, Union[str, int, float, None]]:
+        with self._lock:
+            now = time.monotonic()
+            state = self._current_state(now)
+            return {
+                "state": state,
+                "consecutive_failures": self._consecutive_failures,
+                "failure_threshold": self.failure_threshold,
+                "reset_timeout_seconds": self.reset_timeout,
+                "retry_in_seconds": round(max(0.0, self.reset_timeout - (now - self._opened_at)), 3)
+                if state == self.OPEN else None,
+                "successes": self.successes,
+                "failures": self.failures,
+                "rejected": self.rejected,
+                "times_opened": self.times_opened,
+            }
@@ -0,0 +1,38 @@
+from typing import Any, Optional, Type
+
+from fastapi import HTTPException
+from fastapi.responses import Response
+from pydantic import BaseModel, TypeAdapter
+
+
+def projection(fields: Optional[str], model: Type[BaseModel]) -> Optional[dict]:
+    """
+    `include` spec for a list of `model` from a `fields=id,status` query parameter,
+    or None for every field. Raises HTTP 400 for names the model does not have.
+    """
+    if not fields:
+        return None
+    wanted = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = sorted(wanted - set(model.model_fields))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return {"__all__": wanted}
+
+
+class JSONSerializer:
+    """
+    Validates ORM objects against a response type and renders the JSON bytes in the
+    same pydantic-core pass. Build one per type at import time so its schema is
+    compiled once, and return `response(...)` from the endpoint: FastAPI passes a
+    Response through untouched instead of re-validating it via `response_model`.
+    """
+
+    def __init__(self, response_type: Any):
+        self.adapter = TypeAdapter(response_type)
+
+    def dump(self, content: Any, include: Optional[dict] = None) -> bytes:
+        value = self.adapter.validate_python(content, from_attributes=True)
+        return self.adapter.dump_json(value, include=include)
+
+    def response(self, content: Any, include: Optional[dict] = None) -> Response:
+        return Response(self.dump(content, include), media_type="application/json")
@@ -0,0 +1,144 @@
+"""
+Per-row cost of the list endpoints' serialization: migrates a scratch SQLite
+database, seeds parcels with tracking history and assignments, and times each
+list query plus response rendering the old way (lazy-loaded relations, then
+validate -> jsonable_encoder -> json.dumps as FastAPI's JSONResponse does) and
+the current way (eager-loaded relations, JSONSerializer, optional `fields=`).
+
+Run from the repo root:
+    PYTHONPATH=backend python backend/bench_list_serialization.py [parcels]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import List
+from uuid import uuid4
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, event, insert, select
+from sqlalchemy.orm import Session, joinedload
+
+from app.models import Assignment, Parcel, Rider, Staff, StaffRole, TrackingHistory, ParcelStatus
+from app.schema import migrate
+from app.schemas import AssignmentOut, ParcelListItem, TrackingHistoryOut
+from app.utils.serialization import JSONSerializer, projection
+
+ROUNDS = 3
+
+
+def seed(engine, parcels: int) -> None:
+    now = datetime.utcnow()
+    staff_ids = [str(uuid4()) for _ in range(5)]
+    rider_ids = [str(uuid4()) for _ in range(20)]
+    parcel_ids = [str(uuid4()) for _ in range(parcels)]
+    with engine.begin() as conn:
+        conn.execute(insert(Staff), [
+            {"id": sid, "full_name": f"Staff {i}", "phone": f"+2557000000{i:02d}", "role": StaffRole.RECEIVING,
+             "password_hash": "x"}
+            for i, sid in enumerate(staff_ids)
+        ])
+        conn.execute(insert(Rider), [
+            {"id": rid, "full_name": f"Rider {i}", "phone": f"+2557100000{i:02d}", "vehicle_details": "Motorbike"}
+            for i, rid in enumerate(rider_ids)
+        ])
+        conn.execute(insert(Parcel), [
+            {"id": pid, "tracking_number": f"TRK-{i:08d}", "sender_name": "Sender", "sender_phone": "+255700000001",
+             "receiver_name": "Receiver", "receiver_phone": "+255700000002", "receiver_location": "Arusha",
+             "parcel_type": "Box", "received_by_id": staff_ids[i % 5], "created_at": now - timedelta(seconds=i)}
+            for i, pid in enumerate(parcel_ids)
+        ])
+        conn.execute(insert(TrackingHistory), [
+            {"parcel_id": pid, "status": status, "location": "Dar es Salaam", "updated_by_staff_id": staff_ids[i % 5],
+             "rider_id": rider_ids[i % 20] if status == ParcelStatus.IN_TRANSIT else None}
+            for i, pid in enumerate(parcel_ids)
+            for status in (ParcelStatus.RECEIVED, ParcelStatus.IN_TRANSIT)
+        ])
+        conn.execute(insert(Assignment), [
+            {"parcel_id": pid, "rider_id": rider_ids[i % 20], "assigned_by_staff_id": staff_ids[i % 5]}
+            for i, pid in enumerate(parcel_ids)
+        ])
+
+
+def render_before(adapter: TypeAdapter, rows) -> bytes:
+    """validate, then jsonable_encoder and json.dumps, the response_model path of FastAPI's JSONResponse."""
+    content = jsonable_encoder(adapter.dump_python(adapter.validate_python(rows, from_attributes=True), mode="json"))
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode()
+
+
+def measure(engine, run) -> tuple:
+    """Best of ROUNDS: (seconds, rows, queries, bytes) for one query + render."""
+    queries = []
+    listener = lambda *args: queries.append(1)  # noqa: E731
+    event.listen(engine, "before_cursor_execute", listener)
+    best = None
+    try:
+        for _ in range(ROUNDS):
+            queries.clear()
+            with Session(engine) as db:
+                started = time.perf_counter()
+                rows, body = run(db)
+                elapsed = time.perf_counter() - started
+            if best is None or elapsed < best[0]:
+                best = (elapsed, rows, len(queries), len(body))
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    return best
+
+
+def case(model, old_stmt, new_stmt, fields: str):
+    """(before, after, after with fields=) runners for a list of `model`."""
+    old = TypeAdapter(List[model])
+    new = JSONSerializer(List[model])
+    include = projection(fields, model)
+
+    def before(db):
+        found = db.execute(old_stmt).unique().scalars().all()
+        return len(found), render_before(old, found)
+
+    def after(db):
+        found = db.execute(new_stmt).unique().scalars().all()
+        return len(found), new.dump(found)
+
+    def projected(db):
+        found = db.execute(new_stmt).unique().scalars().all()
+        return len(found), new.dump(found, include)
+
+    return before, after, projected
+
+
+def cases():
+    tracking = select(TrackingHistory)
+    page = select(Parcel).order_by(Parcel.created_at.desc(), Parcel.id.desc()).limit(500)
+    yield "GET /tracking", case(
+        TrackingHistoryOut, tracking,
+        tracking.options(joinedload(TrackingHistory.parcel), joinedload(TrackingHistory.updated_by_staff),
+                         joinedload(TrackingHistory.rider)),
+        "id,status,created_at")
+    # list_assignments already joined its relations; only the rendering changed
+    assignments = select(Assignment).options(
+        joinedload(Assignment.parcel), joinedload(Assignment.rider), joinedload(Assignment.assigned_by_staff))
+    yield "GET /dispatch", case(AssignmentOut, assignments, assignments, "id,rider,assigned_at")
+    yield "GET /parcels (500)", case(ParcelListItem, page, page, "id,tracking_number,current_status")
+
+
+def main() -> int:
+    parcels = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.sqlite3')}")
+        migrate(engine)
+        seed(engine, parcels)
+        print(f"{'endpoint':<20}{'path':<10}{'rows':>7}{'queries':>9}{'KiB':>9}{'µs/row':>9}")
+        for name, runs in cases():
+            for label, run in zip(("before", "after", "fields="), runs):
+                elapsed, count, queries, size = measure(engine, run)
+                print(f"{name:<20}{label:<10}{count:>7}{queries:>9}{size / 1024:>9.0f}{elapsed / count * 1e6:>9.1f}")
+        engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
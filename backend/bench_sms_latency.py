@@ -0,0 +1,128 @@
+"""
+Latency of unrelated endpoints while SMS gateway calls are in flight: starts a
+stub gateway that answers after a fixed delay, fires concurrent /sms/send
+requests at an in-process app and polls /health until they finish, once through
+the old route (blocking `send_single_sms` inside `async def`, which stalls the
+event loop) and once through the current route (`send_single_sms_async` on the
+pooled httpx client).
+
+Run from the repo root:
+    PYTHONPATH=backend python backend/bench_sms_latency.py [sends] [gateway delay seconds]
+"""
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+os.environ.setdefault("BLKSMS_ENABLED", "true")
+os.environ.setdefault("BLKSMS_CLIENT_ID", "bench")
+os.environ.setdefault("BLKSMS_CLIENT_SECRET", "bench")
+
+import httpx  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+
+from app.routers import sms  # noqa: E402
+from app.services.sms_service import sms_service  # noqa: E402
+
+POLL_SECONDS = 0.05
+
+
+def start_gateway(delay: float) -> ThreadingHTTPServer:
+    """A gateway stub that accepts every request after `delay` seconds."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            time.sleep(delay)
+            body = json.dumps({"status": True}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def build_app() -> FastAPI:
+    bench = FastAPI()
+
+    @bench.get("/health")
+    async def health_check():
+        return {"status": "healthy"}
+
+    @bench.post("/sms/send-before", response_model=sms.SMSResponse)
+    async def send_before(request: sms.SMSRequest):
+        """The route as it was: the blocking client called on the event loop."""
+        ref = request.reference or uuid.uuid4().hex
+        success = sms_service.send_single_sms(phone=request.phone, message=request.message, reference=ref)
+        return sms.SMSResponse(success=success, message="sent" if success else "failed", reference=ref)
+
+    bench.post("/sms/send", response_model=sms.SMSResponse)(sms.send_single_sms)
+    return bench
+
+
+async def measure(app: FastAPI, path: str, sends: int) -> tuple:
+    """
+    (seconds until every send finished, sent ok, /health latencies in seconds).
+    A probe is due every POLL_SECONDS; its latency counts from when it was due,
+    so time the event loop spent blocked before it could start is included.
+    """
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        payload = {"phone": "+255700000001", "message": "Benchmark"}
+        started = time.perf_counter()
+        tasks = [asyncio.create_task(client.post(path, json=payload)) for _ in range(sends)]
+        latencies = []
+        while True:
+            due = started + len(latencies) * POLL_SECONDS
+            await asyncio.sleep(max(0.0, due - time.perf_counter()))
+            await client.get("/health")
+            latencies.append(time.perf_counter() - due)
+            if all(task.done() for task in tasks):
+                break
+        responses = await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+    await sms_service.aclose()
+    return elapsed, sum(response.json()["success"] for response in responses), latencies
+
+
+def main() -> int:
+    sends = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    delay = float(sys.argv[2]) if len(sys.argv) > 2 else 1.0
+    gateway = start_gateway(delay)
+    sms_service.base_url = f"http://127.0.0.1:{gateway.server_address[1]}"
+    app = build_app()
+    rows = []
+    try:
+        # The service logs (and prints) every request; keep the table readable
+        logging.disable(logging.INFO)
+        with contextlib.redirect_stdout(io.StringIO()):
+            for label, path in (("before", "/sms/send-before"), ("after", "/sms/send")):
+                rows.append((label, *asyncio.run(measure(app, path, sends))))
+    finally:
+        gateway.shutdown()
+    print(f"{sends} sends, gateway delay {delay:.2f}s")
+    print(f"{'path':<8}{'sent':>6}{'total s':>10}{'probes':>8}{'health p50 ms':>15}{'health max ms':>15}")
+    for label, elapsed, sent, latencies in rows:
+        print(f"{label:<8}{sent:>6}{elapsed:>10.2f}{len(latencies):>8}"
+              f"{statistics.median(latencies) * 1000:>15.1f}{max(latencies) * 1000:>15.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+"""
+Mixed read/write throughput under the SQLite connection profile: migrates a
+scratch database per profile, seeds parcels, then runs reader threads (a
+dashboard list page plus a per-status count) against writer threads (a parcel
+and its first tracking row per transaction) for a fixed time. The old profile
+is SQLite's defaults (rollback journal, synchronous=FULL, the driver's 5s busy
+timeout); the current one is `sqlite_pragmas()` from the SQLITE_* settings.
+Also reports the WAL size before and after `sqlite_maintenance()`.
+
+Run from the repo root:
+    PYTHONPATH=backend python backend/bench_sqlite_profile.py [seconds] [readers] [writers]
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.exc import OperationalError
+
+from app.core.config import settings
+from app.db import sqlite_maintenance
+from app.models import Parcel, ParcelStatus, Staff, StaffRole, TrackingHistory
+from app.schema import migrate
+
+SEED_PARCELS = 50000
+PROFILE_SETTINGS = (
+    "sqlite_journal_mode", "sqlite_synchronous", "sqlite_busy_timeout_ms",
+    "sqlite_mmap_size", "sqlite_cache_size", "sqlite_temp_store",
+)
+# What every connection ran with before the profile existed
+LEGACY = {
+    "sqlite_journal_mode": "DELETE",
+    "sqlite_synchronous": "FULL",
+    "sqlite_busy_timeout_ms": 5000,
+    "sqlite_mmap_size": 0,
+    "sqlite_cache_size": -2000,
+    "sqlite_temp_store": "DEFAULT",
+}
+
+
+def parcel_row(staff_id: str, number: int, created_at: datetime) -> dict:
+    return {
+        "id": str(uuid4()), "tracking_number": f"TRK-{number:08d}", "sender_name": "Sender",
+        "sender_phone": "+255700000001", "receiver_name": "Receiver", "receiver_phone": "+255700000002",
+        "receiver_location": "Arusha", "parcel_type": "Box", "received_by_id": staff_id, "created_at": created_at,
+    }
+
+
+def seed(engine) -> str:
+    now = datetime.utcnow()
+    staff_id = str(uuid4())
+    with engine.begin() as conn:
+        conn.execute(insert(Staff), [{"id": staff_id, "full_name": "Staff", "phone": "+255700000000",
+                                      "role": StaffRole.RECEIVING, "password_hash": "x"}])
+        conn.execute(insert(Parcel), [
+            parcel_row(staff_id, i, now - timedelta(seconds=i)) for i in range(SEED_PARCELS)
+        ])
+    return staff_id
+
+
+def run_load(engine, staff_id: str, seconds: float, readers: int, writers: int) -> dict:
+    counts = {"reads": 0, "writes": 0, "errors": 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+    numbers = iter(range(SEED_PARCELS, 10 ** 8))
+    page = select(Parcel.id, Parcel.tracking_number, Parcel.current_status) \
+        .order_by(Parcel.created_at.desc(), Parcel.id.desc()).limit(50)
+    by_status = select(Parcel.current_status, func.count()).group_by(Parcel.current_status)
+
+    def work(kind: str, step) -> None:
+        while time.perf_counter() < deadline:
+            try:
+                step()
+                outcome = kind
+            except OperationalError:
+                outcome = "errors"
+            with lock:
+                counts[outcome] += 1
+
+    def read() -> None:
+        with engine.connect() as conn:
+            conn.execute(page).all()
+            conn.execute(by_status).all()
+
+    def write() -> None:
+        with lock:
+            number = next(numbers)
+        row = parcel_row(staff_id, number, datetime.utcnow())
+        with engine.begin() as conn:
+            conn.execute(insert(Parcel), [row])
+            conn.execute(insert(TrackingHistory), [{"parcel_id": row["id"], "status": ParcelStatus.RECEIVED,
+                                                     "location": "Dar es Salaam", "updated_by_staff_id": staff_id}])
+
+    threads = [threading.Thread(target=work, args=("reads", read)) for _ in range(readers)]
+    threads += [threading.Thread(target=work, args=("writes", write)) for _ in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return counts
+
+
+def wal_kib(path: str) -> float:
+    wal = f"{path}-wal"
+    return os.path.getsize(wal) / 1024 if os.path.exists(wal) else 0.0
+
+
+def main() -> int:
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 8.0
+    readers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    writers = int(sys.argv[3]) if len(sys.argv) > 3 else 2
+    current = {name: getattr(settings, name) for name in PROFILE_SETTINGS}
+    print(f"{readers} readers, {writers} writers, {seconds:.0f}s, {SEED_PARCELS} parcels")
+    print(f"{'profile':<10}{'journal':>9}{'reads/s':>10}{'writes/s':>10}{'errors':>8}{'WAL KiB':>10}{'after maint.':>14}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, profile in (("before", LEGACY), ("after", current)):
+            # The connect hook in app.db reads the profile from settings
+            for name, value in profile.items():
+                setattr(settings, name, value)
+            path = os.path.join(tmp, f"{label}.sqlite3")
+            engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+            try:
+                migrate(engine)
+                staff_id = seed(engine)
+                counts = run_load(engine, staff_id, seconds, readers, writers)
+                wal = wal_kib(path)
+                sqlite_maintenance(engine)
+                print(f"{label:<10}{profile['sqlite_journal_mode']:>9}{counts['reads'] / seconds:>10.0f}"
+                      f"{counts['writes'] / seconds:>10.0f}{counts['errors']:>8}{wal:>10.0f}{wal_kib(path):>14.0f}")
+            finally:
+                engine.dispose()
+    for name, value in current.items():
+        setattr(settings, name, value)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,22 @@
+"""
+Bring the Parquet analytics export up to date (incremental by default).
+
+Run from the repo root, e.g. from cron:
+    PYTHONPATH=backend python backend/export_parquet.py [--full]
+"""
+import sys
+
+from app.core.config import settings
+from app.schema import migrate
+from app.services import parquet_export
+
+
+def main():
+    if settings.db_auto_migrate:
+        migrate()
+    watermarks = parquet_export.export_all(full="--full" in sys.argv[1:])
+    print(f"✅ Parquet export in {settings.parquet_export_dir} up to date: {watermarks}")
+
+
+if __name__ == "__main__":
+    main()
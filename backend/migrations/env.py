@@ -0,0 +1,63 @@
+from logging.config import fileConfig
+
+from alembic import context
+
+from app.core.config import settings
+from app.db import Base, engine
+from app import models  # noqa: F401  (registers every table on Base.metadata)
+
+# this is the Alembic Config object, which provides
+# access to the values within the .ini file in use.
+config = context.config
+
+# Interpret the config file for Python logging, unless called from the app
+# (app.schema passes its own connection and keeps the app's logging setup).
+if config.config_file_name is not None and "connection" not in config.attributes:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def _configure_kwargs(dialect_name: str) -> dict:
+    return {
+        "target_metadata": target_metadata,
+        "compare_type": True,
+        # SQLite cannot ALTER most constraints; batch mode recreates the table instead
+        "render_as_batch": dialect_name == "sqlite",
+    }
+
+
+def run_migrations_offline() -> None:
+    """Emit SQL for the configured database URL without connecting (alembic upgrade --sql)."""
+    url = config.get_main_option("sqlalchemy.url") or settings.database_url
+    dialect_name = url.split(":", 1)[0].split("+", 1)[0]
+    context.configure(
+        url=url,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        **_configure_kwargs(dialect_name),
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    """Run migrations against DATABASE_URL, or the connection handed in by app.schema."""
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        context.configure(connection=connection, **_configure_kwargs(connection.dialect.name))
+        with context.begin_transaction():
+            context.run_migrations()
+        return
+
+    with engine.connect() as connection:
+        context.configure(connection=connection, **_configure_kwargs(connection.dialect.name))
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,104 @@
+"""parcel phone keys
+
+Digits-only sender/receiver phones, backfilled, indexed with created_at for the
+public tracking lookup; they replace the indexes on the raw phone columns.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-16 22:43:50.516051
+
+"""
+import re
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, Sequence[str], None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH = 1000
+
+
+def _phone_key(phone):
+    # Same rule as app.utils.phone.phone_key at the time of this revision
+    if phone is None:
+        return None
+    return re.sub(r"[^0-9]", "", phone) or None
+
+
+def _digits_only(column):
+    return sa.func.nullif(sa.func.regexp_replace(column, "[^0-9]", "", "g"), "")
+
+
+def _backfill_phone_keys() -> None:
+    parcels = sa.table(
+        "parcels",
+        sa.column("id"), sa.column("sender_phone"), sa.column("receiver_phone"),
+        sa.column("sender_phone_key"), sa.column("receiver_phone_key"),
+    )
+    if context.is_offline_mode():
+        # No rows to read when only emitting SQL: one UPDATE where the database can
+        # apply the rule itself (PostgreSQL); elsewhere run the upgrade online
+        if context.get_context().dialect.name == "postgresql":
+            op.execute(parcels.update().values(
+                sender_phone_key=_digits_only(parcels.c.sender_phone),
+                receiver_phone_key=_digits_only(parcels.c.receiver_phone),
+            ))
+        return
+
+    conn = op.get_bind()
+    update = (
+        parcels.update()
+        .where(parcels.c.id == sa.bindparam("parcel_id"))
+        .values(sender_phone_key=sa.bindparam("sender_key"), receiver_phone_key=sa.bindparam("receiver_key"))
+    )
+    last_id = None
+    while True:
+        query = sa.select(parcels.c.id, parcels.c.sender_phone, parcels.c.receiver_phone)
+        if last_id is not None:
+            query = query.where(parcels.c.id > last_id)
+        rows = conn.execute(query.order_by(parcels.c.id).limit(BACKFILL_BATCH)).all()
+        if not rows:
+            break
+        conn.execute(update, [
+            {"parcel_id": row.id, "sender_key": _phone_key(row.sender_phone), "receiver_key": _phone_key(row.receiver_phone)}
+            for row in rows
+        ])
+        last_id = rows[-1].id
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # ### commands auto generated by Alembic - please adjust! ###
+    with op.batch_alter_table('parcels', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('sender_phone_key', sa.String(length=32), nullable=True))
+        batch_op.add_column(sa.Column('receiver_phone_key', sa.String(length=32), nullable=True))
+        batch_op.drop_index(batch_op.f('ix_parcels_receiver_phone'))
+        batch_op.drop_index(batch_op.f('ix_parcels_sender_phone_receiver_phone'))
+
+    _backfill_phone_keys()
+
+    with op.batch_alter_table('parcels', schema=None) as batch_op:
+        batch_op.create_index('ix_parcels_receiver_phone_key_created_at', ['receiver_phone_key', 'created_at'], unique=False)
+        batch_op.create_index('ix_parcels_sender_phone_key_created_at', ['sender_phone_key', 'created_at'], unique=False)
+
+    # ### end Alembic commands ###
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # ### commands auto generated by Alembic - please adjust! ###
+    with op.batch_alter_table('parcels', schema=None) as batch_op:
+        batch_op.drop_index('ix_parcels_sender_phone_key_created_at')
+        batch_op.drop_index('ix_parcels_receiver_phone_key_created_at')
+        batch_op.create_index(batch_op.f('ix_parcels_sender_phone_receiver_phone'), ['sender_phone', 'receiver_phone'], unique=False)
+        batch_op.create_index(batch_op.f('ix_parcels_receiver_phone'), ['receiver_phone'], unique=False)
+        batch_op.drop_column('receiver_phone_key')
+        batch_op.drop_column('sender_phone_key')
+
+    # ### end Alembic commands ###
@@ -0,0 +1,25 @@
+"""
+Backfill / repair the daily rollup tables from parcels and payments.
+
+Run from the repo root:
+    PYTHONPATH=backend python backend/rebuild_rollups.py
+"""
+from app.core.config import settings
+from app.db import SessionLocal
+from app.schema import migrate
+from app.services import rollups
+
+
+def main():
+    if settings.db_auto_migrate:
+        migrate()
+    db = SessionLocal()
+    try:
+        rollups.rebuild(db)
+    finally:
+        db.close()
+    print("✅ Rollups rebuilt.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""
+Run the SMS outbox worker as its own process (e.g. with SMS_OUTBOX_WORKER_ENABLED=false
+on the API replicas so only this process talks to the gateway).
+
+Run from the repo root:
+    PYTHONPATH=backend python backend/sms_worker.py
+"""
+import asyncio
+import signal
+
+from app.core.config import settings
+from app.schema import migrate
+from app.services import sms_outbox
+
+
+async def main():
+    if settings.db_auto_migrate:
+        migrate()
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:
+            # Windows: fall back to KeyboardInterrupt
+            pass
+    await sms_outbox.run_worker(stop)
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,76 @@
+"""
+The suite runs against a throwaway SQLite file by default. Set TEST_DATABASE_URL
+to an empty PostgreSQL database to run it there instead; its public schema is
+dropped and recreated first, so never point it at a database you want to keep.
+"""
+import os
+import tempfile
+
+import pytest
+
+_TMP = tempfile.mkdtemp(prefix="fulfillmentea-tests-")
+os.environ["DATABASE_URL"] = os.environ.get("TEST_DATABASE_URL") or f"sqlite:///{_TMP}/test.db"
+os.environ["ASYNC_DATABASE_URL"] = ""
+os.environ["DATABASE_REPLICA_URLS"] = "[]"
+os.environ["MEDIA_DIR"] = f"{_TMP}/media"
+os.environ["SMS_OUTBOX_WORKER_ENABLED"] = "false"
+# Tests poll the live tracking feed themselves
+os.environ["LIVE_TRACKING_ENABLED"] = "false"
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import text  # noqa: E402
+
+from app.db import engine  # noqa: E402
+
+ADMIN = {"full_name": "Test Admin", "phone": "+255700000001", "role": "SUPER_ADMIN", "password": "pw123456"}
+PARCEL = {
+    "sender_name": "Sender",
+    "sender_phone": "+255700000002",
+    "sender_location": "Dar es Salaam",
+    "receiver_name": "Receiver",
+    "receiver_phone": "+255700000003",
+    "receiver_location": "Arusha",
+    "parcel_type": "Box",
+    "value": {"amount": 10, "currency": "TZS"},
+    "amount_paid": {"amount": 5, "currency": "TZS"},
+}
+
+
+def _reset_database() -> None:
+    if engine.dialect.name == "postgresql":
+        with engine.begin() as conn:
+            conn.execute(text("DROP SCHEMA public CASCADE"))
+            conn.execute(text("CREATE SCHEMA public"))
+
+
+_reset_database()
+
+
+@pytest.fixture(scope="session")
+def client():
+    """Client of the app (migrated on startup) logged in as a super admin."""
+    from app.main import app
+
+    with TestClient(app) as test_client:
+        test_client.post("/auth/bootstrap", json=ADMIN)
+        token = test_client.post("/auth/login", json={"phone": ADMIN["phone"], "password": ADMIN["password"]}).json()
+        test_client.headers["Authorization"] = f"Bearer {token['access_token']}"
+        yield test_client
+
+
+@pytest.fixture
+def parcel(client):
+    response = client.post("/parcels", json=PARCEL)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+@pytest.fixture
+def rider(client):
+    phone = f"+2557{len(client.get('/riders').json()):08d}"
+    return ok(client.post("/riders", json={"full_name": "Rider", "phone": phone})).json()
+
+
+def ok(response):
+    assert response.status_code < 400, response.text
+    return response
@@ -0,0 +1,361 @@
+import asyncio
+import json
+import threading
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from sqlalchemy import event
+
+from conftest import ADMIN, PARCEL, ok
+from app.core.config import settings
+from app.db import SessionLocal, async_engine, engine
+from app.models import CacheVersion, DailyParcelStat, Staff
+from app.services import live_tracking
+from app.services.idempotency import MAX_KEY_LENGTH, idempotency_keys
+from app.services.sms_service import sms_service
+from app.services.staff_cache import CACHE_NAME, staff_cache
+
+
+def test_create_and_get_parcel(client, parcel):
+    response = client.get(f"/parcels/{parcel['id']}")
+    assert response.status_code == 200
+    assert response.json()["tracking_number"] == parcel["tracking_number"]
+
+
+@pytest.mark.parametrize("method, path", [
+    ("get", "/parcels/not-a-uuid"),
+    ("get", "/parcels/not-a-uuid/track"),
+    ("post", "/dispatch/not-a-uuid/dispatch"),
+    ("delete", "/riders/not-a-uuid"),
+    ("delete", "/staff/not-a-uuid"),
+])
+def test_malformed_id_is_not_found(client, method, path):
+    assert getattr(client, method)(path).status_code == 404
+
+
+def test_parcel_pages_follow_the_cursor(client):
+    created = {client.post("/parcels", json=PARCEL).json()["id"] for _ in range(5)}
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        page = client.get("/parcels", params=params).json()
+        seen += [item["id"] for item in page["items"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    assert len(seen) == len(set(seen))
+    assert created <= set(seen)
+
+
+@contextmanager
+def executed():
+    """Statements run on the primary engines inside the block."""
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    engines = (engine, async_engine.sync_engine)
+    for bind in engines:
+        event.listen(bind, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        for bind in engines:
+            event.remove(bind, "before_cursor_execute", record)
+
+
+def test_tracking_lookup_is_revalidated_after_a_write(client, parcel):
+    params = {"tracking_number": parcel["tracking_number"]}
+    first = client.get("/tracking/track", params=params)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    with executed() as statements:
+        assert client.get("/tracking/track", params=params, headers={"If-None-Match": etag}).status_code == 304
+        assert client.get("/tracking/track", params=params).content == first.content
+    assert statements == []
+
+    added = client.post(f"/parcels/{parcel['id']}/track", json={"status": "PROCESSING", "location": "Hub"})
+    assert added.status_code == 200
+    second = client.get("/tracking/track", params=params, headers={"If-None-Match": etag})
+    assert second.status_code == 200
+    assert second.json()["history"][-1]["location"] == "Hub"
+
+
+def test_tracking_lookup_is_evicted_by_a_write_on_another_process(client, parcel):
+    params = {"tracking_number": parcel["tracking_number"]}
+    etag = client.get("/tracking/track", params=params).headers["etag"]
+    # What the feed hands over for a write committed elsewhere
+    live_tracking.hub.publish([live_tracking.LiveEvent(0, parcel["id"], "tracking", "{}")])
+    with executed() as statements:
+        assert client.get("/tracking/track", params=params, headers={"If-None-Match": etag}).status_code == 304
+    assert statements, "the lookup was served from the cache after its parcel was written"
+
+
+def test_phone_lookup_moves_to_a_new_parcel(client, parcel):
+    params = {"receiver_phone": PARCEL["receiver_phone"]}
+    ok(client.get("/tracking/track", params=params))
+    newer = ok(client.post("/parcels", json=PARCEL)).json()
+    assert client.get("/tracking/track", params=params).json()["parcel"]["id"] == newer["id"]
+
+
+def test_sync_returns_changes_after_the_cursor(client):
+    page = {"cursor": None, "has_more": True}
+    while page["has_more"]:
+        page = client.get("/sync/changes", params={"since": page["cursor"]} if page["cursor"] else {}).json()
+    cursor = page["cursor"]
+    created = client.post("/parcels", json=PARCEL).json()
+    changes = client.get("/sync/changes", params={"since": cursor, "tables": "parcels"}).json()
+    assert int(changes["cursor"]) > int(cursor)
+    ids = [row[0] for row in changes["changes"]["parcels"]["rows"]]
+    assert created["id"] in ids
+
+
+def _key() -> dict:
+    return {"Idempotency-Key": uuid.uuid4().hex}
+
+
+def test_idempotent_retry_replays_the_first_response(client):
+    headers = _key()
+    first = client.post("/parcels", json=PARCEL, headers=headers)
+    retry = client.post("/parcels", json=PARCEL, headers=headers)
+    assert first.status_code == retry.status_code == 200
+    assert retry.json()["id"] == first.json()["id"]
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert "idempotent-replayed" not in first.headers
+
+
+def test_idempotency_key_reused_for_another_request_is_rejected(client):
+    headers = _key()
+    assert client.post("/parcels", json=PARCEL, headers=headers).status_code == 200
+    other = client.post("/parcels", json={**PARCEL, "sender_name": "Someone else"}, headers=headers)
+    assert other.status_code == 422
+
+
+def test_overlong_idempotency_key_is_rejected(client):
+    response = client.post("/parcels", json=PARCEL, headers={"Idempotency-Key": "k" * (MAX_KEY_LENGTH + 1)})
+    assert response.status_code == 400
+
+
+@pytest.fixture
+def keyed(client):
+    """Post to a handler behind the idempotency middleware, on the app's event loop; returns (send, calls)."""
+    app = FastAPI()
+    calls = []
+
+    @app.middleware("http")
+    async def idempotent(request, call_next):
+        return await idempotency_keys.handle(request, call_next, "tests")
+
+    @app.post("/work")
+    async def work(fail: bool = False, delay: float = 0.0):
+        calls.append(1)
+        await asyncio.sleep(delay)
+        if fail:
+            return JSONResponse({"detail": "boom"}, status_code=503)
+        return {"call": len(calls)}
+
+    def send(headers: dict, *params: dict) -> list:
+        async def post_all():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://tests") as http:
+                return await asyncio.gather(*(http.post("/work", params=p, headers=headers) for p in params))
+
+        return client.portal.call(post_all)
+
+    return send, calls
+
+
+def test_server_error_releases_the_idempotency_key(keyed):
+    send, calls = keyed
+    headers = _key()
+    [failed] = send(headers, {"fail": "true"})
+    assert failed.status_code == 503
+    # Not kept: the retry runs the handler again
+    [retried] = send(headers, {"fail": "true"})
+    assert retried.status_code == 503
+    assert "idempotent-replayed" not in retried.headers
+    assert len(calls) == 2
+
+
+def test_concurrent_retry_waits_for_the_first_request(keyed):
+    send, calls = keyed
+    first, retry = send(_key(), {"delay": "0.3"}, {"delay": "0.3"})
+    assert len(calls) == 1
+    assert first.json() == retry.json() == {"call": 1}
+    assert "true" in (first.headers.get("idempotent-replayed"), retry.headers.get("idempotent-replayed"))
+
+
+def _rollup_counts() -> Counter:
+    """Parcels and dispatched parcels per status in today's daily_parcel_stats rows."""
+    counts = Counter()
+    with SessionLocal() as db:
+        for row in db.query(DailyParcelStat).filter(DailyParcelStat.day == datetime.utcnow().date()):
+            counts[row.status.value, "parcels"] += row.parcels
+            counts[row.status.value, "dispatched"] += row.dispatched
+    return counts
+
+
+def _moved(before: Counter) -> dict:
+    moved = _rollup_counts()
+    moved.subtract(before)
+    return {key: delta for key, delta in moved.items() if delta}
+
+
+def test_assign_and_dispatch_move_the_parcel_between_statuses(client, parcel, rider):
+    path = f"/dispatch/{parcel['id']}"
+    counts = _rollup_counts()
+    ok(client.post(f"{path}/assign", json={"rider_id": rider["id"]}))
+    assert client.get(f"/parcels/{parcel['id']}").json()["current_status"] == "OUT_FOR_DELIVERY"
+    assert _moved(counts) == {("RECEIVED", "parcels"): -1, ("OUT_FOR_DELIVERY", "parcels"): 1}
+
+    counts = _rollup_counts()
+    assert ok(client.post(f"{path}/dispatch")).json() == {"status": "ok"}
+    dispatched = client.get(f"/parcels/{parcel['id']}").json()
+    assert dispatched["current_status"] == "IN_TRANSIT" and dispatched["dispatched"]
+    assert _moved(counts) == {
+        ("OUT_FOR_DELIVERY", "parcels"): -1, ("IN_TRANSIT", "parcels"): 1, ("IN_TRANSIT", "dispatched"): 1,
+    }
+
+    counts = _rollup_counts()
+    assert ok(client.post(f"{path}/dispatch")).json() == {"status": "already_dispatched"}
+    assert _moved(counts) == {}
+
+
+def test_assigning_an_unknown_rider_changes_nothing(client, parcel):
+    counts = _rollup_counts()
+    response = client.post(f"/dispatch/{parcel['id']}/assign", json={"rider_id": "not-a-uuid"})
+    assert response.status_code == 404
+    assert client.get(f"/parcels/{parcel['id']}").json()["current_status"] == "RECEIVED"
+    assert _moved(counts) == {}
+
+
+def test_bulk_sms_reports_failures_by_original_index(client, monkeypatch):
+    phones = [f"+2557000001{i:02d}" for i in range(6)]
+    phones[2] = ""
+    sent = []
+
+    def gateway(request):
+        msisdns = [message["msisdn"] for message in json.loads(request.content)["messages"]]
+        sent.append(msisdns)
+        if phones[3] in msisdns:
+            return httpx.Response(200, json={"status": False})
+        if phones[4] in msisdns:
+            return httpx.Response(200, json={"results": [{"status": "ok"}, {"status": "rejected"}]})
+        return httpx.Response(200, json={"status": True})
+
+    monkeypatch.setattr(settings, "blksms_bulk_chunk_size", 2)
+    monkeypatch.setattr(sms_service, "enabled", True)
+    monkeypatch.setattr(sms_service, "client_id", "test")
+    monkeypatch.setattr(sms_service, "client_secret", "test")
+    monkeypatch.setattr(sms_service, "_async_client", httpx.AsyncClient(transport=httpx.MockTransport(gateway)))
+    messages = [{"phone": phone, "message": f"Message {i}"} for i, phone in enumerate(phones)]
+    result = ok(client.post("/sms/bulk", json={"messages": messages})).json()
+
+    # The invalid number is reported without being sent; its chunk goes out with one message
+    assert sorted(sent) == sorted([phones[0:2], phones[3:4], phones[4:6]])
+    assert result["chunks"] == 3
+    assert (result["success"], result["failed"], result["failed_indices"]) == (3, 3, [2, 3, 5])
+    assert [(r["index"], r["success"]) for r in result["results"]] == [
+        (0, True), (1, True), (2, False), (3, False), (4, True), (5, False),
+    ]
+    assert result["results"][2]["reference"] is None
+    assert all(r["reference"] for i, r in enumerate(result["results"]) if i != 2)
+
+
+def test_staff_cache_is_cleared_when_the_version_is_bumped(client, monkeypatch):
+    monkeypatch.setattr(staff_cache, "version_check", 0.0)
+    with SessionLocal() as db:
+        admin = db.query(Staff).filter(Staff.phone == ADMIN["phone"]).one()
+        staff_cache.get(db, admin.id)
+        staff_cache.put(admin)
+        assert staff_cache.get(db, admin.id) is not None
+    invalidations = staff_cache.invalidations
+
+    # A write in another process only reaches this one through the shared version
+    with SessionLocal() as db:
+        staff_cache.bump_version(db)
+        db.commit()
+    with SessionLocal() as db:
+        assert staff_cache.get(db, admin.id) is None
+    assert staff_cache.invalidations == invalidations + 1
+
+
+def test_concurrent_first_version_bumps_both_count(client):
+    with SessionLocal() as db:
+        db.query(CacheVersion).filter(CacheVersion.name == CACHE_NAME).delete()
+        db.commit()
+    start = threading.Barrier(2)
+    errors = []
+
+    def bump():
+        with SessionLocal() as db:
+            start.wait()
+            try:
+                staff_cache.bump_version(db)
+                db.commit()
+            except Exception as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=bump) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    with SessionLocal() as db:
+        assert db.get(CacheVersion, CACHE_NAME).version == 2
+
+
+def _today() -> dict:
+    """Today (UTC) as a day-aligned range, which analytics answer from the rollup tables."""
+    start = datetime.combine(datetime.utcnow().date(), time.min)
+    return {"date_from": start.isoformat(), "date_to": (start + timedelta(days=1)).isoformat()}
+
+
+def _rollup_and_raw(client, path: str) -> tuple:
+    """An analytics answer for today from the rollups and from the source tables."""
+    today = _today()
+    # Off midnight by a microsecond, the range is answered from the source tables
+    raw = {**today, "date_to": (datetime.fromisoformat(today["date_to"]) + timedelta(microseconds=1)).isoformat()}
+    return ok(client.get(path, params=today)).json(), ok(client.get(path, params=raw)).json()
+
+
+def test_bulk_intake_keeps_the_rollups_in_step(client, rider):
+    before, _ = _rollup_and_raw(client, "/analytics/summary")
+    items = [{**PARCEL, "receiver_phone": f"+2557100000{i:02d}"} for i in range(5)] + [{"sender_name": "Incomplete"}]
+    created = ok(client.post("/parcels/bulk", json={"items": items})).json()
+    assert [e["index"] for e in created["errors"]] == [5]
+    moved = created["created"][0]["id"]
+    ok(client.post(f"/dispatch/{moved}/assign", json={"rider_id": rider["id"]}))
+    ok(client.post(f"/dispatch/{moved}/dispatch"))
+
+    rollup, raw = _rollup_and_raw(client, "/analytics/summary")
+    assert rollup == raw
+    assert rollup["total"] == before["total"] + 5
+    assert rollup["value_total"] == before["value_total"] + 5 * PARCEL["value"]["amount"]
+    for path in ("/analytics/status", "/analytics/staff", "/analytics/volume"):
+        rollup, raw = _rollup_and_raw(client, path)
+        assert rollup == raw, path
+
+
+def test_exports_agree_with_the_rollups(client, parcel):
+    ok(client.post(f"/parcels/{parcel['id']}/payments", json={"amount": 7.5, "currency": "TZS", "method": "CASH"}))
+    today = _today()
+
+    exported = ok(client.get("/export/parcels", params={**today, "format": "ndjson"})).text.splitlines()
+    statuses = Counter(json.loads(line)["current_status"] for line in exported)
+    assert dict(statuses) == ok(client.get("/analytics/status", params=today)).json()["by_status"]
+
+    payments = Counter()
+    for line in ok(client.get("/export/payments", params={**today, "format": "ndjson"})).text.splitlines():
+        row = json.loads(line)
+        payments[row["currency"], row["method"]] += row["amount"]
+    revenue = ok(client.get("/analytics/revenue", params=today)).json()
+    assert dict(payments) == {(r["currency"], r["method"]): r["amount"] for r in revenue}
@@ -0,0 +1,71 @@
+import multiprocessing
+import random
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.services.codes import SAFE_ALPHABET, CodeGenerator, check_char, encode, is_valid_code
+
+STRESS_CODES = 1_000_000
+STRESS_PROCESSES = 8
+
+
+def _allocate(name: str, count: int, block_size: int, seed: int) -> list:
+    """Draw `count` codes from sequence `name`, mixing single codes and batches of random size."""
+    generator = CodeGenerator(name, "TRK", block_size=block_size)
+    rng = random.Random(seed)
+    codes = []
+    while len(codes) < count:
+        if rng.random() < 0.2:
+            codes.append(generator.next())
+        else:
+            codes.extend(generator.next_many(min(rng.randint(1, 500), count - len(codes))))
+    return codes
+
+
+def _assert_unique_and_valid(codes: list, expected: int) -> None:
+    assert len(codes) == expected
+    assert len(set(codes)) == expected, "duplicate codes"
+    invalid = [code for code in codes if not is_valid_code(code, "TRK")]
+    assert not invalid, invalid[:10]
+
+
+def test_check_char_catches_single_substitutions():
+    body = encode(12345, b"key")[:-1]
+    for position in range(len(body)):
+        for replacement in SAFE_ALPHABET:
+            if replacement != body[position]:
+                changed = body[:position] + replacement + body[position + 1:]
+                assert check_char(changed) != check_char(body)
+
+
+def test_is_valid_code_rejects_tampering():
+    code = f"TRK-{encode(42, b'key')}"
+    assert is_valid_code(code, "TRK")
+    assert is_valid_code(code.lower(), "TRK")
+    assert not is_valid_code(code.replace("TRK", "RCPT"), "TRK")
+    assert not is_valid_code(code[:-1] + next(ch for ch in SAFE_ALPHABET if ch != code[-1]), "TRK")
+
+
+def test_codes_widen_past_the_five_character_space():
+    assert len(encode(len(SAFE_ALPHABET) ** 5 - 1, b"key")) == 6
+    assert len(encode(len(SAFE_ALPHABET) ** 5, b"key")) == 7
+
+
+def test_concurrent_threads_share_a_generator(client):
+    generator = CodeGenerator(f"threads-{uuid.uuid4().hex[:8]}", "TRK", block_size=7)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        batches = list(pool.map(lambda size: generator.next_many(size), [1, 3, 50, 2, 9, 100, 1, 13] * 25))
+    _assert_unique_and_valid([code for batch in batches for code in batch], sum([1, 3, 50, 2, 9, 100, 1, 13]) * 25)
+
+
+@pytest.mark.slow
+def test_million_codes_across_processes(client):
+    """Separate processes reserving blocks from one sequence never hand out the same code."""
+    name = f"stress-{uuid.uuid4().hex[:8]}"
+    per_process = STRESS_CODES // STRESS_PROCESSES
+    jobs = [(name, per_process, random.choice([100, 250, 1000]), seed) for seed in range(STRESS_PROCESSES)]
+    with multiprocessing.get_context("spawn").Pool(STRESS_PROCESSES) as pool:
+        results = pool.starmap(_allocate, jobs)
+    _assert_unique_and_valid([code for codes in results for code in codes], STRESS_CODES)
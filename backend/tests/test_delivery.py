@@ -0,0 +1,147 @@
+import json
+import os
+import uuid
+from datetime import datetime, timedelta
+
+from app.core.config import settings
+from app.db import SessionLocal
+from app.models import OTP, DeliveryAttempt, ParcelPhoto
+from app.routers import delivery
+from app.utils.otp import OTP_HASH_PREFIX, expiry_time, hash_otp, verify_otp_code
+from app.utils.security import get_password_hash
+
+CODE = "123456"
+
+
+def issue_otp(parcel_id: str, code_hash: str) -> None:
+    """Make `code_hash` the parcel's active OTP (the newest unconsumed one)."""
+    with SessionLocal() as db:
+        db.add(OTP(parcel_id=parcel_id, code_hash=code_hash, expires_at=expiry_time()))
+        db.commit()
+
+
+def verify(client, parcel_id: str, code: str):
+    return client.post(f"/delivery/{parcel_id}/verify-otp", json={"code": code})
+
+
+def test_otp_hash_is_keyed_and_bound_to_its_parcel():
+    code_hash = hash_otp(CODE, "parcel-a")
+    assert code_hash.startswith(OTP_HASH_PREFIX)
+    assert code_hash != hash_otp(CODE, "parcel-b")
+    assert verify_otp_code(CODE, code_hash, "parcel-a")
+    assert not verify_otp_code("654321", code_hash, "parcel-a")
+    assert not verify_otp_code(CODE, code_hash, "parcel-b")
+
+
+def test_verify_otp_accepts_the_issued_code(client, parcel):
+    issue_otp(parcel["id"], hash_otp(CODE, parcel["id"]))
+    assert verify(client, parcel["id"], CODE).status_code == 200
+    assert client.get(f"/parcels/{parcel['id']}").json()["dispatched"] is True
+
+
+def test_verify_otp_accepts_legacy_bcrypt_rows(client, parcel):
+    issue_otp(parcel["id"], get_password_hash(CODE))
+    assert verify(client, parcel["id"], CODE).status_code == 200
+
+
+def test_wrong_codes_lock_out_verification(client, parcel, monkeypatch):
+    monkeypatch.setattr(settings, "otp_max_attempts", 2)
+    issue_otp(parcel["id"], hash_otp(CODE, parcel["id"]))
+    for _ in range(2):
+        assert verify(client, parcel["id"], "000000").status_code == 400
+    # Rotation replaced the code; even the right code for a fresh OTP is refused now
+    issue_otp(parcel["id"], hash_otp(CODE, parcel["id"]))
+    assert verify(client, parcel["id"], CODE).status_code == 429
+
+
+def test_successful_verifications_do_not_count_towards_the_lockout(client, parcel, monkeypatch):
+    monkeypatch.setattr(settings, "otp_max_attempts", 2)
+    for _ in range(3):
+        issue_otp(parcel["id"], hash_otp(CODE, parcel["id"]))
+        assert verify(client, parcel["id"], CODE).status_code == 200
+    issue_otp(parcel["id"], hash_otp(CODE, parcel["id"]))
+    assert verify(client, parcel["id"], "000000").status_code == 400
+
+
+def event(parcel_id: str, type_: str, data: dict, minutes_ago: float = 1, key: str = None) -> dict:
+    occurred_at = datetime.utcnow() - timedelta(minutes=minutes_ago)
+    return {"key": key or uuid.uuid4().hex, "type": type_, "parcel_id": parcel_id,
+            "occurred_at": occurred_at.isoformat(), "data": data}
+
+
+def upload_events(client, events: list, files: list = ()):
+    response = client.post("/delivery/events", data={"events": json.dumps(events)},
+                           files=[("files", (name, content, "image/jpeg")) for name, content in files])
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def attempts_of(parcel_id: str) -> int:
+    with SessionLocal() as db:
+        return db.query(DeliveryAttempt).filter(DeliveryAttempt.parcel_id == parcel_id).count()
+
+
+def test_duplicate_keys_within_a_batch_apply_once(client, parcel):
+    attempt = event(parcel["id"], "attempt", {"status": "FAILED"})
+    body = upload_events(client, [attempt, attempt])
+    assert [r["status"] for r in body["results"]] == ["applied", "duplicate"]
+    assert body["results"][1]["result"] == body["results"][0]["result"]
+    assert attempts_of(parcel["id"]) == 1
+
+
+def test_resent_batch_is_answered_from_the_first_outcome(client, parcel):
+    batch = [event(parcel["id"], "attempt", {"status": "FAILED"})]
+    first = upload_events(client, batch)
+    again = upload_events(client, batch)
+    assert again["duplicates"] == 1 and again["applied"] == 0
+    assert again["results"][0]["result"] == first["results"][0]["result"]
+    assert attempts_of(parcel["id"]) == 1
+
+
+def test_events_apply_in_occurred_at_order(client, parcel):
+    issue_otp(parcel["id"], hash_otp(CODE, parcel["id"]))
+    # Sent first but entered last: the wrong code before it rotated the OTP
+    right = event(parcel["id"], "verify_otp", {"code": CODE}, minutes_ago=5)
+    wrong = event(parcel["id"], "verify_otp", {"code": "000000"}, minutes_ago=10)
+    results = upload_events(client, [right, wrong])["results"]
+    assert results[1]["status"] == "rejected" and results[1]["detail"].startswith("Invalid OTP")
+    assert results[0]["status"] == "rejected" and results[0]["code"] == 400
+
+
+def test_unknown_parcel_is_rejected_with_404(client):
+    body = upload_events(client, [
+        event(str(uuid.uuid4()), "attempt", {"status": "FAILED"}),
+        event("not-a-uuid", "attempt", {"status": "FAILED"}),
+    ])
+    assert [(r["status"], r["code"]) for r in body["results"]] == [("rejected", 404)] * 2
+
+
+def test_photo_without_its_upload_part_is_rejected(client, parcel):
+    body = upload_events(client, [event(parcel["id"], "photo", {"type": "DELIVERED", "file": "missing.jpg"})])
+    assert (body["results"][0]["status"], body["results"][0]["code"]) == ("rejected", 400)
+
+
+def test_photo_is_stored_with_its_row(client, parcel):
+    body = upload_events(client, [event(parcel["id"], "photo", {"type": "DELIVERED", "file": "door.jpg"})],
+                         files=[("door.jpg", b"jpeg")])
+    with SessionLocal() as db:
+        photo = db.get(ParcelPhoto, body["results"][0]["result"]["photo_id"])
+    assert open(photo.file_path, "rb").read() == b"jpeg"
+
+
+def test_rolled_back_batch_leaves_no_photo_files(client, parcel, monkeypatch):
+    apply = delivery._apply_rider_event
+
+    def fail_attempts(db, parcel, event, uploads, saved):
+        if event.type == "attempt":
+            raise RuntimeError("database went away")
+        return apply(db, parcel, event, uploads, saved)
+
+    monkeypatch.setattr(delivery, "_apply_rider_event", fail_attempts)
+    before = set(os.listdir(settings.media_dir)) if os.path.isdir(settings.media_dir) else set()
+    body = upload_events(client, [
+        event(parcel["id"], "photo", {"type": "DELIVERED", "file": "door.jpg"}, minutes_ago=2),
+        event(parcel["id"], "attempt", {"status": "FAILED"}, minutes_ago=1),
+    ], files=[("door.jpg", b"jpeg")])
+    assert [r["status"] for r in body["results"]] == ["error", "error"]
+    assert set(os.listdir(settings.media_dir)) == before
@@ -0,0 +1,40 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from conftest import ok
+from app.db import SessionLocal
+from app.models import Assignment
+from app.services import parquet_export
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+
+def test_reassignment_on_another_day_keeps_one_row(client, parcel, rider, tmp_path):
+    assignment = ok(client.post(f"/dispatch/{parcel['id']}/assign", json={"rider_id": rider["id"]})).json()
+    two_days_ago = datetime.utcnow() - timedelta(days=2)
+    with SessionLocal() as db:
+        db.query(Assignment).filter(Assignment.id == assignment["id"]).update(
+            {"created_at": two_days_ago, "assigned_at": two_days_ago, "updated_at": two_days_ago})
+        db.commit()
+    parquet_export.export_all(str(tmp_path))
+
+    # Reassigning rewrites assigned_at to today; the incremental run re-exports the row
+    ok(client.post(f"/dispatch/{parcel['id']}/assign", json={"rider_id": rider["id"]}))
+    parquet_export.export_all(str(tmp_path))
+
+    exported = pq.read_table(tmp_path / "assignments").to_pylist()
+    copies = [row for row in exported if row["id"] == assignment["id"]]
+    assert len(copies) == 1
+    assert copies[0]["assigned_at"].date() == datetime.utcnow().date()
+    assert copies[0]["day"] == two_days_ago.date().isoformat()
+
+
+def test_full_run_drops_rows_that_no_longer_exist(client, parcel, tmp_path):
+    stale = tmp_path / "parcels" / "day=2000-01-01"
+    stale.mkdir(parents=True)
+    (stale / "data.parquet").write_bytes(b"")
+    parquet_export.export_all(str(tmp_path), full=True)
+    assert not stale.exists()
+    ids = {row["id"] for row in pq.read_table(tmp_path / "parcels").to_pylist()}
+    assert parcel["id"] in ids
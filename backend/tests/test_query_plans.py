@@ -0,0 +1,208 @@
+"""
+Query-plan regression tests: each case drives real routes or services, records
+the statements they execute and fails if SQLite's EXPLAIN QUERY PLAN for any of
+them scans a whole table, or sorts for an ORDER BY that an index should serve.
+"""
+import json
+
+import pytest
+from sqlalchemy import event
+
+from conftest import PARCEL, ok
+from app.db import AsyncSessionLocal, Base, SessionLocal, async_engine, engine
+from app.services import live_tracking, parquet_export, sms_outbox
+from app.services.change_log import Compactor
+from app.services.idempotency import idempotency_keys
+
+pytestmark = pytest.mark.skipif(engine.dialect.name != "sqlite", reason="EXPLAIN QUERY PLAN is SQLite's")
+
+TABLES = set(Base.metadata.tables)
+WEEK = {"date_from": "2026-01-01T06:00:00", "date_to": "2026-01-08T06:00:00"}
+
+
+@pytest.fixture
+def statements(client):
+    """SELECT/UPDATE/DELETE statements executed on the sync or async engine during the test."""
+    captured = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+            captured.append((statement, tuple(parameters or ())))
+
+    engines = (engine, async_engine.sync_engine)
+    for bind in engines:
+        event.listen(bind, "before_cursor_execute", record)
+    yield captured
+    for bind in engines:
+        event.remove(bind, "before_cursor_execute", record)
+
+
+def plan_problems(statement: str, parameters: tuple, allow_sort: bool) -> tuple:
+    """The EXPLAIN QUERY PLAN details of a statement and those that are problems."""
+    with engine.connect() as conn:
+        plan = [(row[0], row[1], row[-1]) for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+    problems = [
+        detail for _, _, detail in plan
+        if detail.startswith("SCAN ") and detail.split()[1] in TABLES and "USING" not in detail
+    ]
+    if not allow_sort:
+        # Re-sorting the rows of a subquery (e.g. a LIMITed page wrapped for eager loading) is fine
+        sorts_subquery = {
+            parent for _, parent, detail in plan if detail.startswith("SCAN ") and detail.split()[1] not in TABLES
+        }
+        problems += [
+            detail for _, parent, detail in plan
+            if detail.startswith("USE TEMP B-TREE FOR ORDER BY") and parent not in sorts_subquery
+        ]
+    return [detail for _, _, detail in plan], problems
+
+
+def assert_indexed(statements, allow_sort: bool = False, uses: tuple = ()) -> None:
+    """No statement scans a table (or sorts, unless `allow_sort`); the indexes in `uses` serve some of them."""
+    assert statements, "nothing was executed"
+    failures, details = {}, []
+    for statement, parameters in dict.fromkeys(statements):
+        plan, problems = plan_problems(statement, parameters, allow_sort)
+        details += plan
+        if problems:
+            failures[" ".join(statement.split())] = problems
+    assert not failures, failures
+    unused = [index for index in uses if not any(f"INDEX {index} " in f"{detail} " for detail in details)]
+    assert not unused, (unused, details)
+
+
+@pytest.mark.parametrize("params, index", [
+    ({}, "ix_parcels_created_at_id"),
+    ({"status": "RECEIVED"}, "ix_parcels_status_created_at_id"),
+    ({"delivery_outcome": "PENDING"}, "ix_parcels_outcome_created_at_id"),
+    ({"dispatched": "false"}, "ix_parcels_dispatched_created_at_id"),
+    ({"delivered": "false"}, "ix_parcels_delivered_created_at_id"),
+    ({"include_assignment": "true"}, "ix_parcels_created_at_id"),
+    (WEEK, "ix_parcels_created_at_id"),
+])
+def test_parcel_list(client, parcel, statements, params, index):
+    ok(client.post("/parcels", json=PARCEL))
+    first = ok(client.get("/parcels", params={"limit": 1, **params})).json()
+    if first["next_cursor"]:
+        ok(client.get("/parcels", params={"limit": 1, "cursor": first["next_cursor"], **params}))
+    assert_indexed(statements, uses=(index,))
+
+
+def test_parcel_list_by_receiver(client, parcel, statements):
+    ok(client.get("/parcels", params={"received_by_id": parcel["received_by_id"]}))
+    assert_indexed(statements, uses=("ix_parcels_received_by_created_at_id",))
+
+
+def test_parcel_timeline(client, parcel, statements):
+    ok(client.post(f"/parcels/{parcel['id']}/track", json={"status": "PROCESSING", "location": "Hub"}))
+    ok(client.get(f"/parcels/{parcel['id']}/track"))
+    ok(client.get(f"/tracking/parcel/{parcel['id']}"))
+    assert_indexed(statements)
+
+
+@pytest.mark.parametrize("params, index", [
+    ({"tracking_number": "number"}, "ix_parcels_tracking_number"),
+    ({"sender_phone": PARCEL["sender_phone"]}, "ix_parcels_sender_phone_key_created_at"),
+    ({"receiver_phone": PARCEL["receiver_phone"]}, "ix_parcels_receiver_phone_key_created_at"),
+])
+def test_public_tracking(client, parcel, statements, params, index):
+    if "tracking_number" in params:
+        params = {"tracking_number": parcel["tracking_number"]}
+    ok(client.get("/tracking/track", params=params))
+    assert_indexed(statements, uses=(index, "ix_tracking_history_parcel_created_at"))
+
+
+def test_public_tracking_by_both_phones(client, parcel, statements):
+    ok(client.get("/tracking/track", params={"sender_phone": PARCEL["sender_phone"], "receiver_phone": PARCEL["receiver_phone"]}))
+    assert_indexed(statements)
+
+
+def test_dispatch_and_delivery(client, parcel, rider, statements):
+    ok(client.post(f"/dispatch/{parcel['id']}/assign", json={"rider_id": rider["id"]}))
+    ok(client.post(f"/dispatch/{parcel['id']}/dispatch"))
+    ok(client.get(f"/delivery/{parcel['id']}/info"))
+    assert client.post(f"/delivery/{parcel['id']}/verify-otp", json={"code": "000000"}).status_code == 400
+    ok(client.post(f"/delivery/{parcel['id']}/mark-failed", params={"reason": "Not home"}))
+    assert_indexed(statements, uses=(
+        "ix_otps_parcel_consumed_created", "ix_otps_parcel_failed_at", "ix_assignments_parcel_assigned_at",
+    ))
+
+
+def test_login_and_inventory(client, statements):
+    ok(client.post("/auth/login", json={"phone": "+255700000001", "password": "pw123456"}))
+    ok(client.get("/inventory"))
+    assert_indexed(statements, uses=("ix_staff_phone", "ix_inventory_items_is_active"))
+
+
+@pytest.mark.parametrize("path", ["/analytics/summary", "/analytics/status", "/analytics/revenue", "/analytics/activity"])
+def test_raw_analytics(client, parcel, statements, path):
+    # Not day-aligned, so answered from the base tables instead of the rollups
+    ok(client.get(path, params=WEEK))
+    assert_indexed(statements, allow_sort=True)
+
+
+@pytest.mark.parametrize("dataset, params", [
+    ("parcels", WEEK),
+    ("tracking", {}),
+    ("payments", {"date_to": WEEK["date_to"]}),
+    ("receipts", {}),
+])
+def test_export(client, parcel, statements, dataset, params):
+    ok(client.get(f"/export/{dataset}", params={"format": "ndjson", **params}))
+    assert_indexed(statements)
+
+
+def test_parquet_export(client, parcel, rider, statements, tmp_path):
+    # A row in every exported table, so each has a watermark after the first run
+    ok(client.post(f"/parcels/{parcel['id']}/payments", json={"amount": 5, "method": "CASH"}))
+    ok(client.post(f"/dispatch/{parcel['id']}/assign", json={"rider_id": rider["id"]}))
+    ok(client.post(f"/delivery/{parcel['id']}/attempts", json={"status": "FAILED", "rider_id": rider["id"]}))
+    parquet_export.export_all(str(tmp_path))
+    # Only the incremental run has to use indexes; the first one reads everything
+    statements.clear()
+    ok(client.post("/parcels", json=PARCEL))
+    parquet_export.export_all(str(tmp_path))
+    assert_indexed(statements, allow_sort=True)
+
+
+def test_live_tracking_feed(client, parcel, statements):
+    subscription = live_tracking.hub.subscribe()
+    subscription.add(parcel["id"])
+    try:
+        live_tracking.hub._pruned_at = 0.0
+        live_tracking.hub.poll()
+        ok(client.post(f"/parcels/{parcel['id']}/track", json={"status": "PROCESSING", "location": "Hub"}))
+        live_tracking.hub.publish(live_tracking.hub.poll())
+        received = []
+        while not subscription.queue.empty():
+            received.append(json.loads(subscription.queue.get_nowait().payload))
+    finally:
+        subscription.close()
+    assert [event["status"] for event in received if event["parcel_id"] == parcel["id"]] == ["PROCESSING"]
+
+    async def replay():
+        async with AsyncSessionLocal() as db:
+            await live_tracking.replay(db, parcel["id"], 1)
+
+    client.portal.call(replay)
+    assert_indexed(statements, uses=("ix_parcel_events_parcel_id_id", "ix_parcel_events_created_at"))
+
+
+def test_delta_sync_and_compaction(client, parcel, statements):
+    ok(client.get("/sync/changes", params={"since": "1", "tables": "parcels,riders"}))
+    Compactor().compact()
+    assert_indexed(statements, uses=("ix_change_log_entity_entity_id_seq",))
+
+
+def test_idempotency_prune(client, statements):
+    idempotency_keys._pruned_at = 0.0
+    ok(client.post("/parcels", json=PARCEL, headers={"Idempotency-Key": "query-plan-prune"}))
+    assert_indexed(statements, uses=("ix_idempotency_keys_created_at",))
+
+
+def test_sms_outbox_claim(client, statements):
+    with SessionLocal() as db:
+        sms_outbox.enqueue_sms(db, "+255700000003", "Query plan check")
+        db.commit()
+    sms_outbox.drain_once(worker_id="plans")
+    assert_indexed(statements, allow_sort=True, uses=("ix_sms_outbox_status_next_attempt",))
@@ -0,0 +1,109 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.core.config import settings
+from app.services.sms_service import BlkSMSService
+from app.utils.resilience import CircuitBreaker, TokenBucket
+
+PAYLOAD = {"messages": [{"source": "SENDER", "msisdn": "+255700000001", "text": "Hi"}]}
+
+
+def gateway(handler) -> BlkSMSService:
+    """An enabled service whose async client answers with `handler` instead of the network."""
+    service = BlkSMSService()
+    service.enabled = True
+    service.client_id = service.client_secret = "test"
+    service.base_url = "http://gateway"
+    service._async_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return service
+
+
+def half_open(service: BlkSMSService) -> None:
+    service.breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    service.breaker.record_failure()
+    assert service.breaker.state == CircuitBreaker.HALF_OPEN
+
+
+def send(service: BlkSMSService):
+    return service._make_request_async("/api/sms/send", PAYLOAD)
+
+
+def test_breaker_opens_after_the_threshold():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    assert breaker.snapshot()["rejected"] == 1
+
+
+def test_half_open_lets_a_single_probe_through():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow() and breaker.allow()
+
+
+def test_client_errors_do_not_trip_the_breaker():
+    status = {"code": 400}
+    service = gateway(lambda request: httpx.Response(status["code"], json={"status": False}))
+
+    async def run(times):
+        return [await send(service) for _ in range(times)]
+
+    rejected = settings.blksms_breaker_failure_threshold * 2
+    assert asyncio.run(run(rejected)) == [None] * rejected
+    assert service.breaker.state == CircuitBreaker.CLOSED
+    status["code"] = 503
+    asyncio.run(run(settings.blksms_breaker_failure_threshold))
+    assert service.breaker.state == CircuitBreaker.OPEN
+
+
+def test_reserve_refuses_waits_past_max_wait():
+    bucket = TokenBucket(rate=1, burst=1)
+    assert bucket.reserve(1) == 0.0
+    assert bucket.reserve(1, max_wait=0.5) is None
+    assert 0.5 < bucket.reserve(1, max_wait=2) <= 1.0
+    assert bucket.snapshot()["rejected"] == 1
+
+
+def test_rate_limited_request_is_dropped_and_releases_the_probe(monkeypatch):
+    monkeypatch.setattr(settings, "blksms_rate_limit_per_second", 1.0)
+    monkeypatch.setattr(settings, "blksms_rate_limit_burst", 1)
+    monkeypatch.setattr(settings, "blksms_rate_limit_max_wait_seconds", 0.1)
+    calls = []
+    service = gateway(lambda request: calls.append(request) or httpx.Response(200, json={"status": True}))
+    service._rate_limiter("SENDER").reserve(1)
+    half_open(service)
+
+    assert asyncio.run(send(service)) is None
+    assert calls == []
+    assert service.breaker.allow(), "the half-open probe was not given back"
+
+
+def test_cancelled_probe_is_released():
+    async def slow(request):
+        await asyncio.sleep(60)
+        return httpx.Response(200, json={"status": True})
+
+    service = gateway(slow)
+    half_open(service)
+
+    async def cancel_probe():
+        probe = asyncio.create_task(send(service))
+        await asyncio.sleep(0.05)
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+
+    asyncio.run(cancel_probe())
+    assert service.breaker.allow(), "a cancelled probe kept the circuit half-open forever"
@@ -14,7 +14,7 @@ class APIClient:
         self.timeout = timeout
         self.session = requests.Session()
     
-    def get(self, path: str, token: str = None):
+    def get(self, path: str, token: str = None, params: dict = None):
         headers = {}
         if token:
             headers["Authorization"] = f"Bearer {token}"
@@ -22,11 +22,21 @@ class APIClient:
         resp = self.session.get(
             f"{self.base_url}{path}", 
             headers=headers, 
+            params=params,
             timeout=self.timeout
         )
         resp.raise_for_status()
         return resp.json()
     
+    def get_page(self, path: str, token: str = None, params: dict = None, cursor: str = None, limit: int = None):
+        """Fetch one page of a keyset-paginated listing: {"items": [...], "next_cursor": ...}"""
+        params = {key: value for key, value in (params or {}).items() if value is not None}
+        if limit:
+            params["limit"] = limit
+        if cursor:
+            params["cursor"] = cursor
+        return self.get(path, token, params)
+    
     def post(self, path: str, json: dict = None, token: str = None):
         headers = {"Content-Type": "application/json"}
         if token:
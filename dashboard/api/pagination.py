@@ -0,0 +1,40 @@
+import streamlit as st
+import sys
+import os
+
+# Add dashboard root to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import LIST_PAGE_SIZE
+from api.client import api_client
+
+
+def paged_listing(key: str, path: str, token: str, params: dict = None, page_size: int = LIST_PAGE_SIZE) -> list:
+    """
+    Fetch and return the items of the current page of a keyset-paginated listing,
+    with Previous/Next controls below it. Filters go to the API in `params`; the
+    cursors of the pages visited are kept in session state under `key` and reset
+    whenever the filters change.
+    """
+    ss = st.session_state
+    cursors_key, params_key = f"{key}_cursors", f"{key}_params"
+    params = {name: value for name, value in (params or {}).items() if value is not None}
+    if ss.get(params_key) != params:
+        ss[params_key] = params
+        ss[cursors_key] = [None]
+
+    cursors = ss[cursors_key]
+    page = api_client.get_page(path, token, params, cursor=cursors[-1], limit=page_size)
+
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        if st.button("⬅️ Previous", key=f"{key}_prev", disabled=len(cursors) == 1):
+            cursors.pop()
+            st.rerun()
+    with col2:
+        st.caption(f"Page {len(cursors)} · {len(page['items'])} rows")
+    with col3:
+        if st.button("Next ➡️", key=f"{key}_next", disabled=not page.get("next_cursor")):
+            cursors.append(page["next_cursor"])
+            st.rerun()
+    return page["items"]
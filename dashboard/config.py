@@ -8,3 +8,4 @@ REQUEST_TIMEOUT = 30  # seconds
 PAGE_TITLE = "Fulfillmentea Admin Dashboard"
 PAGE_ICON = "📦"
 LAYOUT = "wide"
+LIST_PAGE_SIZE = 50  # rows per page in paginated listings
@@ -1,7 +1,6 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-import plotly.graph_objects as go
 import sys
 import os
 
@@ -16,107 +15,83 @@ def render_analytics(token: str):
     st.title("Analytics & Performance")
     
     try:
-        # Fetch data
-        parcels = api_client.get("/parcels", token)
-        staff_list = api_client.get("/staff", token)
-        riders = api_client.get("/riders", token)
+        # Fetch pre-aggregated data
+        summary = api_client.get("/analytics/summary", token)
         
-        if not parcels:
+        if not summary["total"]:
             st.info("No parcel data available for analytics.")
             return
         
-        df = pd.DataFrame(parcels)
-        df['received_at'] = pd.to_datetime(df['received_at'])
-        df['dispatched_at'] = pd.to_datetime(df['dispatched_at'])
-        df['delivered_at'] = pd.to_datetime(df['delivered_at'])
-        
         # Delivery Performance Analysis
         st.header("Delivery Performance")
         
         # Success rate by day
         col1, col2 = st.columns(2)
         with col1:
-            daily_success = df.groupby(df['received_at'].dt.date).agg({
-                'delivery_outcome': lambda x: (x == 'SUCCESS').sum(),
-                'id': 'count'
-            }).reset_index()
-            daily_success.columns = ['date', 'successful', 'total']
-            daily_success['success_rate'] = (daily_success['successful'] / daily_success['total'] * 100)
+            daily_success = pd.DataFrame(api_client.get("/analytics/volume", token, {"bucket": "day"}))
             
-            fig = px.line(daily_success, x='date', y='success_rate', 
+            fig = px.line(daily_success, x='period', y='success_rate', 
                          title='Daily Delivery Success Rate (%)')
             st.plotly_chart(fig, use_container_width=True)
         
         with col2:
             # Outcome distribution
-            outcome_counts = df['delivery_outcome'].value_counts()
-            fig = px.pie(values=outcome_counts.values, names=outcome_counts.index, 
+            outcome_counts = api_client.get("/analytics/status", token)["by_outcome"]
+            fig = px.pie(values=list(outcome_counts.values()), names=list(outcome_counts.keys()), 
                         title='Overall Delivery Outcomes')
             st.plotly_chart(fig, use_container_width=True)
         
         # Staff Performance
         st.header("Staff Performance Analysis")
         
-        if staff_list:
-            staff_df = pd.DataFrame(staff_list)
+        staff_performance = pd.DataFrame(api_client.get("/analytics/staff", token))
+        
+        if not staff_performance.empty:
+            col1, col2 = st.columns(2)
             
-            # Parcels handled per staff member
-            staff_performance = df.groupby('received_by_id').size().reset_index(name='parcels_handled')
-            staff_performance = staff_performance.merge(
-                staff_df[['id', 'full_name', 'role']], 
-                left_on='received_by_id', 
-                right_on='id', 
-                how='left'
-            )
+            with col1:
+                fig = px.bar(staff_performance, x='full_name', y='parcels_handled', 
+                            color='role', title='Parcels Handled by Staff')
+                st.plotly_chart(fig, use_container_width=True)
             
-            if not staff_performance.empty:
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    fig = px.bar(staff_performance, x='full_name', y='parcels_handled', 
-                                color='role', title='Parcels Handled by Staff')
-                    st.plotly_chart(fig, use_container_width=True)
-                
-                with col2:
-                    # Role performance
-                    role_performance = staff_performance.groupby('role')['parcels_handled'].mean().reset_index()
-                    fig = px.bar(role_performance, x='role', y='parcels_handled', 
-                                title='Average Parcels per Role')
-                    st.plotly_chart(fig, use_container_width=True)
+            with col2:
+                # Role performance
+                role_performance = staff_performance.groupby('role')['parcels_handled'].mean().reset_index()
+                fig = px.bar(role_performance, x='role', y='parcels_handled', 
+                            title='Average Parcels per Role')
+                st.plotly_chart(fig, use_container_width=True)
         
         # Time Analysis
         st.header("Time Analysis")
         
         # Delivery time analysis
-        delivery_df = df[df['delivered'] == True].copy()
-        if not delivery_df.empty:
-            delivery_df['delivery_time'] = (
-                delivery_df['delivered_at'] - delivery_df['received_at']
-            ).dt.total_seconds() / 3600  # Convert to hours
-            
+        delivery_times = api_client.get("/analytics/delivery-times", token, {"bins": 20})
+        if delivery_times["count"]:
             col1, col2 = st.columns(2)
             
             with col1:
-                fig = px.histogram(delivery_df, x='delivery_time', 
-                                 title='Delivery Time Distribution (Hours)',
-                                 nbins=20)
+                histogram = pd.DataFrame(delivery_times["histogram"])
+                histogram['hours'] = histogram['start'].round(1)
+                fig = px.bar(histogram, x='hours', y='count', 
+                             title='Delivery Time Distribution (Hours)')
                 st.plotly_chart(fig, use_container_width=True)
             
             with col2:
-                avg_delivery_time = delivery_df['delivery_time'].mean()
-                st.metric("Average Delivery Time", f"{avg_delivery_time:.1f} hours")
+                st.metric("Average Delivery Time", f"{delivery_times['average_hours']:.1f} hours")
+                percentiles = delivery_times["percentiles"]
+                st.write(f"**Median:** {percentiles['p50']:.1f} h • **P90:** {percentiles['p90']:.1f} h • **P95:** {percentiles['p95']:.1f} h")
                 
                 # Fastest and slowest deliveries
-                fastest = delivery_df.loc[delivery_df['delivery_time'].idxmin()]
-                slowest = delivery_df.loc[delivery_df['delivery_time'].idxmax()]
+                fastest = delivery_times["fastest"]
+                slowest = delivery_times["slowest"]
                 
                 st.write("**Fastest Delivery:**")
                 st.write(f"• {fastest['sender_name']} → {fastest['receiver_name']}")
-                st.write(f"• Time: {fastest['delivery_time']:.1f} hours")
+                st.write(f"• Time: {fastest['hours']:.1f} hours")
                 
                 st.write("**Slowest Delivery:**")
                 st.write(f"• {slowest['sender_name']} → {slowest['receiver_name']}")
-                st.write(f"• Time: {slowest['delivery_time']:.1f} hours")
+                st.write(f"• Time: {slowest['hours']:.1f} hours")
         
         # Financial Analysis
         st.header("Financial Analysis")
@@ -125,26 +100,28 @@ def render_analytics(token: str):
         
         with col1:
             # Value distribution
-            fig = px.histogram(df, x='value_amount', title='Parcel Value Distribution',
-                             nbins=20)
-            st.plotly_chart(fig, use_container_width=True)
+            values = pd.DataFrame(api_client.get("/analytics/values", token, {"bins": 20})["histogram"])
+            if not values.empty:
+                values['value'] = values['start'].round(2)
+                fig = px.bar(values, x='value', y='count', title='Parcel Value Distribution')
+                st.plotly_chart(fig, use_container_width=True)
         
         with col2:
-            # Payment vs Value
-            df['profit_margin'] = df['amount_paid_amount'] - df['value_amount']
-            fig = px.scatter(df, x='value_amount', y='amount_paid_amount', 
-                           title='Payment vs Value',
-                           color='delivery_outcome')
-            st.plotly_chart(fig, use_container_width=True)
+            # Recorded payments over time
+            revenue = pd.DataFrame(api_client.get("/analytics/revenue", token, {"bucket": "day"}))
+            if not revenue.empty:
+                fig = px.bar(revenue, x='period', y='amount', color='method',
+                           title='Payments Received per Day')
+                st.plotly_chart(fig, use_container_width=True)
         
         # Summary metrics
         st.header("Summary Metrics")
         
         col1, col2, col3, col4 = st.columns(4)
-        col1.metric("Total Revenue", f"${df['amount_paid_amount'].sum():,.2f}")
-        col2.metric("Total Parcel Value", f"${df['value_amount'].sum():,.2f}")
-        col3.metric("Average Parcel Value", f"${df['value_amount'].mean():,.2f}")
-        col4.metric("Success Rate", f"{(df['delivery_outcome'] == 'SUCCESS').mean() * 100:.1f}%")
+        col1.metric("Total Revenue", f"${summary['revenue']:,.2f}")
+        col2.metric("Total Parcel Value", f"${summary['value_total']:,.2f}")
+        col3.metric("Average Parcel Value", f"${summary['value_average']:,.2f}")
+        col4.metric("Success Rate", f"{summary['success_rate']:.1f}%")
         
     except Exception as e:
         st.error(f"Error loading analytics data: {str(e)}")
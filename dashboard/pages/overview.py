@@ -15,39 +15,37 @@ def render_overview(token: str):
     st.title("Operations Overview")
     
     try:
-        # Fetch data
-        parcels = api_client.get("/parcels", token)
+        # Fetch pre-aggregated data
+        summary = api_client.get("/analytics/summary", token)
         
         # KPIs
         col1, col2, col3, col4, col5 = st.columns(5)
-        col1.metric("Total Parcels", len(parcels))
-        col2.metric("Dispatched", sum(1 for p in parcels if p["dispatched"]))
-        col3.metric("Delivered", sum(1 for p in parcels if p["delivered"]))
-        col4.metric("Failures", sum(1 for p in parcels if p.get("delivery_outcome") == "FAILED"))
-        col5.metric("Pending", sum(1 for p in parcels if p.get("delivery_outcome") == "PENDING"))
+        col1.metric("Total Parcels", summary["total"])
+        col2.metric("Dispatched", summary["dispatched"])
+        col3.metric("Delivered", summary["delivered"])
+        col4.metric("Failures", summary["failed"])
+        col5.metric("Pending", summary["pending"])
         
-        if parcels:
-            df = pd.DataFrame(parcels)
-            df['received_at'] = pd.to_datetime(df['received_at'])
-            
+        if summary["total"]:
             # Time series chart
             st.subheader("📈 Parcels Received Per Day")
-            timeseries = df.groupby(df['received_at'].dt.date).size().reset_index(name='count')
-            fig1 = px.bar(timeseries, x='received_at', y='count', 
+            timeseries = pd.DataFrame(api_client.get("/analytics/volume", token, {"bucket": "day"}))
+            fig1 = px.bar(timeseries, x='period', y='total', 
                          title='Daily Parcel Volume')
             st.plotly_chart(fig1, use_container_width=True)
             
             # Delivery outcomes pie chart
             st.subheader("🎯 Delivery Outcomes")
-            outcome_counts = df['delivery_outcome'].value_counts().reset_index()
-            outcome_counts.columns = ['outcome', 'count']
+            by_outcome = api_client.get("/analytics/status", token)["by_outcome"]
+            outcome_counts = pd.DataFrame(list(by_outcome.items()), columns=['outcome', 'count'])
             fig2 = px.pie(outcome_counts, names='outcome', values='count', 
                          title='Delivery Success Rate')
             st.plotly_chart(fig2, use_container_width=True)
             
             # Status timeline
             st.subheader("📅 Recent Activity")
-            recent = df.nlargest(10, 'received_at')[['id', 'sender_name', 'receiver_name', 'current_status', 'received_at']]
+            recent_parcels = api_client.get("/parcels", token, {"limit": 10})["items"]
+            recent = pd.DataFrame(recent_parcels)[['id', 'sender_name', 'receiver_name', 'current_status', 'received_at']]
             st.dataframe(recent, use_container_width=True)
             
     except Exception as e:
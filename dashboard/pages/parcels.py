@@ -7,6 +7,13 @@ from typing import Dict, Any
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from api.client import api_client
+from api.pagination import paged_listing
+
+PARCEL_STATUSES = [
+    "RECEIVED", "PROCESSING", "IN_TRANSIT", "ARRIVED_AT_HUB", "OUT_FOR_DELIVERY",
+    "DELIVERY_ATTEMPTED", "DELIVERED", "RETURNED", "CANCELLED",
+]
+YES_NO = {"All": None, "Yes": True, "No": False}
 
 def format_currency(amount: float, currency: str) -> str:
     """Format currency amount"""
@@ -95,30 +102,83 @@ def create_parcel_form():
                 
                 result = api_client.post("/parcels", payload, token=st.session_state.token)
                 st.success(f"✅ Parcel created successfully! ID: {result['id']}")
-                        st.rerun()
+                st.rerun()
                 
-                    except Exception as e:
+            except Exception as e:
                 st.error(f"❌ Failed to create parcel: {str(e)}")
 
-def assign_rider_form(parcel_id: str, riders: list):
+BULK_COLUMNS = [
+    "sender_name", "sender_phone", "sender_location", "receiver_name", "receiver_phone",
+    "receiver_location", "parcel_type", "value_amount", "value_currency", "amount_paid",
+    "amount_currency", "special_instructions",
+]
+
+
+def bulk_parcel_upload():
+    """Create many parcels from a CSV in a single request"""
+    st.subheader("📥 Bulk Intake")
+    st.caption("CSV columns: " + ", ".join(BULK_COLUMNS) + ". Phone numbers include the country code.")
+    
+    uploaded = st.file_uploader("Parcels CSV", type=["csv"], key="bulk_parcels_csv")
+    if not uploaded:
+        return
+    
+    df = pd.read_csv(uploaded, dtype=str).fillna("")
+    missing = [col for col in BULK_COLUMNS if col not in df.columns and col != "special_instructions"]
+    if missing:
+        st.error(f"Missing columns: {', '.join(missing)}")
+        return
+    st.write(f"{len(df)} parcels ready to create")
+    
+    if st.button("Create Parcels", type="primary", key="bulk_create"):
+        items = [
+            {
+                "sender_name": row["sender_name"],
+                "sender_phone": row["sender_phone"],
+                "sender_location": row["sender_location"] or None,
+                "receiver_name": row["receiver_name"],
+                "receiver_phone": row["receiver_phone"],
+                "receiver_location": row["receiver_location"] or None,
+                "parcel_type": row["parcel_type"],
+                "value": {"amount": row["value_amount"] or 0, "currency": row["value_currency"] or "USD"},
+                "amount_paid": {"amount": row["amount_paid"] or 0, "currency": row["amount_currency"] or "USD"},
+                "special_instructions": row.get("special_instructions") or None,
+            }
+            for _, row in df.iterrows()
+        ]
+        try:
+            result = api_client.post("/parcels/bulk", {"items": items}, token=st.session_state.token)
+        except Exception as e:
+            st.error(f"❌ Bulk intake failed: {str(e)}")
+            return
+        
+        st.success(f"✅ Created {len(result['created'])} parcels")
+        if result["errors"]:
+            st.warning(f"{len(result['errors'])} rows were rejected")
+            st.dataframe(pd.DataFrame([
+                {
+                    "row": err["index"] + 2,  # header is line 1
+                    "problems": "; ".join(f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in err["errors"]),
+                }
+                for err in result["errors"]
+            ]))
+
+
+def assign_rider_form(parcel: Dict[str, Any], riders: list):
     """Form to assign a rider to a parcel"""
     st.subheader("🚚 Assign Rider")
+    parcel_id = parcel["id"]
     
-    # Check if parcel already has an assignment
-    try:
-        assignments = api_client.get("/dispatch", token=st.session_state.token) or []
-        current_assignment = next((a for a in assignments if a.get("parcel_id") == parcel_id), None)
-        
-        if current_assignment:
-            st.info(f"Parcel is currently assigned to: {current_assignment.get('rider_name', 'Unknown Rider')}")
-            if st.button("Reassign Rider"):
-                st.session_state.reassigning = True
-                st.rerun()
-                        else:
-            st.info("No rider currently assigned to this parcel")
-                            
-                    except Exception as e:
-        st.warning(f"Could not check current assignment: {str(e)}")
+    # The parcel listing embeds the current assignment, no extra request needed
+    current_assignment = parcel.get("current_assignment")
+    
+    if current_assignment:
+        st.info(f"Parcel is currently assigned to: {current_assignment['rider']['full_name']}")
+        if st.button("Reassign Rider"):
+            st.session_state.reassigning = True
+            st.rerun()
+    else:
+        st.info("No rider currently assigned to this parcel")
     
     if st.button("Assign New Rider") or st.session_state.get("reassigning", False):
         with st.form("assign_rider"):
@@ -172,10 +232,10 @@ def update_parcel_status_form(parcel: Dict[str, Any]):
         notes = st.text_area("Notes", key="notes")
         
         if st.form_submit_button("Update Status"):
-                            try:
-                                payload = {
-                                    "status": new_status,
-                                    "location": location,
+            try:
+                payload = {
+                    "status": new_status,
+                    "location": location,
                     "notes": notes or f"Status updated to {new_status}"
                 }
                 
@@ -195,24 +255,16 @@ def dispatch_parcel_form(parcel: Dict[str, Any]):
         return
     
     # Check if parcel has a rider assigned
-    try:
-        assignments = api_client.get("/dispatch", token=st.session_state.token) or []
-        has_rider = any(a.get("parcel_id") == parcel["id"] for a in assignments)
-        
-        if not has_rider:
-            st.warning("⚠️ Please assign a rider before dispatching")
-            return
-            
-    except Exception as e:
-        st.warning(f"Could not check rider assignment: {str(e)}")
+    if not parcel.get("current_assignment"):
+        st.warning("⚠️ Please assign a rider before dispatching")
         return
     
     if st.button("Dispatch Parcel", type="primary"):
         try:
             result = api_client.post(f"/dispatch/{parcel['id']}/dispatch", token=st.session_state.token)
             st.success("✅ Parcel dispatched successfully! OTP has been sent to receiver.")
-                                st.rerun()
-                            except Exception as e:
+            st.rerun()
+        except Exception as e:
             st.error(f"❌ Failed to dispatch parcel: {str(e)}")
 
 def view_tracking_history(parcel_id: str):
@@ -259,8 +311,6 @@ def render_parcel_management(token: str):
         st.session_state.reassigning = False
     
     try:
-        # Fetch data
-        parcels = api_client.get("/parcels", token) or []
         riders = api_client.get("/riders", token) or []
         
         # Create tabs for different functionalities
@@ -269,21 +319,36 @@ def render_parcel_management(token: str):
         with tab1:
             st.subheader("All Parcels")
             
+            # Filters are applied by the API, which returns one page at a time
+            st.subheader("🔍 Search & Filter")
+            col1, col2, col3, col4 = st.columns(4)
+            
+            with col1:
+                status_filter = st.selectbox("Filter by Status", ["All"] + PARCEL_STATUSES, key="status_filter")
+            
+            with col2:
+                dispatched_filter = st.selectbox("Dispatched", list(YES_NO), key="dispatched_filter")
+            
+            with col3:
+                delivered_filter = st.selectbox("Delivered", list(YES_NO), key="delivered_filter")
+            
+            with col4:
+                search_term = st.text_input("Search this page by ID or Name", key="search")
+            
+            parcels = paged_listing("parcels_page", "/parcels", token, {
+                "include_assignment": True,
+                "status": None if status_filter == "All" else status_filter,
+                "dispatched": YES_NO[dispatched_filter],
+                "delivered": YES_NO[delivered_filter],
+            })
+            
             if parcels:
                 # Prepare data for display
                 display_data = []
                 for parcel in parcels:
-                    # Get rider assignment info
-                    rider_name = "Unassigned"
-                    try:
-                        assignments = api_client.get("/dispatch", token=token) or []
-                        assignment = next((a for a in assignments if a.get("parcel_id") == parcel["id"]), None)
-                        if assignment:
-                            rider = next((r for r in riders if r["id"] == assignment.get("rider_id")), None)
-                            if rider:
-                                rider_name = rider["full_name"]
-                    except:
-                        pass
+                    # Rider assignment is embedded in the listing
+                    assignment = parcel.get("current_assignment")
+                    rider_name = assignment["rider"]["full_name"] if assignment else "Unassigned"
                     
                     display_data.append({
                         "ID": parcel["id"][:8] + "...",
@@ -300,52 +365,30 @@ def render_parcel_management(token: str):
                     })
                 
                 df = pd.DataFrame(display_data)
-                st.dataframe(df, use_container_width=True)
-                
-                # Search and filter
-                st.subheader("🔍 Search & Filter")
-                col1, col2, col3 = st.columns(3)
-                
-                with col1:
-                    search_term = st.text_input("Search by ID, Name, or Phone", key="search")
                 
-                with col2:
-                    status_filter = st.selectbox("Filter by Status", ["All"] + list(set(p["current_status"] for p in parcels)), key="status_filter")
+                if search_term:
+                    mask = (
+                        df["ID"].str.contains(search_term, case=False, na=False) |
+                        df["Sender"].str.contains(search_term, case=False, na=False) |
+                        df["Receiver"].str.contains(search_term, case=False, na=False)
+                    )
+                    df = df[mask]
                 
-                with col3:
-                    rider_filter = st.selectbox("Filter by Rider", ["All"] + list(set(d["Rider"] for d in display_data)), key="rider_filter")
-                
-                # Apply filters
-                if search_term or status_filter != "All" or rider_filter != "All":
-                    filtered_df = df.copy()
-                    
-                    if search_term:
-                        mask = (
-                            filtered_df["ID"].str.contains(search_term, case=False, na=False) |
-                            filtered_df["Sender"].str.contains(search_term, case=False, na=False) |
-                            filtered_df["Receiver"].str.contains(search_term, case=False, na=False)
-                        )
-                        filtered_df = filtered_df[mask]
-                    
-                    if status_filter != "All":
-                        filtered_df = filtered_df[filtered_df["Status"].str.contains(status_filter, na=False)]
-                    
-                    if rider_filter != "All":
-                        filtered_df = filtered_df[filtered_df["Rider"] == rider_filter]
-                    
-                    st.subheader("Filtered Results")
-                    st.dataframe(filtered_df, use_container_width=True)
-        
-        else:
-            st.info("No parcels found.")
+                st.dataframe(df, use_container_width=True)
+            
+            else:
+                st.info("No parcels found.")
         
         with tab2:
             create_parcel_form()
+            st.markdown("---")
+            bulk_parcel_upload()
         
         with tab3:
             st.subheader("Manage Individual Parcels")
             
             if parcels:
+                st.caption("Parcels on the current page of the listing")
                 # Select parcel to manage
                 parcel_options = {p["id"]: f"{p['id'][:8]}... - {p['sender_name']} → {p['receiver_name']} ({p['current_status']})" for p in parcels}
                 selected_parcel_id = st.selectbox("Select Parcel to Manage", options=list(parcel_options.keys()), format_func=lambda x: parcel_options[x])
@@ -381,7 +424,7 @@ def render_parcel_management(token: str):
                         col1, col2, col3 = st.columns(3)
                         
                         with col1:
-                            assign_rider_form(selected_parcel["id"], riders)
+                            assign_rider_form(selected_parcel, riders)
                         
                         with col2:
                             update_parcel_status_form(selected_parcel)
@@ -399,32 +442,27 @@ def render_parcel_management(token: str):
         with tab4:
             st.subheader("📊 Parcel Analytics")
             
-            if parcels:
+            summary = api_client.get("/analytics/summary", token)
+            if summary["total"]:
+                status_counts = api_client.get("/analytics/status", token)["by_status"]
                 col1, col2, col3, col4 = st.columns(4)
                 
                 # Total parcels
                 with col1:
-                    st.metric("Total Parcels", len(parcels))
+                    st.metric("Total Parcels", summary["total"])
                 
                 # Status breakdown
                 with col2:
-                    status_counts = {}
-                    for parcel in parcels:
-                        status = parcel.get("current_status", "Unknown")
-                        status_counts[status] = status_counts.get(status, 0) + 1
-                    
                     most_common_status = max(status_counts.items(), key=lambda x: x[1]) if status_counts else ("None", 0)
                     st.metric("Most Common Status", f"{most_common_status[0]} ({most_common_status[1]})")
                 
                 # Dispatched vs not dispatched
                 with col3:
-                    dispatched_count = sum(1 for p in parcels if p.get("dispatched"))
-                    st.metric("Dispatched", f"{dispatched_count}/{len(parcels)}")
+                    st.metric("Dispatched", f"{summary['dispatched']}/{summary['total']}")
                 
                 # Delivered vs not delivered
                 with col4:
-                    delivered_count = sum(1 for p in parcels if p.get("delivered"))
-                    st.metric("Delivered", f"{delivered_count}/{len(parcels)}")
+                    st.metric("Delivered", f"{summary['delivered']}/{summary['total']}")
                 
                 # Status distribution chart
                 st.subheader("Status Distribution")
@@ -433,7 +471,7 @@ def render_parcel_management(token: str):
                 
                 # Recent activity
                 st.subheader("Recent Activity")
-                recent_parcels = sorted(parcels, key=lambda x: x.get("received_at", ""), reverse=True)[:10]
+                recent_parcels = api_client.get("/parcels", token, {"limit": 10})["items"]
                 recent_data = []
                 
                 for parcel in recent_parcels:
@@ -17,6 +17,7 @@ import streamlit.components.v1 as components
 # Add dashboard root to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from api.client import api_client  # your client
+from api.pagination import paged_listing
 
 
 # -------------------- Utilities --------------------
@@ -229,12 +230,6 @@ def render_receipts(token: str):
     if "open_action" not in ss:
         ss["open_action"] = None  # tuple(action, html) where action in {"open","print","bulk_print"}
 
-    try:
-        parcels = api_client.get("/parcels", token) or []
-    except Exception as e:
-        st.error(f"Failed to fetch parcels: {e}")
-        parcels = []
-
     # ---------- Generate form ----------
     st.subheader("Generate New Receipt")
     with st.form("generate_receipt"):
@@ -249,10 +244,13 @@ def render_receipts(token: str):
     if submitted and parcel_id:
         try:
             receipt = api_client.post(f"/payments/{parcel_id}/receipt", {}, token)
-            # attach parcel details if API doesn't include them, attempt to find parcel locally
+            # attach parcel details if API doesn't include them, fetching the parcel by id
             # (some APIs return full receipt + parcel; if not, find parcel)
             if not receipt.get("parcel"):
-                matched = next((p for p in parcels if p.get("id") == parcel_id), None)
+                try:
+                    matched = api_client.get(f"/parcels/{parcel_id}", token)
+                except Exception:
+                    matched = None
                 if matched:
                     # copy payments into parcel for consistent display
                     matched_payments = matched.get("payments", [])
@@ -284,6 +282,11 @@ def render_receipts(token: str):
 
     # ---------- Receipt History ----------
     st.subheader("Receipt History")
+    try:
+        parcels = paged_listing("receipts_page", "/parcels", token)
+    except Exception as e:
+        st.error(f"Failed to fetch parcels: {e}")
+        parcels = []
     if parcels:
         parcels_with_receipts = [p for p in parcels if p.get("receipt")]
         if parcels_with_receipts:
@@ -340,6 +343,7 @@ def render_receipts(token: str):
     # ---------- Statistics ----------
     if parcels:
         st.subheader("Receipt Statistics")
+        st.caption("For the parcels on this page")
         total_parcels = len(parcels)
         receipts_count = sum(1 for p in parcels if p.get("receipt"))
         receipt_rate = (receipts_count / total_parcels * 100) if total_parcels else 0
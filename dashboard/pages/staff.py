@@ -128,27 +128,16 @@ def render_staff(token: str):
             col1.metric("Active Staff", active_count)
             col2.metric("Inactive Staff", inactive_count)
             
-            # Staff activity (if parcels data available)
+            # Staff activity (aggregated server-side)
             try:
-                parcels = api_client.get("/parcels", token)
-                if parcels:
+                activity = api_client.get("/analytics/staff", token)
+                if activity:
                     st.subheader("Staff Activity")
-                    parcel_df = pd.DataFrame(parcels)
-                    staff_activity = parcel_df.groupby('received_by_id').size().reset_index(name='parcels_handled')
-                    
-                    # Merge with staff info
-                    activity_df = staff_activity.merge(
-                        df[['id', 'full_name', 'role']], 
-                        left_on='received_by_id', 
-                        right_on='id', 
-                        how='left'
-                    )
-                    
-                    if not activity_df.empty:
-                        st.dataframe(activity_df[['full_name', 'role', 'parcels_handled']], 
-                                   use_container_width=True)
-                    else:
-                        st.info("No parcel handling data available.")
+                    activity_df = pd.DataFrame(activity)
+                    st.dataframe(activity_df[['full_name', 'role', 'parcels_handled']], 
+                               use_container_width=True)
+                else:
+                    st.info("No parcel handling data available.")
             except:
                 st.info("Parcel data not available for activity metrics.")
                             